@@ -0,0 +1,279 @@
+"""
+Healix Agent Router
+Picks the agent for a chat message:
+
+- all bilingual keywords are compiled into one regex, matched in a single pass
+  over the normalized message (lowercase; Arabic diacritics / tatweel removed,
+  alef, ta marbuta and alef maqsura unified)
+- keywords match whole words, allowing common affixes (plural / -ing, Arabic
+  clitics like و/ب/ال and possessive suffixes), so "fat" no longer matches
+  "fatigue" and "eat" no longer matches "great"; the longest keyword wins at a
+  position, so "blood pressure" is not also "press"
+- phrases outweigh single words ("weight loss", "lift weights") and a keyword
+  shared by several agents splits its score, which separates "weight" in a
+  training context from a diet context
+- when the top scores tie, or nothing matched, an embedding classifier decides:
+  cosine similarity to per-agent centroids of example questions (computed once),
+  with message vectors cached; without embeddings the old order applies
+- cross-domain questions ("what should I eat and how should I train?") can
+  select several agents (route_many, see the fan-out in agent_system) — only on
+  a real multi-domain signal: AGENT_FANOUT_MIN_SCORE per agent, or parts of the
+  question joined by a conjunction that address different agents; one keyword
+  from another domain ("protein after a workout") is not enough
+"""
+
+import asyncio
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.ai.knowledge_base import get_embeddings
+from app.ai.tracing import span
+
+AGENTS = ("clinical", "nutrition", "exercise", "risk")  # tie-break order without embeddings
+# The risk agent works from the clinical data itself — clinical + risk is no reason to fan out
+FANOUT_COVERS = {"risk": {"clinical"}}
+# Explicit conjunctions between the parts of a multi-part question (matched on the normalized message)
+CONJUNCTIONS = re.compile(
+    r"\b(?:and|also|as well as|plus)\b"
+    r"|\s(?:و|ثم|وايضا|وكذلك)\s|\sو(?=(?:كيف|ماذا|ما|هل|متي|كم|لماذا|اين)\b)"
+)
+
+AGENT_KEYWORDS = {
+    "clinical": [
+        "heart", "blood", "pressure", "vital", "health", "symptom", "disease", "doctor",
+        "oxygen", "spo2", "hrv", "temperature", "alert", "condition", "diagnosis", "pulse",
+        "heart rate", "blood pressure", "blood sugar", "heartbeat", "fever", "headache", "dizzy",
+        "قلب", "ضغط", "دم", "صحة", "عرض", "مرض", "طبيب", "نبض", "اكسجين", "حرارة", "تشخيص",
+        "ضغط الدم", "سكر الدم", "صداع", "دوخة",
+    ],
+    "nutrition": [
+        "food", "eat", "diet", "meal", "calorie", "protein", "carb", "fat", "nutrition", "water",
+        "supplement", "macro", "breakfast", "lunch", "dinner", "snack", "weight loss", "gain",
+        "lose weight", "losing weight", "weight gain", "gain weight", "dietary", "vitamin", "sugar intake",
+        "أكل", "طعام", "وجبة", "سعرة", "بروتين", "كربوهيدرات", "دهون", "تغذية", "ماء",
+        "نظام غذائي", "فطور", "غداء", "عشاء", "مكمل", "وزن",
+        "خسارة الوزن", "إنقاص الوزن", "زيادة الوزن", "فيتامين",
+    ],
+    "exercise": [
+        "exercise", "workout", "gym", "muscle", "training", "weight", "cardio", "stretch",
+        "squat", "press", "curl", "pull", "push", "leg", "chest", "shoulder", "back", "arm",
+        "train", "lift", "lifting", "lift weights", "weight training", "reps", "sets", "run", "running",
+        "تمرين", "تدريب", "عضلة", "رياضة", "جيم", "كارديو", "وزن", "سكوات", "بنش", "كتف",
+        "رفع الأثقال", "أثقال", "جري",
+    ],
+    "risk": [
+        "risk", "predict", "future", "warning", "danger", "prevent", "scenario", "trend",
+        "shap", "deterioration", "deteriorating", "simulation", "digital twin", "compliance", "forecast",
+        "خطر", "توقع", "مستقبل", "تحذير", "وقاية", "سيناريو", "تدهور", "محاكاة",
+    ],
+}
+
+# Example questions per agent — their embedding centroids classify messages the keywords cannot
+AGENT_EXAMPLES = {
+    "clinical": [
+        "Is my heart rate normal at rest?",
+        "My blood pressure reading was high this morning",
+        "I feel dizzy and have a headache, what could it be?",
+        "What does a low oxygen saturation mean?",
+        "هل نبضي طبيعي؟",
+        "عندي صداع ودوخة منذ يومين",
+    ],
+    "nutrition": [
+        "What should I eat for dinner tonight?",
+        "How much protein do I need per day?",
+        "Suggest a healthy breakfast with fewer calories",
+        "Is intermittent fasting good for losing weight?",
+        "ماذا آكل على العشاء؟",
+        "كم سعرة حرارية أحتاج يوميا؟",
+    ],
+    "exercise": [
+        "Is my workout plan too hard this week?",
+        "How many sets and reps should I do for squats?",
+        "My shoulder hurts after bench press",
+        "Give me a cardio routine for beginners",
+        "كيف أحسن تمرين السكوات؟",
+        "ما هو أفضل تمرين للكتف؟",
+    ],
+    "risk": [
+        "What is my risk of a cardiac event?",
+        "Predict how my health will change if I keep this up",
+        "Am I at risk of diabetes in the future?",
+        "Show me scenarios for improving my trends",
+        "ما هي احتمالية تعرضي لخطر صحي؟",
+        "توقع حالتي الصحية في المستقبل",
+    ],
+}
+
+
+# ══════════════════════════════════════════════════════════
+#  NORMALIZATION & KEYWORD AUTOMATON
+# ══════════════════════════════════════════════════════════
+
+_ARABIC_MARKS = re.compile(r"[\u064B-\u0652\u0670\u0640]")  # tashkeel, dagger alef, tatweel
+_ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ة": "ه", "ى": "ي"})
+# Optional Arabic clitics before a keyword (و ف ب ل ك, with or without ال) and common
+# suffixes after it (English inflections, Arabic possessives / plurals)
+_PREFIX = r"(?:[وفبلك]?ال|[وف]?لل|[وفبلك])?"
+_SUFFIX = r"(?:s|es|ing|ed|er|ers|ي|ك|ه|ها|نا|هم|كم|ات|ين|ون|ان)?"
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _ARABIC_MARKS.sub("", text).translate(_ARABIC_LETTERS)
+    return " ".join(text.split())
+
+
+class KeywordMatcher:
+    """All keywords of all agents in one compiled pattern."""
+
+    def __init__(self, keywords: dict[str, list[str]]):
+        self.owners: dict[str, list[str]] = {}
+        for agent, words in keywords.items():
+            for word in words:
+                owners = self.owners.setdefault(normalize(word), [])
+                if agent not in owners:
+                    owners.append(agent)
+        alternatives = "|".join(re.escape(k) for k in sorted(self.owners, key=len, reverse=True))
+        self.pattern = re.compile(rf"(?<!\w){_PREFIX}({alternatives}){_SUFFIX}(?!\w)")
+
+    def scores(self, message: str) -> dict[str, float]:
+        scores = dict.fromkeys(AGENTS, 0.0)
+        for match in self.pattern.finditer(normalize(message)):
+            owners = self.owners[match.group(1)]
+            weight = len(match.group(1).split()) / len(owners)
+            for agent in owners:
+                scores[agent] += weight
+        return scores
+
+
+# ══════════════════════════════════════════════════════════
+#  ROUTER
+# ══════════════════════════════════════════════════════════
+
+class AgentRouter:
+    def __init__(self, keywords: dict[str, list[str]], examples: dict[str, list[str]], cache_size: int):
+        self.matcher = KeywordMatcher(keywords)
+        self.examples = examples
+        self.cache_size = cache_size
+        self._centroids: Optional[dict[str, np.ndarray]] = None
+        self._centroid_lock = asyncio.Lock()
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.routed = {"requested": 0, "keywords": 0, "embedding": 0, "default": 0, "fanout": 0}
+        self.embedding_errors = 0
+
+    def keyword_candidates(self, message: str) -> list[str]:
+        """The agents with the top keyword score (all of them when nothing matched)."""
+        scores = self.matcher.scores(message)
+        best = max(scores.values())
+        return [a for a in AGENTS if scores[a] == best] if best > 0 else list(AGENTS)
+
+    async def _embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.asarray(
+            await asyncio.wait_for(get_embeddings().aembed_documents(texts), settings.AGENT_ROUTER_EMBED_TIMEOUT_SECONDS),
+            dtype=np.float32,
+        )
+        return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-9)
+
+    async def _get_centroids(self) -> dict[str, np.ndarray]:
+        async with self._centroid_lock:
+            if self._centroids is None:
+                agents = [a for a in AGENTS for _ in self.examples[a]]
+                vectors = await self._embed([normalize(t) for a in AGENTS for t in self.examples[a]])
+                centroids = {}
+                for agent in AGENTS:
+                    mean = vectors[[i for i, a in enumerate(agents) if a == agent]].mean(axis=0)
+                    centroids[agent] = mean / (np.linalg.norm(mean) + 1e-9)
+                self._centroids = centroids
+            return self._centroids
+
+    async def _message_vector(self, text: str) -> np.ndarray:
+        vector = self._vectors.get(text)
+        if vector is None:
+            vector = (await self._embed([text]))[0]
+            self._vectors[text] = vector
+            while len(self._vectors) > self.cache_size:
+                self._vectors.popitem(last=False)
+        else:
+            self._vectors.move_to_end(text)
+        return vector
+
+    async def classify(self, message: str, candidates: list[str]) -> Optional[str]:
+        """Nearest agent centroid among `candidates`; None when embeddings are unavailable."""
+        try:
+            centroids = await self._get_centroids()
+            vector = await self._message_vector(normalize(message))
+        except Exception as e:
+            self.embedding_errors += 1
+            print(f"⚠️  Agent router embedding fallback failed: {e}")
+            return None
+        return max(candidates, key=lambda agent: float(centroids[agent] @ vector))
+
+    async def route(self, message: str, requested_agent: Optional[str] = None) -> str:
+        if requested_agent in AGENTS:
+            self.routed["requested"] += 1
+            return requested_agent
+
+        candidates = self.keyword_candidates(message)
+        if len(candidates) == 1:
+            self.routed["keywords"] += 1
+            return candidates[0]
+
+        agent = None
+        if settings.AGENT_ROUTER_EMBEDDINGS:
+            with span("router", "embedding"):
+                agent = await self.classify(message, candidates)
+        if agent is not None:
+            self.routed["embedding"] += 1
+            return agent
+        self.routed["default"] += 1
+        # Old precedence: first tied agent, the clinical agent when nothing matched
+        return candidates[0]
+
+    async def route_many(self, message: str, requested_agent: Optional[str] = None, limit: int = 1) -> list[str]:
+        """
+        Every agent the message clearly addresses (best first, at most `limit`): each needs
+        AGENT_FANOUT_MIN_SHARE of the top keyword score, and either AGENT_FANOUT_MIN_SCORE itself or
+        the top score of its own part of a question joined by a conjunction; it must not be covered
+        by another selected agent (FANOUT_COVERS). Otherwise [route()].
+        """
+        if limit > 1 and requested_agent not in AGENTS:
+            scores = self.matcher.scores(message)
+            floor = max(1.0, max(scores.values()) * settings.AGENT_FANOUT_MIN_SHARE)
+            addressed = self._conjunct_agents(message)
+            selected = [
+                a for a in AGENTS
+                if scores[a] >= floor and (scores[a] >= settings.AGENT_FANOUT_MIN_SCORE or a in addressed)
+            ]
+            selected = [a for a in selected if not any(a in FANOUT_COVERS.get(b, ()) for b in selected)]
+            selected = sorted(selected, key=lambda a: -scores[a])[:limit]
+            if len(selected) > 1:
+                self.routed["fanout"] += 1
+                return selected
+        return [await self.route(message, requested_agent)]
+
+    def _conjunct_agents(self, message: str) -> set[str]:
+        """Top agents of the parts of a conjunction ("…eat and how should I train") — empty unless they differ."""
+        tops, parts = set(), 0
+        for part in CONJUNCTIONS.split(normalize(message)):
+            scores = self.matcher.scores(part)
+            best = max(scores.values())
+            if best > 0:
+                parts += 1
+                tops.update(a for a in AGENTS if scores[a] == best)
+        return tops if parts > 1 and len(tops) > 1 else set()
+
+    def stats(self) -> dict:
+        return {
+            **self.routed,
+            "embedding_errors": self.embedding_errors,
+            "centroids_ready": self._centroids is not None,
+            "cached_vectors": len(self._vectors),
+        }
+
+
+agent_router = AgentRouter(AGENT_KEYWORDS, AGENT_EXAMPLES, settings.AGENT_ROUTER_CACHE_SIZE)
@@ -8,22 +8,36 @@ Reference: https://docs.langchain.com/oss/python/langchain/agents
 """
 
 import asyncio
-import concurrent.futures
-from typing import Optional
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Optional
 from datetime import datetime, timezone, timedelta
 
 from langchain.agents import create_agent
+from langchain.agents.middleware import ModelRequest, dynamic_prompt, wrap_model_call
 from langchain.tools import tool
-from langchain_ollama import ChatOllama
-from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
 
 from app.config import settings
 from app.database import get_db
+from app.retention import fetch_vitals_range
+from app.snapshot import begin_snapshot_scope, get_health_snapshot, prefetch_health_snapshot
+from app.ai.agent_router import agent_router
 from app.ai.knowledge_base import search_knowledge
-
-
-# ── Thread pool for sync DB calls inside tools ────────
-_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+from app.ai.llm_clients import get_chat_model
+from app.ai.checkpointer import get_checkpointer
+from app.ai.context_window import ContextWindowMiddleware, dedupe_history, estimate_tokens
+from app.ai.response_cache import bucket_profile, response_cache
+from app.ai.llm_scheduler import Priority, llm_scheduler
+from app.ai.ollama_router import ollama_router
+from app.ai.tool_calls import ToolCallMiddleware
+from app.ai.tool_format import format_exercise_plan, format_nutrition_plan, format_vitals, tool_outputs
+from app.ai.usage import UsageCallback, usage_meter
+from app.ai.tracing import TraceCallback, finish_trace, record_span, span, start_trace, timed, traced
 
 
 # ── Agent System Prompts ──────────────────────────────
@@ -37,9 +51,9 @@ Your responsibilities:
 - Recommend consulting a doctor when appropriate
 
 IMPORTANT RULES:
-1. ALWAYS use your tools to look up the user's real vital data before answering health questions
+1. The user's current vitals, 24h trends and alerts are in the data snapshot below — answer from it directly; call the vitals tools only for other periods or if no snapshot is given
 2. Use the search_clinical_knowledge tool (RAG) to back your answers with evidence
-3. NEVER make up health data — always query real data first
+3. NEVER make up health data — use only the snapshot and tool results
 4. Respond in the SAME language the user writes in (Arabic or English)
 5. For serious conditions, ALWAYS recommend seeing a doctor
 6. Be caring, professional, and precise with numbers
@@ -55,7 +69,7 @@ Your responsibilities:
 - Recommend supplements when evidence supports them
 
 IMPORTANT RULES:
-1. ALWAYS use your tools to look up the user's real nutrition data and profile
+1. The user's nutrition plan and 7-day meal history are in the data snapshot below — use them directly; call the nutrition tools only for other periods or if no snapshot is given
 2. Use the search_nutrition_knowledge tool (RAG) for evidence-based recommendations
 3. Tailor advice to the user's conditions (diabetes, hypertension, etc.)
 4. Respond in the SAME language the user writes in (Arabic or English)
@@ -73,7 +87,7 @@ Your responsibilities:
 - Track exercise history and progressive overload
 
 IMPORTANT RULES:
-1. ALWAYS use your tools to check the user's exercise data and medical conditions
+1. The user's exercise plan and 7-day history are in the data snapshot below — use them directly; call the exercise tools only for other periods or if no snapshot is given
 2. Use the search_exercise_knowledge tool (RAG) for evidence-based training science
 3. Calculate Safe Load Index — NEVER prescribe dangerous exercises for medical conditions
 4. Respond in the SAME language the user writes in (Arabic or English)
@@ -91,73 +105,56 @@ Your responsibilities:
 - Suggest preventive interventions
 
 IMPORTANT RULES:
-1. ALWAYS use your tools to pull real vital trends and risk factors
+1. The user's risk factor analysis and medication compliance are in the data snapshot below — use them directly; call the risk tools for scenarios, trends or if no snapshot is given
 2. Use the search_risk_knowledge tool (RAG) for evidence-based risk models
 3. Provide SHAP factor analysis: which factors increase/decrease risk and by how much
 4. Respond in the SAME language the user writes in (Arabic or English)
 5. Include specific percentages and timeframes in predictions
-6. Be data-driven — never guess, always query real data
+6. Be data-driven — base every number on the snapshot or tool results, never guess
 
 User Profile: {user_profile}""",
 }
 
-# ── Agent Routing Keywords ────────────────────────────
-AGENT_KEYWORDS = {
-    "clinical": [
-        "heart", "blood", "pressure", "vital", "health", "symptom", "disease", "doctor",
-        "oxygen", "spo2", "hrv", "temperature", "alert", "condition", "diagnosis", "pulse",
-        "قلب", "ضغط", "دم", "صحة", "عرض", "مرض", "طبيب", "نبض", "اكسجين", "حرارة", "تشخيص",
-    ],
-    "nutrition": [
-        "food", "eat", "diet", "meal", "calorie", "protein", "carb", "fat", "nutrition", "water",
-        "supplement", "macro", "breakfast", "lunch", "dinner", "snack", "weight loss", "gain",
-        "أكل", "طعام", "وجبة", "سعرة", "بروتين", "كربوهيدرات", "دهون", "تغذية", "ماء",
-        "نظام غذائي", "فطور", "غداء", "عشاء", "مكمل", "وزن",
-    ],
-    "exercise": [
-        "exercise", "workout", "gym", "muscle", "training", "weight", "cardio", "stretch",
-        "squat", "press", "curl", "pull", "push", "leg", "chest", "shoulder", "back", "arm",
-        "تمرين", "تدريب", "عضلة", "رياضة", "جيم", "كارديو", "وزن", "سكوات", "بنش", "كتف",
-    ],
-    "risk": [
-        "risk", "predict", "future", "warning", "danger", "prevent", "scenario", "trend",
-        "shap", "deterioration", "simulation", "digital twin", "compliance", "forecast",
-        "خطر", "توقع", "مستقبل", "تحذير", "وقاية", "سيناريو", "تدهور", "محاكاة",
-    ],
+# ── Prefetched data snapshot per agent ────────────────
+# Tool calls (name, argument) whose output is gathered before the first model call,
+# replacing the data-tool round-trip the model would otherwise start with.
+SNAPSHOT_TOOLS = {
+    "clinical": [("lookup_vitals", "current"), ("get_vital_trends", "24h"), ("check_health_alerts", "recent")],
+    "nutrition": [("get_nutrition_plan", "current"), ("get_nutrition_history", "7")],
+    "exercise": [("get_exercise_plan", "current"), ("get_exercise_history", "7")],
+    "risk": [("analyze_risk_factors", "overall"), ("check_medication_compliance", "all")],
 }
+# Agents whose snapshot tools read the shared health snapshot (app.snapshot)
+HEALTH_SNAPSHOT_AGENTS = {"clinical", "risk"}
+SNAPSHOT_HEADER = "=== USER DATA SNAPSHOT (fetched from the database for this message) ==="
+
+
+@dataclass
+class AgentTurnContext:
+    """Runtime context of one agent run (create_agent context_schema)."""
+    snapshot: str = ""
+    user_id: str = ""
+    tool_slots: Optional[asyncio.Semaphore] = None  # per-turn cap on concurrent tool calls
+    tool_timings: list = field(default_factory=list)  # filled by ToolCallMiddleware
 
 
 # ══════════════════════════════════════════════════════════
 #  ASYNC DATABASE QUERIES — Real MongoDB via Motor
 # ══════════════════════════════════════════════════════════
+# Profile, latest vitals, medications / compliance and activity counts come from
+# the health snapshot (app.snapshot), loaded once per chat turn and shared by all tools.
 
-async def _db_get_latest_vitals(user_id: str) -> dict:
-    db = get_db()
-    if db is None:
-        return {}
-    doc = await db.vitals.find_one({"user_id": user_id}, sort=[("timestamp", -1)])
-    if doc:
-        doc["_id"] = str(doc["_id"])
-    return doc or {}
-
-
+@traced("mongo")
 async def _db_get_vitals_history(user_id: str, period: str) -> list:
     db = get_db()
     if db is None:
         return []
     deltas = {"24h": timedelta(hours=24), "7d": timedelta(days=7), "30d": timedelta(days=30)}
     start = datetime.now(timezone.utc) - deltas.get(period, timedelta(hours=24))
-    cursor = db.vitals.find(
-        {"user_id": user_id, "timestamp": {"$gte": start}},
-        sort=[("timestamp", 1)],
-    )
-    records = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        records.append(doc)
-    return records
+    return await fetch_vitals_range(user_id, start, db=db)
 
 
+@traced("mongo")
 async def _db_get_alerts(user_id: str) -> list:
     db = get_db()
     if db is None:
@@ -170,16 +167,25 @@ async def _db_get_alerts(user_id: str) -> list:
     return items
 
 
-async def _db_get_nutrition_plan(user_id: str) -> dict:
+@traced("mongo")
+async def _db_get_plan_version(collection: str, user_id: str) -> Optional[tuple]:
+    """(id, created_at) of the user's newest plan — a new plan is a new document, plans are not edited."""
+    db = get_db()
+    if db is None:
+        return None
+    doc = await db[collection].find_one({"user_id": user_id}, {"_id": 1, "created_at": 1}, sort=[("created_at", -1)])
+    return (doc["_id"], doc.get("created_at")) if doc else None
+
+
+@traced("mongo")
+async def _db_get_plan(collection: str, plan_id) -> dict:
     db = get_db()
     if db is None:
         return {}
-    doc = await db.nutrition_plans.find_one({"user_id": user_id}, sort=[("created_at", -1)])
-    if doc:
-        doc["_id"] = str(doc["_id"])
-    return doc or {}
+    return await db[collection].find_one({"_id": plan_id}) or {}
 
 
+@traced("mongo")
 async def _db_get_nutrition_logs(user_id: str, days: int) -> list:
     db = get_db()
     if db is None:
@@ -196,16 +202,7 @@ async def _db_get_nutrition_logs(user_id: str, days: int) -> list:
     return logs
 
 
-async def _db_get_exercise_plan(user_id: str) -> dict:
-    db = get_db()
-    if db is None:
-        return {}
-    doc = await db.exercise_plans.find_one({"user_id": user_id}, sort=[("created_at", -1)])
-    if doc:
-        doc["_id"] = str(doc["_id"])
-    return doc or {}
-
-
+@traced("mongo")
 async def _db_get_exercise_logs(user_id: str, days: int) -> list:
     db = get_db()
     if db is None:
@@ -222,87 +219,55 @@ async def _db_get_exercise_logs(user_id: str, days: int) -> list:
     return logs
 
 
-async def _db_get_medications(user_id: str) -> list:
-    db = get_db()
-    if db is None:
-        return []
-    cursor = db.medications.find({"user_id": user_id})
-    meds = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        meds.append(doc)
-    return meds
-
-
-async def _db_get_medication_compliance(user_id: str) -> dict:
-    db = get_db()
-    if db is None:
-        return {"total": 0, "taken": 0, "compliance": 100}
-    total = await db.medications.count_documents({"user_id": user_id})
-    taken = await db.medications.count_documents({"user_id": user_id, "status": "taken"})
-    compliance = (taken / total * 100) if total > 0 else 100
-    return {"total": total, "taken": taken, "compliance": round(compliance, 1)}
-
-
-async def _db_get_exercise_count(user_id: str, days: int) -> int:
-    db = get_db()
-    if db is None:
-        return 0
-    start = datetime.now(timezone.utc) - timedelta(days=days)
-    return await db.exercise_logs.count_documents(
-        {"user_id": user_id, "created_at": {"$gte": start}, "completed": True}
-    )
-
-
-# ── Sync wrapper for tool execution ──────────────────
-# create_agent tools run synchronously; async DB goes through a new event loop.
-
-def _run_async(coro):
-    """Run an async coroutine from a sync context (inside a tool)."""
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
-
-
 # ══════════════════════════════════════════════════════════
 #  TOOL FACTORIES — Real data queries + RAG knowledge
 # ══════════════════════════════════════════════════════════
+# Data tools are coroutines: the agent runs them on the application event loop,
+# sharing the main Motor pool. Knowledge-base search is blocking, so those tools
+# stay sync and LangChain runs them in its executor. Tool calls of one model step
+# run concurrently, capped per turn by ToolCallMiddleware. Vitals and plans are
+# rendered compactly (app.ai.tool_format) and reused until the data changes.
+
+async def _plan_output(tool_name: str, collection: str, user_id: str, render) -> Optional[str]:
+    """The user's newest plan rendered by `render`, read and rebuilt only when it changed; None without a plan."""
+    version = await _db_get_plan_version(collection, user_id)
+    if version is None:
+        return None
+    text = tool_outputs.get(user_id, tool_name, version)
+    if text is None:
+        plan = await _db_get_plan(collection, version[0])
+        if not plan:
+            return None
+        text = render(plan)
+        tool_outputs.put(user_id, tool_name, version, text)
+    return text
+
 
 def _create_clinical_tools(user_id: str, user_profile: str):
     """Create tools for the Clinical Agent — real MongoDB + RAG."""
 
     @tool
-    def lookup_vitals(query: str) -> str:
-        """Look up the user's current vital signs from the database. Returns real-time heart rate, SpO2, blood pressure, stress, HRV, temperature, steps, calories, sleep data. ALWAYS call this before answering health questions."""
+    async def lookup_vitals(query: str) -> str:
+        """Look up the user's current vital signs from the database. Returns real-time heart rate, SpO2, blood pressure, stress, HRV, temperature, steps, calories, sleep data. The latest reading is usually already in the data snapshot — call this only when the snapshot has no vitals or a newer reading is needed."""
         try:
-            v = _run_async(_db_get_latest_vitals(user_id))
+            v = (await get_health_snapshot(user_id))["latest_vitals"]
             if not v:
                 return "No vital signs data found. The user needs to upload vitals from their wearable device first."
 
-            parts = [f"=== Real-Time Vitals for {user_profile} ==="]
-            if v.get("heart_rate"):       parts.append(f"Heart Rate: {v['heart_rate']} bpm")
-            if v.get("spo2"):             parts.append(f"SpO2: {v['spo2']}%")
-            if v.get("blood_pressure_sys"):
-                parts.append(f"Blood Pressure: {v['blood_pressure_sys']}/{v.get('blood_pressure_dia', '?')} mmHg")
-            if v.get("stress_level"):     parts.append(f"Stress Level: {v['stress_level']}/100")
-            if v.get("hrv"):              parts.append(f"HRV: {v['hrv']} ms")
-            if v.get("body_temp"):        parts.append(f"Body Temp: {v['body_temp']}°C")
-            if v.get("steps"):            parts.append(f"Steps Today: {v['steps']}")
-            if v.get("calories_burned"):  parts.append(f"Calories Burned: {v['calories_burned']} kcal")
-            if v.get("sleep_hours"):
-                parts.append(f"Sleep: {v['sleep_hours']}h (Quality: {v.get('sleep_quality', '?')}%)")
-            if v.get("timestamp"):        parts.append(f"Recorded: {v['timestamp']}")
-            return "\n".join(parts)
+            version = (v.get("_id"), v.get("timestamp"))
+            text = tool_outputs.get(user_id, "lookup_vitals", version)
+            if text is None:
+                text = format_vitals(v)
+                tool_outputs.put(user_id, "lookup_vitals", version, text)
+            return text
         except Exception as e:
             return f"Error retrieving vitals: {e}"
 
     @tool
-    def get_vital_trends(period: str) -> str:
+    async def get_vital_trends(period: str) -> str:
         """Get vital sign trends over a period. Use '24h', '7d', or '30d'. Returns averages, min/max for heart rate, SpO2, stress."""
         try:
-            records = _run_async(_db_get_vitals_history(user_id, period))
+            records = await _db_get_vitals_history(user_id, period)
             if not records:
                 return f"No vital history found for the past {period}."
 
@@ -321,10 +286,10 @@ def _create_clinical_tools(user_id: str, user_profile: str):
             return f"Error retrieving trends: {e}"
 
     @tool
-    def check_health_alerts(query: str) -> str:
+    async def check_health_alerts(query: str) -> str:
         """Check the user's recent health alerts and critical notifications from the monitoring system."""
         try:
-            alerts = _run_async(_db_get_alerts(user_id))
+            alerts = await _db_get_alerts(user_id)
             if not alerts:
                 return "No active health alerts. All vitals are within normal ranges."
 
@@ -347,32 +312,22 @@ def _create_nutrition_tools(user_id: str, user_profile: str):
     """Create tools for the Nutrition Agent — real MongoDB + RAG."""
 
     @tool
-    def get_nutrition_plan(query: str) -> str:
+    async def get_nutrition_plan(query: str) -> str:
         """Get the user's personalized nutrition plan from the database. Contains daily calorie target, macros, water target, and full meal structure with foods."""
         try:
-            plan = _run_async(_db_get_nutrition_plan(user_id))
-            if not plan:
+            text = await _plan_output("get_nutrition_plan", "nutrition_plans", user_id, format_nutrition_plan)
+            if text is None:
                 return "No nutrition plan found for this user yet. Use nutrition knowledge to create a recommendation based on the user profile."
-
-            parts = [f"=== Nutrition Plan for {user_profile} ==="]
-            parts.append(f"Daily Target: {plan.get('daily_calories_target', '?')} kcal")
-            m = plan.get("macros", {})
-            parts.append(f"Macros: {m.get('protein', '?')}g Protein | {m.get('carbs', '?')}g Carbs | {m.get('fat', '?')}g Fat")
-            parts.append(f"Water Target: {plan.get('water_target_liters', '?')}L/day")
-            for meal in plan.get("meals", []):
-                parts.append(f"\n{meal.get('type', 'Meal').upper()} ({meal.get('time', '')}):")
-                for food in meal.get("foods", []):
-                    parts.append(f"  - {food.get('name', '')} ({food.get('name_ar', '')}): {food.get('calories', 0)} kcal, {food.get('protein', 0)}g protein")
-            return "\n".join(parts)
+            return text
         except Exception as e:
             return f"Error retrieving nutrition plan: {e}"
 
     @tool
-    def get_nutrition_history(days: str) -> str:
+    async def get_nutrition_history(days: str) -> str:
         """Get the user's meal logging history. Pass number of days as string (e.g., '7'). Returns calorie and macro totals with compliance analysis."""
         try:
             num_days = int(days) if days.isdigit() else 7
-            logs = _run_async(_db_get_nutrition_logs(user_id, num_days))
+            logs = await _db_get_nutrition_logs(user_id, num_days)
             if not logs:
                 return f"No nutrition logs found for the past {num_days} days."
 
@@ -400,32 +355,22 @@ def _create_exercise_tools(user_id: str, user_profile: str):
     """Create tools for the Exercise Agent — real MongoDB + RAG."""
 
     @tool
-    def get_exercise_plan(query: str) -> str:
+    async def get_exercise_plan(query: str) -> str:
         """Get the user's personalized exercise plan from the database. Contains exercises with sets, reps, muscle groups, tips (AR/EN), alternatives, and safe load index."""
         try:
-            plan = _run_async(_db_get_exercise_plan(user_id))
-            if not plan:
+            text = await _plan_output("get_exercise_plan", "exercise_plans", user_id, format_exercise_plan)
+            if text is None:
                 return "No exercise plan found. Use exercise knowledge to design one based on the user profile."
-
-            parts = [f"=== Exercise Plan for {user_profile} ==="]
-            parts.append(f"Level: {plan.get('user_level', '?')} | Safe Load Index: {plan.get('safe_load_index', '?')}%")
-            for i, ex in enumerate(plan.get("exercises", []), 1):
-                parts.append(f"\n{i}. {ex.get('name', '')} ({ex.get('name_ar', '')})")
-                parts.append(f"   Sets: {ex.get('warmup_sets', 0)} warmup + {ex.get('sets', 0)} working x {ex.get('reps', 0)} reps")
-                parts.append(f"   Rest: {ex.get('rest_seconds', 60)}s | Muscle: {ex.get('muscle_group', '')}")
-                if ex.get("tips"):         parts.append(f"   Tips (AR): {ex['tips']}")
-                if ex.get("tips_en"):      parts.append(f"   Tips (EN): {ex['tips_en']}")
-                if ex.get("alternatives"): parts.append(f"   Alternatives: {', '.join(ex['alternatives'])}")
-            return "\n".join(parts)
+            return text
         except Exception as e:
             return f"Error retrieving exercise plan: {e}"
 
     @tool
-    def get_exercise_history(days: str) -> str:
+    async def get_exercise_history(days: str) -> str:
         """Get the user's exercise logging history. Pass number of days as string (e.g., '7'). Returns session count, completion rate, calories burned."""
         try:
             num_days = int(days) if days.isdigit() else 7
-            logs = _run_async(_db_get_exercise_logs(user_id, num_days))
+            logs = await _db_get_exercise_logs(user_id, num_days)
             if not logs:
                 return f"No exercise logs found for the past {num_days} days."
 
@@ -443,7 +388,7 @@ def _create_exercise_tools(user_id: str, user_profile: str):
             return f"Error retrieving exercise history: {e}"
 
     @tool
-    def calculate_safe_load_index(conditions: str) -> str:
+    async def calculate_safe_load_index(conditions: str) -> str:
         """Calculate Safe Load Index (SLI) based on the user's medical conditions. Pass conditions as comma-separated (e.g., 'hypertension, knee injury'). Returns safety score and exercise restrictions."""
         base_sli = 100
         restrictions = []
@@ -494,12 +439,12 @@ def _create_risk_tools(user_id: str, user_profile: str):
     """Create tools for the Risk Analysis Agent — real MongoDB + RAG."""
 
     @tool
-    def analyze_risk_factors(query: str) -> str:
+    async def analyze_risk_factors(query: str) -> str:
         """Analyze the user's health risk factors using REAL vital data from the database. Calculates overall risk score with SHAP-like factor contributions showing which factors increase/decrease risk."""
         try:
-            vitals = _run_async(_db_get_latest_vitals(user_id))
-            compliance = _run_async(_db_get_medication_compliance(user_id))
-            exercise_count = _run_async(_db_get_exercise_count(user_id, 7))
+            snapshot = await get_health_snapshot(user_id)
+            vitals, compliance = snapshot["latest_vitals"], snapshot["compliance"]
+            exercise_count = snapshot["activity"]["exercises_completed_7d"]
 
             base_risk = 25
             factors = []
@@ -596,10 +541,10 @@ def _create_risk_tools(user_id: str, user_profile: str):
             return f"Error analyzing risk: {e}"
 
     @tool
-    def get_prediction_scenarios(query: str) -> str:
+    async def get_prediction_scenarios(query: str) -> str:
         """Generate predictive what-if health scenarios. Shows what happens if the user follows or ignores recommendations, with specific numbers from real data."""
         try:
-            vitals = _run_async(_db_get_latest_vitals(user_id))
+            vitals = (await get_health_snapshot(user_id))["latest_vitals"]
             hr = vitals.get("heart_rate", 72) if vitals else 72
             stress = vitals.get("stress_level", 30) if vitals else 30
             bp = vitals.get("blood_pressure_sys", 120) if vitals else 120
@@ -634,11 +579,11 @@ def _create_risk_tools(user_id: str, user_profile: str):
             return f"Error generating predictions: {e}"
 
     @tool
-    def check_medication_compliance(query: str) -> str:
+    async def check_medication_compliance(query: str) -> str:
         """Check the user's medication list, compliance rate, and adherence patterns from the database."""
         try:
-            meds = _run_async(_db_get_medications(user_id))
-            compliance = _run_async(_db_get_medication_compliance(user_id))
+            snapshot = await get_health_snapshot(user_id)
+            meds, compliance = snapshot["medications"], snapshot["compliance"]
 
             if not meds:
                 return "No medications registered for this user."
@@ -670,8 +615,6 @@ def _create_risk_tools(user_id: str, user_profile: str):
 #  AGENT FACTORY — create_agent (LangChain v1+)
 # ══════════════════════════════════════════════════════════
 
-_checkpointers: dict[str, InMemorySaver] = {}
-
 # Tool factory map
 _TOOL_FACTORIES = {
     "clinical": _create_clinical_tools,
@@ -681,58 +624,134 @@ _TOOL_FACTORIES = {
 }
 
 
-def _get_or_create_agent(agent_type: str, user_id: str, user_profile: str):
+# Compiled agents: (agent_type, user_id, profile_hash) → (created_at, agent, tools by name), least recently used first
+_agents: "OrderedDict[tuple[str, str, str], tuple[float, object, dict]]" = OrderedDict()
+
+
+def _get_llm() -> BaseChatModel:
+    """Shared chat model from the client registry — stateless and safe to share between agents."""
+    return get_chat_model(settings.LLM_MODEL, 0.7)
+
+
+async def clear_agent_memory(user_id: str):
+    """Forget the user's conversation state in every agent thread."""
+    for agent_type in AGENT_PROMPTS:
+        await get_checkpointer().adelete_thread(f"healix_{user_id}_{agent_type}")
+
+
+def agent_cache_stats() -> dict:
+    return {"compiled_agents": len(_agents), "capacity": settings.AGENT_CACHE_SIZE}
+
+
+def invalidate_user_agents(user_id: str):
+    """Drop every cached agent of a user (call after their profile changes)."""
+    for key in [k for k in _agents if k[1] == user_id]:
+        del _agents[key]
+
+
+@dynamic_prompt
+def _snapshot_prompt(request: ModelRequest) -> str:
+    """Append the prefetched data snapshot (runtime context) to the agent's system prompt."""
+    base = request.system_message.content if request.system_message else ""
+    snapshot = getattr(request.runtime.context, "snapshot", "") if request.runtime else ""
+    return f"{base}\n\n{SNAPSHOT_HEADER}\n{snapshot}" if snapshot else base
+
+
+_tool_calls = ToolCallMiddleware()
+
+
+@wrap_model_call
+async def _scheduled_model_call(request: ModelRequest, handler):
     """
-    Create a specialized agent using create_agent (LangChain v1+).
-    Each agent gets its own tools, system prompt, and memory checkpointer.
+    Every model call of an (already admitted) chat turn waits for a chat-priority LLM slot,
+    then runs on the least-loaded healthy Ollama backend.
     """
-    cache_key = f"{agent_type}_{user_id}"
+    user_id = getattr(request.runtime.context, "user_id", "") if request.runtime else ""
+    queued = time.perf_counter()
+    # A user past the soft token quota drops a priority class (see usage)
+    async with llm_scheduler.slot(usage_meter.priority_for(Priority.CHAT, user_id), user_id, admitted=True):
+        record_span("llm_queue", "chat", (time.perf_counter() - queued) * 1000)
+        return await ollama_router.call_chat(request.model, lambda model: handler(request.override(model=model)))
 
-    # LLM via Ollama
-    llm = ChatOllama(
-        model=settings.LLM_MODEL,
-        base_url=settings.OLLAMA_BASE_URL,
-        temperature=0.7,
-    )
+
+async def build_agent_snapshot(agent_type: str, tools: dict) -> str:
+    """Run the agent's snapshot tools concurrently and join their outputs."""
+    calls = [tools[name].coroutine(arg) for name, arg in SNAPSHOT_TOOLS.get(agent_type, []) if name in tools]
+    with span("snapshot", agent_type):
+        parts = await asyncio.gather(*calls, return_exceptions=True)
+    return "\n\n".join(p for p in parts if isinstance(p, str))
+
+
+def _get_or_create_agent(agent_type: str, user_id: str, user_profile: str, generic: bool = False):
+    """
+    Return the user's compiled agent for this type, building it on a cache miss.
+    Agents are cached in a bounded LRU keyed by type, user and a profile hash,
+    so a profile edit yields a fresh prompt. Entries expire after AGENT_CACHE_TTL_SECONDS.
+    Conversation memory lives in the shared checkpointer and survives rebuilds.
+    A `generic` agent (cacheable turns, built from a bucket profile) is shared by the
+    bucket: knowledge-base tools only and no conversation memory.
+    Returns (agent, tools by name).
+    """
+    profile_hash = hashlib.sha1(user_profile.encode()).hexdigest()[:16]
+    key = (agent_type, "generic" if generic else user_id, profile_hash)
+    now = time.monotonic()
+
+    cached = _agents.get(key)
+    if cached and now - cached[0] < settings.AGENT_CACHE_TTL_SECONDS:
+        _agents.move_to_end(key)
+        return cached[1], cached[2]
+
+    # Stale profile versions of this agent can never be hit again (generic ones are per bucket)
+    if not generic:
+        for stale in [k for k in _agents if k[:2] == key[:2]]:
+            del _agents[stale]
 
     # Tools for this agent — real DB + RAG
-    tools = _TOOL_FACTORIES[agent_type](user_id, user_profile)
+    if generic:
+        tools = [t for t in _TOOL_FACTORIES[agent_type]("", user_profile) if t.name.startswith("search_")]
+    else:
+        tools = _TOOL_FACTORIES[agent_type](user_id, user_profile)
 
     # System prompt with user context
     system_prompt = AGENT_PROMPTS[agent_type].format(user_profile=user_profile)
 
-    # Per-user checkpointer for conversation memory
-    if cache_key not in _checkpointers:
-        _checkpointers[cache_key] = InMemorySaver()
-
-    # Create the agent — LangChain v1+ API
-    agent = create_agent(
-        model=llm,
-        tools=tools,
-        system_prompt=system_prompt,
-        checkpointer=_checkpointers[cache_key],
+    # Old turns fold into a rolling summary once the thread outgrows its budget
+    context_window = ContextWindowMiddleware(
+        model=_get_llm(),
+        budget_tokens=settings.AGENT_CONTEXT_TOKENS_BY_AGENT.get(agent_type, settings.AGENT_CONTEXT_TOKENS),
+        system_tokens=estimate_tokens(system_prompt),
     )
 
-    return agent
+    # Create the agent — LangChain v1+ API
+    with span("agent_build", agent_type):
+        agent = create_agent(
+            model=_get_llm(),
+            tools=tools,
+            system_prompt=system_prompt,
+            middleware=[_snapshot_prompt, context_window, _scheduled_model_call, _tool_calls],
+            context_schema=AgentTurnContext,
+            checkpointer=None if generic else get_checkpointer(),
+        )
+
+    tools_by_name = {t.name: t for t in tools}
+    _agents[key] = (now, agent, tools_by_name)
+    while len(_agents) > settings.AGENT_CACHE_SIZE:
+        _agents.popitem(last=False)
+    return agent, tools_by_name
 
 
 # ══════════════════════════════════════════════════════════
 #  PUBLIC API
 # ══════════════════════════════════════════════════════════
 
-def detect_agent(message: str, requested_agent: Optional[str] = None) -> str:
-    """Route the message to the most appropriate agent based on keyword analysis."""
-    if requested_agent and requested_agent in AGENT_PROMPTS:
-        return requested_agent
+async def detect_agent(message: str, requested_agent: Optional[str] = None) -> str:
+    """Route the message to the most appropriate agent (compiled keywords, embedding fallback)."""
+    return await agent_router.route(message, requested_agent)
 
-    message_lower = message.lower()
-    scores = {}
-    for agent, keywords in AGENT_KEYWORDS.items():
-        score = sum(1 for kw in keywords if kw in message_lower)
-        scores[agent] = score
 
-    best_agent = max(scores, key=scores.get)
-    return best_agent if scores[best_agent] > 0 else "clinical"
+async def detect_agents(message: str, requested_agent: Optional[str] = None) -> list[str]:
+    """The agents for this message, best first — several for a cross-domain question (see fan-out)."""
+    return await agent_router.route_many(message, requested_agent, settings.AGENT_FANOUT_MAX_AGENTS)
 
 
 def build_user_profile(user: dict) -> str:
@@ -750,78 +769,121 @@ def build_user_profile(user: dict) -> str:
     return "; ".join(parts) if parts else "New user — limited profile data available."
 
 
-async def process_chat_message(
-    message: str,
-    user: dict,
-    history: list[dict],
-    requested_agent: Optional[str] = None,
-) -> dict:
-    """
-    Process a chat message through the Healix Multi-Agent AI System.
+async def _no_snapshot() -> str:
+    return ""
 
-    Uses LangChain create_agent (v1+) — NO rule-based fallbacks.
-    Each agent has specialized tools that query REAL MongoDB data
-    and the RAG knowledge base (ChromaDB + BM25 Ensemble Retriever).
+
+async def _resolved(value):
+    return value
+
+
+async def _prepare_turn(message: str, user: dict, history, agent_type: str, generic: bool = False):
+    """
+    Build the routed agent's input messages, run config and runtime context for one chat turn.
+    `history` may be a list or an awaitable (e.g. the DB load), which then runs concurrently
+    with the data snapshot prefetch and the thread's checkpoint lookup.
+    `generic=True` is a cacheable question whose answer may be served to other users: it runs
+    on the bucket's generic agent from the bucket profile only, without snapshot or history.
     """
-    agent_type = detect_agent(message, requested_agent)
-    user_profile = build_user_profile(user)
     user_id = user.get("id", "unknown")
+    user_profile = build_user_profile(bucket_profile(user) if generic else user)
 
     # Create the specialized agent
-    agent = _get_or_create_agent(agent_type, user_id, user_profile)
+    agent, tools = _get_or_create_agent(agent_type, user_id, user_profile, generic)
 
-    # Build conversation messages from history
+    # Thread ID for conversation memory continuity
+    thread_id = f"healix_{user_id}_{agent_type}"
+    config = {"configurable": {"thread_id": thread_id}}
+
+    if not inspect.isawaitable(history):
+        history = _resolved(history)
+    prefetch = not generic and settings.AGENT_PREFETCH_SNAPSHOT
+    if prefetch and agent_type in HEALTH_SNAPSHOT_AGENTS:
+        # Its snapshot tools read the health snapshot — start it with the already-loaded profile
+        prefetch_health_snapshot(user_id, profile=user)
+    snapshot_task = build_agent_snapshot(agent_type, tools) if prefetch else _no_snapshot()
+    history, snapshot, checkpoint = await asyncio.gather(
+        timed("mongo", "chat_history", history),
+        snapshot_task,
+        _resolved(None) if generic else timed("checkpoint", "load", get_checkpointer().aget_tuple(config)),
+    )
+    if generic:
+        history = []  # still awaited above — the load saves the user message
+
+    # The checkpointer replays the thread itself — only send history it has not seen
+    checkpoint_ts = checkpoint.checkpoint["ts"] if checkpoint else None
     messages = []
-    if history:
-        for h in history[-6:]:
-            if h["role"] == "user":
-                messages.append({"role": "user", "content": h["content"]})
-            else:
-                messages.append({"role": "assistant", "content": h["content"]})
+    for h in dedupe_history(history or [], message, agent_type, checkpoint_ts)[-6:]:
+        if h["role"] == "user":
+            messages.append({"role": "user", "content": h["content"]})
+        else:
+            messages.append({"role": "assistant", "content": h["content"]})
 
     # Current message
     messages.append({"role": "user", "content": message})
+    context = AgentTurnContext(
+        snapshot=snapshot, user_id=user_id, tool_slots=asyncio.Semaphore(settings.AGENT_TOOL_CONCURRENCY)
+    )
+    return agent, agent_type, {"messages": messages}, config, context
 
-    # Thread ID for conversation memory continuity
-    thread_id = f"healix_{user_id}_{agent_type}"
 
-    # Invoke the agent with create_agent API
-    result = await agent.ainvoke(
-        {"messages": messages},
-        config={"configurable": {"thread_id": thread_id}},
-    )
+async def _cache_lookup(message: str, user: dict, history, agent_type: str):
+    """
+    Response cache check before an agent run. On a hit lookup.result holds the reply
+    and the history load is still awaited (it saves the user message).
+    """
+    lookup = None
+    if settings.RESPONSE_CACHE_ENABLED:
+        lookup = await timed("cache", "lookup", response_cache.lookup(agent_type, user, message))
+    if lookup and lookup.result and inspect.isawaitable(history):
+        await history
+    return lookup
+
+
+def _cache_store(lookup, result: dict):
+    """Keep a generic answer only if no personal-data tool fed into it."""
+    if lookup and result.get("response") and all(t.startswith("search_") for t in result.get("tools_used", [])):
+        lookup.store(result)
+
+
+def _extract_reply(agent_type: str, result_messages: list) -> dict:
+    """Final answer, tools used and knowledge sources of the latest turn in the thread."""
+    # Only look at the current turn — the checkpointer returns the whole thread
+    turn = result_messages
+    for i in range(len(result_messages) - 1, -1, -1):
+        if getattr(result_messages[i], "type", None) == "human":
+            turn = result_messages[i + 1:]
+            break
 
-    # Extract response from result messages
     response_text = ""
     tools_used = []
     sources = []
 
-    if result.get("messages"):
-        for msg in reversed(result["messages"]):
-            # Get the last AI message (not a tool response)
-            if (
-                hasattr(msg, "content")
-                and msg.content
-                and hasattr(msg, "type")
-                and msg.type == "ai"
-                and not getattr(msg, "tool_call_id", None)
-            ):
-                response_text = msg.content
-                break
-
-        # Collect tool usage and knowledge sources
-        for msg in result["messages"]:
-            if hasattr(msg, "tool_calls") and msg.tool_calls:
-                for tc in msg.tool_calls:
-                    tools_used.append(tc.get("name", "unknown"))
-            if (
-                hasattr(msg, "name")
-                and msg.name
-                and "knowledge" in str(msg.name)
-                and hasattr(msg, "content")
-                and msg.content
-            ):
-                sources.append(str(msg.content)[:300])
+    for msg in reversed(turn):
+        # Get the last AI message (not a tool response)
+        if (
+            hasattr(msg, "content")
+            and msg.content
+            and hasattr(msg, "type")
+            and msg.type == "ai"
+            and not getattr(msg, "tool_call_id", None)
+        ):
+            response_text = msg.content
+            break
+
+    # Collect tool usage and knowledge sources
+    for msg in turn:
+        if hasattr(msg, "tool_calls") and msg.tool_calls:
+            for tc in msg.tool_calls:
+                tools_used.append(tc.get("name", "unknown"))
+        if (
+            hasattr(msg, "name")
+            and msg.name
+            and "knowledge" in str(msg.name)
+            and hasattr(msg, "content")
+            and msg.content
+        ):
+            sources.append(str(msg.content)[:300])
 
     if not response_text:
         response_text = "I'm processing your request through the AI system. Please try again."
@@ -832,3 +894,292 @@ async def process_chat_message(
         "sources": sources,
         "tools_used": list(set(tools_used)),
     }
+
+
+# ══════════════════════════════════════════════════════════
+#  MULTI-AGENT FAN-OUT — cross-domain questions
+# ══════════════════════════════════════════════════════════
+
+SYNTHESIS_PROMPT = """You are Healix, an AI health assistant. Several specialist agents (clinical, nutrition,
+exercise, risk) answered the same user question, each from its own domain and the user's real data.
+
+Merge their answers into ONE reply to the user:
+- Keep every concrete number, recommendation and safety warning; drop repetition
+- Where the specialists disagree, follow the more cautious advice and say why
+- Organize by what the user asked, not by agent — never mention the agents
+- Respond in the SAME language the user wrote in (Arabic or English)"""
+
+
+async def _run_agents(message: str, user: dict, history, agents: list[str], trace) -> list[dict]:
+    """
+    Run several agents on the same message concurrently and return the replies of those done
+    by AGENT_FANOUT_DEADLINE_SECONDS (in routing order; at least the first one to finish).
+    They share the history load and the turn's health snapshot memo (each agent still
+    builds its own data snapshot from it); late agents are cancelled.
+    """
+    if inspect.isawaitable(history):
+        history = asyncio.ensure_future(history)  # loaded once, awaited by every agent
+
+    async def run(agent_type: str) -> dict:
+        agent, _, inputs, config, context = await _prepare_turn(message, user, history, agent_type)
+        config = {**config, "callbacks": [TraceCallback(trace, agent=agent_type), UsageCallback(context.user_id, "chat")]}
+        result = await agent.ainvoke(inputs, config=config, context=context)
+        reply = _extract_reply(agent_type, result.get("messages", []))
+        reply["tool_timings"] = context.tool_timings
+        return reply
+
+    tasks = [asyncio.ensure_future(run(a)) for a in agents]
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=settings.AGENT_FANOUT_DEADLINE_SECONDS)
+        if not done:
+            # Nobody made the deadline — answer with whichever agent finishes first
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Let the cancelled agents unwind (model calls, tools, scheduler slots) before answering
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in pending:
+        print(f"⏱️  Fan-out: {agents[tasks.index(task)]} agent missed the deadline")
+
+    replies = []
+    for agent_type, task in zip(agents, tasks):
+        if task not in done:
+            continue
+        if task.exception() is not None:
+            print(f"⚠️  Fan-out: {agent_type} agent failed: {task.exception()}")
+            continue
+        replies.append(task.result())
+    if not replies:
+        raise next(t.exception() for t in tasks if t in done)
+    return replies
+
+
+async def _synthesize(message: str, replies: list[dict], user_id: str, trace, on_token=None, on_reset=None) -> str:
+    """
+    One model pass merging the agents' answers; falls back to the answers side by side.
+    Streamed text the final answer does not continue (a failed or retried synthesis) is
+    retracted with `on_reset` before the replacement is streamed.
+    """
+    answers = "\n\n".join(f"=== {r['agent'].upper()} SPECIALIST ===\n{r['response']}" for r in replies)
+    messages = [SystemMessage(SYNTHESIS_PROMPT), HumanMessage(f"User question: {message}\n\n{answers}")]
+    config = {"callbacks": [TraceCallback(trace, agent="synthesis"), UsageCallback(user_id, "chat")]}
+    streamed = False
+
+    def emit(token: str):
+        nonlocal streamed
+        if on_token:
+            streamed = True
+            on_token(token)
+
+    def reset():
+        nonlocal streamed
+        if streamed and on_reset:
+            on_reset()
+        streamed = False
+
+    async def merge(model: BaseChatModel) -> str:
+        reset()  # a failover retry starts over
+        parts = []
+        async for chunk in model.astream(messages, config=config):
+            if chunk.content and isinstance(chunk.content, str):
+                parts.append(chunk.content)
+                emit(chunk.content)
+        return "".join(parts)
+
+    try:
+        async with llm_scheduler.slot(usage_meter.priority_for(Priority.CHAT, user_id), user_id, admitted=True):
+            text = await ollama_router.call_chat(_get_llm(), merge)
+        if text.strip():
+            return text
+    except Exception as e:
+        print(f"⚠️  Fan-out synthesis failed, returning the agents' answers: {e}")
+    text = "\n\n".join(r["response"] for r in replies)
+    reset()
+    emit(text)
+    return text
+
+
+def _merge_replies(response: str, replies: list[dict], agents: list[str]) -> dict:
+    answered = [r["agent"] for r in replies]
+    return {
+        "response": response,
+        "agent": answered[0],
+        "agents": answered,
+        "missed_deadline": [a for a in agents if a not in answered],
+        "sources": [s for r in replies for s in r["sources"]],
+        "tools_used": sorted({t for r in replies for t in r["tools_used"]}),
+        "tool_timings": [t for r in replies for t in r["tool_timings"]],
+    }
+
+
+async def _fanout_turn(message: str, user: dict, history, agents: list[str], trace) -> dict:
+    replies = await _run_agents(message, user, history, agents, trace)
+    if len(replies) == 1:
+        response = replies[0]["response"]
+    else:
+        response = await _synthesize(message, replies, user.get("id", "unknown"), trace)
+    return _merge_replies(response, replies, agents)
+
+
+async def _stream_fanout_turn(message: str, user: dict, history, agents: list[str], trace):
+    """Events of a fan-out turn: the merged answer is streamed as the synthesis generates it."""
+    replies = await _run_agents(message, user, history, agents, trace)
+    if len(replies) == 1:
+        yield {"type": "token", "content": replies[0]["response"]}
+        yield {"type": "done", **_merge_replies(replies[0]["response"], replies, agents)}
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+    synthesis = asyncio.ensure_future(_synthesize(
+        message, replies, user.get("id", "unknown"), trace,
+        on_token=lambda token: queue.put_nowait({"type": "token", "content": token}),
+        on_reset=lambda: queue.put_nowait({"type": "reset"}),
+    ))
+    synthesis.add_done_callback(lambda _: queue.put_nowait(None))
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+        response = await synthesis
+    finally:
+        synthesis.cancel()
+    yield {"type": "done", **_merge_replies(response, replies, agents)}
+
+
+async def process_chat_message(
+    message: str,
+    user: dict,
+    history: list[dict] | Awaitable[list[dict]],
+    requested_agent: Optional[str] = None,
+) -> dict:
+    """
+    Process a chat message through the Healix Multi-Agent AI System.
+
+    Uses LangChain create_agent (v1+) — NO rule-based fallbacks.
+    Each agent has specialized tools that query REAL MongoDB data
+    and the RAG knowledge base (ChromaDB + BM25 Ensemble Retriever).
+    The agent's core data is prefetched into the prompt, so tools are only needed for drill-downs.
+    Generic knowledge questions are served from the semantic response cache when possible.
+    A cross-domain question runs its agents concurrently and merges their answers
+    (the reply then also lists `agents`).
+    The turn is traced (see tracing); its span summary is returned as `trace`.
+    """
+    trace = start_trace()
+    begin_snapshot_scope()
+    try:
+        agents = await detect_agents(message, requested_agent)
+        trace.agent = "+".join(agents)
+        if len(agents) > 1:
+            reply = await _fanout_turn(message, user, history, agents, trace)
+            reply["trace"] = finish_trace(trace, "fanout_turn")
+            return reply
+
+        agent_type = agents[0]
+        lookup = await _cache_lookup(message, user, history, agent_type)
+        if lookup and lookup.result:
+            finish_trace(trace, "cached_turn")
+            return lookup.result
+
+        # Cacheable (generic) questions run on the bucket's generic agent — no personal data
+        agent, agent_type, inputs, config, context = await _prepare_turn(
+            message, user, history, agent_type, generic=lookup is not None
+        )
+
+        # Invoke the agent with create_agent API
+        config = {**config, "callbacks": [TraceCallback(trace), UsageCallback(context.user_id, "chat")]}
+        result = await agent.ainvoke(inputs, config=config, context=context)
+        reply = _extract_reply(agent_type, result.get("messages", []))
+        reply["tool_timings"] = context.tool_timings
+        reply["generic"] = lookup is not None  # ran without the thread's checkpointer
+        _cache_store(lookup, reply)
+    except asyncio.CancelledError:
+        finish_trace(trace, "cancelled_turn")  # superseded or client gone (see cancellation)
+        raise
+    except Exception:
+        finish_trace(trace, "failed_turn")
+        raise
+    reply["trace"] = finish_trace(trace)
+    return reply
+
+
+async def stream_chat_message(
+    message: str,
+    user: dict,
+    history: list[dict] | Awaitable[list[dict]],
+    requested_agent: Optional[str] = None,
+):
+    """
+    Streaming variant of process_chat_message. Yields events as the agent runs:
+
+    {"type": "agent", "agent"}            — routed agent, sent first
+    {"type": "tool_start", "tool"}        — the model called a tool
+    {"type": "tool_end", "tool"}          — the tool returned
+    {"type": "token", "content"}          — LLM output as it is generated
+    {"type": "reset"}                     — drop the text streamed so far (a failed fan-out synthesis)
+    {"type": "done", **reply}             — same payload as process_chat_message (incl. tool_timings, trace)
+
+    Tokens of intermediate model steps (text before a tool call) are streamed too;
+    `done.response` is the authoritative final answer. A response cache hit is sent
+    as a single token event. A cross-domain question sends {"type": "agent", "agent", "agents"},
+    then only the tokens of the merged answer.
+    """
+    trace = start_trace()
+    begin_snapshot_scope()
+    kind = "turn"
+    try:
+        agents = await detect_agents(message, requested_agent)
+        trace.agent = "+".join(agents)
+        if len(agents) > 1:
+            yield {"type": "agent", "agent": agents[0], "agents": agents}
+            async for event in _stream_fanout_turn(message, user, history, agents, trace):
+                if event["type"] == "done":
+                    reply, kind = event, "fanout_turn"
+                else:
+                    yield event
+        else:
+            agent_type = agents[0]
+            lookup = await _cache_lookup(message, user, history, agent_type)
+            if lookup and lookup.result:
+                finish_trace(trace, "cached_turn")
+                yield {"type": "agent", "agent": agent_type}
+                yield {"type": "token", "content": lookup.result["response"]}
+                yield {"type": "done", **lookup.result}
+                return
+
+            agent, agent_type, inputs, config, context = await _prepare_turn(
+                message, user, history, agent_type, generic=lookup is not None
+            )
+            yield {"type": "agent", "agent": agent_type}
+
+            final_messages = []
+            announced = set()
+            config = {**config, "callbacks": [TraceCallback(trace), UsageCallback(context.user_id, "chat")]}
+            async for mode, payload in agent.astream(inputs, config=config, context=context, stream_mode=["messages", "values"]):
+                if mode == "values":
+                    final_messages = payload.get("messages", [])
+                    continue
+                chunk, _ = payload
+                if chunk.type == "tool":
+                    yield {"type": "tool_end", "tool": chunk.name}
+                    continue
+                for tc in getattr(chunk, "tool_call_chunks", None) or []:
+                    key = (tc.get("id"), tc.get("index"))
+                    if tc.get("name") and key not in announced:
+                        announced.add(key)
+                        yield {"type": "tool_start", "tool": tc["name"]}
+                if chunk.content and isinstance(chunk.content, str):
+                    yield {"type": "token", "content": chunk.content}
+
+            reply = _extract_reply(agent_type, final_messages)
+            reply["tool_timings"] = context.tool_timings
+            reply["generic"] = lookup is not None  # ran without the thread's checkpointer
+            _cache_store(lookup, reply)
+    except (asyncio.CancelledError, GeneratorExit):
+        # Superseded (see cancellation) or the stream was closed early (SSE client gone)
+        finish_trace(trace, "cancelled_turn")
+        raise
+    except Exception:
+        finish_trace(trace, "failed_turn")
+        raise
+    reply["trace"] = finish_trace(trace, kind)
+    yield {"type": "done", **reply}
@@ -0,0 +1,154 @@
+"""
+Healix Chat Turn Cancellation
+Stops chat turns nobody will read, so their Ollama generation and tool loop stop
+using GPU time:
+
+- each turn runs as its own task, registered per conversation (see
+  conversation_key: the user plus the client's conversation id, or else the
+  requested agent); a new message in the conversation supersedes the turn still
+  running there, turns of the user's other conversations keep going
+- the HTTP, SSE and Socket.IO entry points cancel the turn when the client disconnects
+- cancelling the task unwinds the agent run (model calls, tools, scheduler slot);
+  the in-flight Ollama request is closed with it, and Ollama stops generating
+  when its client goes away
+- cancelled turns are counted per reason and timed in ai_metrics
+  (the "cancelled" series: superseded / disconnected)
+"""
+
+import asyncio
+import time
+import weakref
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Coroutine, Optional, TypeVar
+
+from app.ai.tracing import ai_metrics
+
+T = TypeVar("T")
+
+SUPERSEDED = "superseded"
+DISCONNECTED = "disconnected"
+
+
+def conversation_key(user_id: str, conversation_id: Optional[str] = None, agent: Optional[str] = None) -> str:
+    """Registry key of a chat: the client's conversation (tab / window) id, else the requested agent."""
+    return f"{user_id}:{conversation_id or agent or 'auto'}"
+
+
+class TurnCancelled(Exception):
+    """The turn was cancelled by the registry (superseded or its client disconnected)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ChatTurnRegistry:
+    """The running turn of each conversation."""
+
+    def __init__(self):
+        self._running: dict[str, tuple[asyncio.Task, float]] = {}
+        self._reasons: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+        self.cancelled = {SUPERSEDED: 0, DISCONNECTED: 0}
+
+    def start(self, key: str, coro: Coroutine) -> asyncio.Task:
+        """Run a turn as a task, cancelling the conversation's running turn."""
+        self.cancel(key, SUPERSEDED)
+        task = asyncio.ensure_future(coro)
+        self._running[key] = (task, time.perf_counter())
+        task.add_done_callback(lambda t: self._finished(key, t))
+        return task
+
+    def _finished(self, key: str, task: asyncio.Task):
+        entry = self._running.get(key)
+        if entry and entry[0] is task:
+            del self._running[key]
+
+    def cancel(self, key: str, reason: str, task: Optional[asyncio.Task] = None) -> bool:
+        """Cancel the conversation's running turn (only if it is still `task`, when given)."""
+        entry = self._running.get(key)
+        if entry is None or entry[0].done() or (task is not None and entry[0] is not task):
+            return False
+        running, started = entry
+        del self._running[key]
+        self._reasons[running] = reason
+        running.cancel(reason)
+        self.cancelled[reason] += 1
+        ai_metrics.record("cancelled", reason, (time.perf_counter() - started) * 1000)
+        return True
+
+    def reason(self, task: asyncio.Task) -> Optional[str]:
+        return self._reasons.pop(task, None)
+
+    def stats(self) -> dict:
+        return {"running": len(self._running), "cancelled": dict(self.cancelled)}
+
+
+chat_turns = ChatTurnRegistry()
+
+
+# ══════════════════════════════════════════════════════════
+#  ENTRY POINT HELPERS
+# ══════════════════════════════════════════════════════════
+
+async def run_turn(key: str, coro: Coroutine[None, None, T], disconnected: Optional[Awaitable] = None) -> T:
+    """
+    Run one chat turn of conversation `key` and return its result.
+    `disconnected` completes when the client goes away; the turn is then cancelled.
+    Raises TurnCancelled when the turn was superseded or its client disconnected.
+    """
+    task = chat_turns.start(key, coro)
+    watcher = asyncio.ensure_future(disconnected) if disconnected is not None else None
+    try:
+        if watcher is not None:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not task.done():
+                chat_turns.cancel(key, DISCONNECTED, task)
+        return await task
+    except asyncio.CancelledError:
+        reason = chat_turns.reason(task)
+        if reason is None:
+            # This caller was cancelled (server shutdown, handler torn down) — the turn goes with it
+            chat_turns.cancel(key, DISCONNECTED, task)
+            raise
+        raise TurnCancelled(reason) from None
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+async def stream_turn(key: str, events: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """
+    Run a streamed chat turn of conversation `key` as its own task and relay its events.
+    Closing this generator early (client disconnected) cancels the turn; a superseded
+    turn ends with a {"type": "cancelled", "reason"} event.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    queue.put_nowait(event)
+        finally:
+            queue.put_nowait(None)
+
+    task = chat_turns.start(key, pump())
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+        try:
+            await task
+        except asyncio.CancelledError:
+            reason = chat_turns.reason(task)
+            if reason is None:
+                raise
+            yield {"type": "cancelled", "reason": reason}
+    finally:
+        if not task.done():
+            chat_turns.cancel(key, DISCONNECTED, task)
+
+
+async def wait_for_disconnect(receive) -> None:
+    """Complete when the ASGI client disconnects (call after the request body was read)."""
+    while (await receive())["type"] != "http.disconnect":
+        pass
@@ -0,0 +1,326 @@
+"""
+Healix Agent Checkpointers
+Conversation state (LangGraph checkpoints) for the chat agents, in two tiers:
+
+- BoundedMemorySaver — in-process, with an LRU over threads, idle TTL, byte
+  accounting and a per-thread cap on kept checkpoints. Memory follows active
+  users, not every user who ever chatted.
+- MongoCheckpointSaver — persistent and shared by all workers, so state
+  survives restarts. Only the last CHECKPOINT_KEEP_LAST checkpoints of a
+  thread are kept, and idle threads expire via a TTL index (see retention).
+
+get_checkpointer() returns the process-wide saver chosen by settings.CHECKPOINTER.
+"""
+
+import random
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.database import get_db
+
+CHECKPOINT_COLLECTION = "agent_checkpoints"
+WRITES_COLLECTION = "agent_checkpoint_writes"
+
+_saver: BaseCheckpointSaver | None = None
+
+
+# ══════════════════════════════════════════════════════════
+#  IN-MEMORY TIER
+# ══════════════════════════════════════════════════════════
+
+class BoundedMemorySaver(InMemorySaver):
+    """InMemorySaver that evicts idle / least recently used threads and compacts old checkpoints."""
+
+    def __init__(self, *, max_threads: int, max_bytes: int, ttl_seconds: int, keep_checkpoints: int, serde=None):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.keep_checkpoints = max(keep_checkpoints, 2)
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        self._thread_bytes: dict[str, int] = {}
+        self._thread_blobs: defaultdict[str, set] = defaultdict(set)
+        self.total_bytes = 0
+        self.evictions = 0
+
+    # ── Accounting ──
+    def _touch(self, thread_id: str):
+        self._last_used[thread_id] = time.monotonic()
+        self._last_used.move_to_end(thread_id)
+
+    def _recount(self, thread_id: str):
+        size = 0
+        for ns, checkpoints in self.storage.get(thread_id, {}).items():
+            for checkpoint_id, (checkpoint, metadata, _) in checkpoints.items():
+                size += len(checkpoint[1]) + len(metadata[1])
+                for write in self.writes.get((thread_id, ns, checkpoint_id), {}).values():
+                    size += len(write[2][1])
+        for key in self._thread_blobs.get(thread_id, ()):
+            size += len(self.blobs[key][1])
+        self.total_bytes += size - self._thread_bytes.get(thread_id, 0)
+        self._thread_bytes[thread_id] = size
+
+    def _compact(self, thread_id: str):
+        """Keep only the newest checkpoints of each namespace and the blobs they reference."""
+        for ns, checkpoints in self.storage.get(thread_id, {}).items():
+            if len(checkpoints) <= self.keep_checkpoints:
+                continue
+            for checkpoint_id in sorted(checkpoints)[:-self.keep_checkpoints]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, ns, checkpoint_id), None)
+            referenced = set()
+            for checkpoint, _, _ in checkpoints.values():
+                referenced.update(self.serde.loads_typed(checkpoint)["channel_versions"].items())
+            blob_keys = self._thread_blobs[thread_id]
+            for key in [k for k in blob_keys if k[1] == ns and (k[2], k[3]) not in referenced]:
+                blob_keys.discard(key)
+                self.blobs.pop(key, None)
+
+    def _evict(self, keep: str):
+        now = time.monotonic()
+        while self._last_used:
+            thread_id, last_used = next(iter(self._last_used.items()))
+            over_budget = len(self._last_used) > self.max_threads or self.total_bytes > self.max_bytes
+            if now - last_used < self.ttl_seconds and not over_budget:
+                break
+            if thread_id == keep:
+                if len(self._last_used) == 1:
+                    break
+                self._last_used.move_to_end(thread_id)
+                continue
+            self.delete_thread(thread_id)
+            self.evictions += 1
+
+    async def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "threads": len(self._last_used),
+            "bytes": self.total_bytes,
+            "evictions": self.evictions,
+        }
+
+    # ── Saver API ──
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id in self._last_used:
+            self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"]["checkpoint_ns"]
+        self._thread_blobs[thread_id].update((thread_id, ns, k, v) for k, v in new_versions.items())
+        self._compact(thread_id)
+        self._recount(thread_id)
+        self._touch(thread_id)
+        self._evict(keep=thread_id)
+        return result
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        thread_id = config["configurable"]["thread_id"]
+        self._recount(thread_id)
+        self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        # Uses the per-thread indexes instead of scanning every write / blob in the process
+        for ns, checkpoints in self.storage.pop(thread_id, {}).items():
+            for checkpoint_id in checkpoints:
+                self.writes.pop((thread_id, ns, checkpoint_id), None)
+        for key in self._thread_blobs.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        self.total_bytes -= self._thread_bytes.pop(thread_id, 0)
+        self._last_used.pop(thread_id, None)
+
+
+# ══════════════════════════════════════════════════════════
+#  MONGODB TIER
+# ══════════════════════════════════════════════════════════
+
+class MongoCheckpointSaver(BaseCheckpointSaver[str]):
+    """Async checkpoint saver on the main Motor client; one document per checkpoint."""
+
+    def __init__(self, *, keep_checkpoints: int, serde=None):
+        super().__init__(serde=serde)
+        self.keep_checkpoints = max(keep_checkpoints, 2)
+
+    @staticmethod
+    def _ids(config: RunnableConfig) -> tuple[str, str]:
+        return config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", "")
+
+    async def _to_tuple(self, doc: dict) -> CheckpointTuple:
+        db = get_db()
+        key = {"thread_id": doc["thread_id"], "checkpoint_ns": doc["checkpoint_ns"], "checkpoint_id": doc["checkpoint_id"]}
+        writes = await db[WRITES_COLLECTION].find(key).to_list(None)
+        writes.sort(key=lambda w: writes_sort_key(w.get("task_path", ""), w["task_id"], w["idx"]))
+        parent = doc.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            config={"configurable": key},
+            checkpoint=self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+            metadata=self.serde.loads_typed((doc["metadata_type"], doc["metadata"])),
+            parent_config=(
+                {"configurable": {**key, "checkpoint_id": parent}} if parent else None
+            ),
+            pending_writes=[
+                (w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["value"]))) for w in writes
+            ],
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id, ns = self._ids(config)
+        query = {"thread_id": thread_id, "checkpoint_ns": ns}
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+        doc = await get_db()[CHECKPOINT_COLLECTION].find_one(query, sort=[("checkpoint_id", -1)])
+        return await self._to_tuple(doc) if doc else None
+
+    async def alist(self, config: RunnableConfig | None, *, filter: dict[str, Any] | None = None,
+                    before: RunnableConfig | None = None, limit: int | None = None) -> AsyncIterator[CheckpointTuple]:
+        query: dict[str, Any] = {}
+        if config:
+            query["thread_id"] = config["configurable"]["thread_id"]
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query["checkpoint_ns"] = config["configurable"]["checkpoint_ns"]
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before and (before_id := get_checkpoint_id(before)):
+            query.setdefault("checkpoint_id", {})
+            if isinstance(query["checkpoint_id"], dict):
+                query["checkpoint_id"]["$lt"] = before_id
+        async for doc in get_db()[CHECKPOINT_COLLECTION].find(query, sort=[("checkpoint_id", -1)]):
+            if limit is not None and limit <= 0:
+                break
+            item = await self._to_tuple(doc)
+            if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id, ns = self._ids(config)
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        key = {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}
+        await get_db()[CHECKPOINT_COLLECTION].update_one(key, {"$set": {
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "type": type_,
+            "checkpoint": data,
+            "metadata_type": metadata_type,
+            "metadata": metadata_data,
+            "updated_at": datetime.now(timezone.utc),
+        }}, upsert=True)
+        await self._compact(thread_id, ns)
+        return {"configurable": key}
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        thread_id, ns = self._ids(config)
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        now = datetime.now(timezone.utc)
+        ops = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, data = self.serde.dumps_typed(value)
+            key = {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id,
+                   "task_id": task_id, "idx": write_idx}
+            doc = {"channel": channel, "type": type_, "value": data, "task_path": task_path, "updated_at": now}
+            # Regular writes are idempotent (first one wins); special channels (errors, interrupts) overwrite
+            ops.append(UpdateOne(key, {"$setOnInsert": doc} if write_idx >= 0 else {"$set": doc}, upsert=True))
+        if ops:
+            await get_db()[WRITES_COLLECTION].bulk_write(ops, ordered=False)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        db = get_db()
+        await db[CHECKPOINT_COLLECTION].delete_many({"thread_id": thread_id})
+        await db[WRITES_COLLECTION].delete_many({"thread_id": thread_id})
+
+    async def _compact(self, thread_id: str, ns: str):
+        """Drop everything older than the newest `keep_checkpoints` checkpoints of the thread."""
+        db = get_db()
+        oldest_kept = await db[CHECKPOINT_COLLECTION].find(
+            {"thread_id": thread_id, "checkpoint_ns": ns}, {"checkpoint_id": 1},
+            sort=[("checkpoint_id", -1)], skip=self.keep_checkpoints, limit=1,
+        ).to_list(1)
+        if not oldest_kept:
+            return
+        stale = {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": {"$lte": oldest_kept[0]["checkpoint_id"]}}
+        await db[CHECKPOINT_COLLECTION].delete_many(stale)
+        await db[WRITES_COLLECTION].delete_many(stale)
+
+    async def stats(self) -> dict:
+        db = get_db()
+        return {
+            "backend": "mongo",
+            "checkpoints": await db[CHECKPOINT_COLLECTION].estimated_document_count(),
+            "writes": await db[WRITES_COLLECTION].estimated_document_count(),
+        }
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same version format as InMemorySaver: zero-padded counter + random tiebreak
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+# ══════════════════════════════════════════════════════════
+#  PUBLIC API
+# ══════════════════════════════════════════════════════════
+
+async def ensure_checkpoint_indexes():
+    db = get_db()
+    await db[CHECKPOINT_COLLECTION].create_index(
+        [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)], unique=True
+    )
+    await db[WRITES_COLLECTION].create_index(
+        [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", 1), ("task_id", 1), ("idx", 1)], unique=True
+    )
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Process-wide checkpointer shared by every agent (threads are keyed by thread_id)."""
+    global _saver
+    if _saver is None:
+        if settings.CHECKPOINTER == "mongo":
+            _saver = MongoCheckpointSaver(keep_checkpoints=settings.CHECKPOINT_KEEP_LAST)
+        else:
+            _saver = BoundedMemorySaver(
+                max_threads=settings.CHECKPOINT_MEMORY_MAX_THREADS,
+                max_bytes=settings.CHECKPOINT_MEMORY_MAX_MB * 1024 * 1024,
+                ttl_seconds=settings.CHECKPOINT_IDLE_TTL_SECONDS,
+                keep_checkpoints=settings.CHECKPOINT_KEEP_LAST,
+            )
+    return _saver
+
+
+async def init_checkpointer():
+    if settings.CHECKPOINTER == "mongo":
+        await ensure_checkpoint_indexes()
+    print(f"🧠 Agent memory: {settings.CHECKPOINTER} checkpointer")
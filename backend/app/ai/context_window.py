@@ -0,0 +1,167 @@
+"""
+Healix Agent Context Window
+Keeps every agent thread's prompt under a token budget:
+
+- history dedup — the checkpointer already replays the thread, so only chat
+  history newer than its last checkpoint (turns answered by other agents) is
+  sent along with the current message
+- rolling summary — when the thread outgrows its budget, the oldest turns are
+  folded into a running summary kept in the thread state (the checkpointer)
+  and removed from the replayed messages; the summary rides in the system prompt
+"""
+
+from datetime import datetime, timezone
+from typing import Any, NotRequired, Optional
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain_core.messages import RemoveMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately, get_buffer_string
+from langgraph.constants import TAG_NOSTREAM
+
+from app.ai.llm_scheduler import Priority, llm_scheduler
+from app.ai.ollama_router import ollama_router
+from app.ai.usage import usage_meter
+
+SUMMARY_HEADER = "=== EARLIER IN THIS CONVERSATION (summary) ==="
+SUMMARY_MAX_CHARS = 1200
+# Folded messages are clipped before summarization so the summarizer's own prompt stays small
+FOLD_MESSAGE_MAX_CHARS = 600
+# After a fold the kept messages use at most this share of the room left by the system prompt
+KEEP_RATIO = 0.5
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and the Healix health assistant.
+Keep: symptoms and goals the user reported, key numbers from their data, advice already given, open questions.
+Drop greetings and repetition. Reply with the updated summary only, at most 150 words.
+
+Current summary:
+{summary}
+
+New conversation to fold in:
+{turns}"""
+
+
+class ContextWindowState(AgentState):
+    """Agent state plus the thread's rolling summary of folded turns."""
+    context_summary: NotRequired[str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) — the Ollama models expose no tokenizer."""
+    return len(text) // 4 + 1 if text else 0
+
+
+def _as_utc(ts) -> Optional[datetime]:
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if not isinstance(ts, datetime):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def dedupe_history(history: list[dict], message: str, agent_type: str, checkpoint_ts=None) -> list[dict]:
+    """
+    Chat history entries the agent thread has not seen yet.
+    `history` comes from chat_history (oldest first) and already holds the current message.
+    Without a checkpoint every entry is new; with one, only entries written after it —
+    except this agent's own replies, which are saved just after their checkpoint
+    (cached replies and generic-agent replies never went through the thread, so they
+    count as new).
+    """
+    for i in range(len(history) - 1, -1, -1):
+        if history[i]["role"] == "user" and history[i]["content"] == message:
+            history = history[:i] + history[i + 1:]
+            break
+
+    since = _as_utc(checkpoint_ts)
+    if since is None:
+        return history
+
+    fresh = []
+    for h in history:
+        created = _as_utc(h.get("created_at"))
+        if created is None or created <= since:
+            continue
+        threaded = not (h.get("cached") or h.get("generic"))
+        if h["role"] == "assistant" and h.get("agent") == agent_type and threaded:
+            continue
+        fresh.append(h)
+    return fresh
+
+
+def _fold_point(messages: list, keep_tokens: int) -> int:
+    """
+    Index of the first kept message: the earliest user turn from which the rest fits
+    in keep_tokens. Always keeps the latest user turn, so tool calls are never split
+    from their results.
+    """
+    starts = [i for i, m in enumerate(messages) if m.type == "human"]
+    if not starts:
+        return 0
+    for i in starts:
+        if count_tokens_approximately(messages[i:]) <= keep_tokens:
+            return i
+    return starts[-1]
+
+
+def _clip(message) -> str:
+    text = get_buffer_string([message])
+    return text if len(text) <= FOLD_MESSAGE_MAX_CHARS else text[:FOLD_MESSAGE_MAX_CHARS] + " …"
+
+
+class ContextWindowMiddleware(AgentMiddleware[ContextWindowState]):
+    """Folds old turns into a rolling summary whenever a thread exceeds its token budget."""
+
+    state_schema = ContextWindowState
+
+    def __init__(self, model, budget_tokens: int, system_tokens: int = 0):
+        super().__init__()
+        self.model = model
+        self.budget_tokens = budget_tokens
+        self.system_tokens = system_tokens
+        self.folds = 0
+
+    async def _summarize(self, summary: str, folded: list, user_id: str) -> str:
+        turns = "\n".join(_clip(m) for m in folded)
+        try:
+            # Part of an admitted chat turn — queues for a chat slot like the agent's own calls
+            async with llm_scheduler.slot(usage_meter.priority_for(Priority.CHAT, user_id), user_id, admitted=True):
+                reply = await ollama_router.call_chat(self.model, lambda model: model.ainvoke(
+                    SUMMARY_PROMPT.format(summary=summary or "(none)", turns=turns),
+                    # Internal call — keep it out of the token stream sent to the client
+                    config={"tags": [TAG_NOSTREAM]},
+                ))
+            updated = str(reply.content).strip()
+        except Exception as e:
+            print(f"⚠️  Context summary failed, keeping an extractive one: {e}")
+            updated = ""
+        if not updated:
+            asked = [str(m.content)[:160] for m in folded if m.type == "human"]
+            updated = "\n".join(filter(None, [summary, *(f"- User asked: {q}" for q in asked)]))
+        return updated[-SUMMARY_MAX_CHARS:]
+
+    async def abefore_model(self, state: ContextWindowState, runtime) -> dict[str, Any] | None:
+        messages = state["messages"]
+        summary = state.get("context_summary", "")
+        snapshot = getattr(runtime.context, "snapshot", "") if runtime else ""
+        user_id = getattr(runtime.context, "user_id", "") if runtime else ""
+        room = self.budget_tokens - self.system_tokens - estimate_tokens(snapshot) - estimate_tokens(summary)
+
+        if count_tokens_approximately(messages) <= room:
+            return None
+        cut = _fold_point(messages, max(int(room * KEEP_RATIO), 0))
+        if cut <= 0:
+            return None
+
+        folded = messages[:cut]
+        self.folds += 1
+        return {
+            "messages": [RemoveMessage(id=m.id) for m in folded],
+            "context_summary": await self._summarize(summary, folded, user_id),
+        }
+
+    async def awrap_model_call(self, request, handler):
+        summary = request.state.get("context_summary") if request.state else None
+        if summary:
+            base = request.system_message.content if request.system_message else ""
+            request = request.override(system_message=SystemMessage(content=f"{base}\n\n{SUMMARY_HEADER}\n{summary}"))
+        return await handler(request)
@@ -0,0 +1,267 @@
+"""
+Healix Fake LLM
+Deterministic offline stand-ins for the Ollama chat model and embeddings, so the
+agents, tools and smart features run (and can be benchmarked) without a model
+host. Selected with LLM_PROVIDER=fake:
+
+- FakeChatModel streams its reply token by token with a configurable cost per
+  call: time to first token = FAKE_LLM_LATENCY_MS + prompt prefill
+  (FAKE_LLM_PREFILL_CHARS_PER_MS), then FAKE_LLM_TOKENS_PER_S decode
+- scripted tool calling: FAKE_LLM_TOOL_ROUNDS lists, per model step of a turn,
+  the tools to call ("search_,lookup_vitals;get_" — rounds split by ";", names
+  or name prefixes by ","), matched against the tools bound to the agent; after
+  the last round it answers. A prompt carrying the agent data snapshot skips
+  the data tools (names not starting with "search_"), like a model following
+  the prompt rules
+- prompts asking for JSON are answered with the JSON template they embed, so
+  the smart features parse a well-formed result
+- FakeEmbeddings: hashed bag-of-words vectors
+- usage (input / output tokens) is reported like ChatOllama's, and the simulated
+  model time is counted (fake_llm_stats) so benchmarks can subtract it
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel, agenerate_from_stream, generate_from_stream
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from app.config import settings
+
+EMBED_DIM = 64
+SNAPSHOT_MARKER = "=== USER DATA SNAPSHOT"
+# Tool arguments the fake fills by name; anything else gets the user's message
+TOOL_ARG_VALUES = {"period": "7d", "days": "7", "conditions": "none"}
+
+_stats = {"calls": 0, "tool_calls": 0, "tokens_out": 0, "simulated_ms": 0.0, "embeddings": 0}
+_stats_lock = threading.Lock()  # sync calls run in executor threads
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def fake_llm_stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "simulated_ms": round(_stats["simulated_ms"], 1)}
+
+
+def parse_tool_rounds(spec: str) -> list[list[str]]:
+    """ "search_;get_vital_trends,lookup_" → [["search_"], ["get_vital_trends", "lookup_"]] """
+    return [[p.strip() for p in step.split(",") if p.strip()] for step in spec.split(";") if step.strip()]
+
+
+@functools.lru_cache(maxsize=64)
+def _json_template(prompt: str) -> Optional[str]:
+    """The first JSON object embedded in a prompt (the smart-feature response format)."""
+    decoder = json.JSONDecoder()
+    start = prompt.find("{")
+    while start >= 0:
+        try:
+            value, _ = decoder.raw_decode(prompt, start)
+            if isinstance(value, dict) and value:
+                return json.dumps(value, indent=2)
+        except ValueError:
+            pass
+        start = prompt.find("{", start + 1)
+    return None
+
+
+def hashed_embedding(text: str, dim: int = EMBED_DIM) -> list[float]:
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+# ══════════════════════════════════════════════════════════
+#  CHAT MODEL
+# ══════════════════════════════════════════════════════════
+
+class FakeChatModel(BaseChatModel):
+    """Scripted chat model with a size-dependent, streamed latency per call."""
+
+    latency_ms: float = 200.0
+    prefill_chars_per_ms: float = 40.0
+    tokens_per_s: float = 40.0  # 0 = instant decode
+    reply_tokens: int = 60
+    tool_rounds: list[list[str]] = []
+    tool_args: dict[str, list[str]] = {}  # bound tool name → argument names (set by bind_tools)
+
+    @property
+    def _llm_type(self) -> str:
+        return "healix-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tool_args": {t.name: list(t.args) for t in tools if hasattr(t, "args")}})
+
+    # ── Scripted behaviour ──
+    def _tool_calls(self, messages: list[BaseMessage]) -> list[dict]:
+        # Model steps already taken this turn = AI messages since the last human message
+        step = 0
+        for m in reversed(messages):
+            if m.type == "human":
+                break
+            step += m.type == "ai"
+        if not self.tool_args or step >= len(self.tool_rounds):
+            return []
+
+        has_snapshot = bool(messages) and messages[0].type == "system" and SNAPSHOT_MARKER in str(messages[0].content)
+        question = next((str(m.content) for m in reversed(messages) if m.type == "human"), "")
+        calls = []
+        for name, arg_names in self.tool_args.items():
+            if not any(name.startswith(p) for p in self.tool_rounds[step]):
+                continue
+            if has_snapshot and not name.startswith("search_"):
+                continue
+            args = {a: TOOL_ARG_VALUES.get(a, question) for a in arg_names}
+            calls.append({"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"})
+        return calls
+
+    def _reply_text(self, messages: list[BaseMessage]) -> str:
+        system = str(messages[0].content) if messages and messages[0].type == "system" else ""
+        if "JSON" in system:
+            template = _json_template(system)
+            if template:
+                return template
+        return " ".join(["ok"] * self.reply_tokens)
+
+    def _plan(self, messages: list[BaseMessage]) -> tuple[list[AIMessageChunk], float, float]:
+        """Chunks to stream, seconds to the first one and seconds per following chunk."""
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        prefill = (self.latency_ms + prompt_chars / self.prefill_chars_per_ms) / 1000
+        per_token = 1 / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+
+        calls = self._tool_calls(messages)
+        if calls:
+            chunks = [
+                AIMessageChunk(content="", tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                ])
+                for i, c in enumerate(calls)
+            ]
+            out_tokens = 10 * len(calls)
+        else:
+            words = self._reply_text(messages).split(" ")
+            chunks = [AIMessageChunk(content=w if i == 0 else f" {w}") for i, w in enumerate(words)]
+            out_tokens = len(words)
+
+        chunks.append(AIMessageChunk(content="", usage_metadata={
+            "input_tokens": prompt_chars // 4,
+            "output_tokens": out_tokens,
+            "total_tokens": prompt_chars // 4 + out_tokens,
+        }))
+        # Decode time is spread over the streamed chunks
+        decode = out_tokens * per_token
+        spacing = decode / max(len(chunks) - 1, 1)
+        _count(calls=1, tool_calls=len(calls), tokens_out=out_tokens, simulated_ms=(prefill + decode) * 1000)
+        return chunks, prefill, spacing
+
+    # ── LangChain interface ──
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        chunks, first, spacing = self._plan(messages)
+        time.sleep(first)
+        for i, chunk in enumerate(chunks):
+            if i and spacing:
+                time.sleep(spacing)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        chunks, first, spacing = self._plan(messages)
+        await asyncio.sleep(first)
+        for i, chunk in enumerate(chunks):
+            if i and spacing:
+                await asyncio.sleep(spacing)
+            yield ChatGenerationChunk(message=chunk)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        def stream():
+            for chunk in self._stream(messages, stop, **kwargs):
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        return generate_from_stream(stream())
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        # Like ChatOllama, a plain ainvoke streams internally (the trace sees the first token)
+        async def stream():
+            async for chunk in self._astream(messages, stop, **kwargs):
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+        return await agenerate_from_stream(stream())
+
+
+# ══════════════════════════════════════════════════════════
+#  EMBEDDINGS
+# ══════════════════════════════════════════════════════════
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors with a fixed latency per request."""
+
+    def __init__(self, latency_ms: float = 0.0, dim: int = EMBED_DIM):
+        self.latency_ms = latency_ms
+        self.dim = dim
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency_ms / 1000)
+        _count(embeddings=len(texts))
+        return [hashed_embedding(t, self.dim) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        _count(embeddings=len(texts))
+        return [hashed_embedding(t, self.dim) for t in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+# ══════════════════════════════════════════════════════════
+#  SHARED INSTANCES
+# ══════════════════════════════════════════════════════════
+
+_chat_model: Optional[FakeChatModel] = None
+_embeddings: Optional[FakeEmbeddings] = None
+
+
+def configure_fake_llm(**overrides) -> FakeChatModel:
+    """
+    Replace the shared fake chat model (FAKE_LLM_* settings plus `overrides`, e.g.
+    latency_ms=0, tool_rounds=[["search_"]]). Agents compiled before keep the old one.
+    """
+    global _chat_model
+    params = {
+        "latency_ms": settings.FAKE_LLM_LATENCY_MS,
+        "prefill_chars_per_ms": settings.FAKE_LLM_PREFILL_CHARS_PER_MS,
+        "tokens_per_s": settings.FAKE_LLM_TOKENS_PER_S,
+        "reply_tokens": settings.FAKE_LLM_REPLY_TOKENS,
+        "tool_rounds": parse_tool_rounds(settings.FAKE_LLM_TOOL_ROUNDS),
+    }
+    _chat_model = FakeChatModel(**{**params, **overrides})
+    return _chat_model
+
+
+def get_fake_chat_model() -> FakeChatModel:
+    return _chat_model or configure_fake_llm()
+
+
+def get_fake_embeddings() -> FakeEmbeddings:
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = FakeEmbeddings(settings.FAKE_EMBED_LATENCY_MS)
+    return _embeddings
@@ -5,11 +5,14 @@ Provides the knowledge layer that all 4 agents query for evidence-based answers.
 """
 
 import os
-from langchain_ollama import OllamaEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_community.retrievers import BM25Retriever
 from app.config import settings
+from app.ai.fake_llm import get_fake_embeddings
+from app.ai.ollama_router import RoutedOllamaEmbeddings, ollama_router
+from app.ai.tracing import span
 
 # ── Knowledge Collections ──────────────────────────────
 # Each agent has its own domain-specific knowledge collection.
@@ -303,6 +306,18 @@ RISK_KNOWLEDGE = [
 
 _retrievers: dict = {}
 _vector_stores: dict = {}
+_embeddings: Embeddings | None = None
+
+
+def get_embeddings() -> Embeddings:
+    """Shared embedding client (retrievers and the chat response cache), routed over the Ollama pool."""
+    global _embeddings
+    if _embeddings is None:
+        if settings.LLM_PROVIDER == "fake":
+            _embeddings = get_fake_embeddings()
+        else:
+            _embeddings = RoutedOllamaEmbeddings(ollama_router, settings.EMBED_MODEL)
+    return _embeddings
 
 
 def _get_all_documents(domain: str) -> list[Document]:
@@ -325,13 +340,13 @@ def get_retriever(domain: str):
         return _retrievers[domain]
 
     try:
-        embeddings = OllamaEmbeddings(
-            model=settings.EMBED_MODEL,
-            base_url=settings.OLLAMA_BASE_URL,
-        )
+        embeddings = get_embeddings()
 
         collection_name = f"healix_{domain}"
         persist_dir = settings.CHROMA_PERSIST_DIR
+        if settings.LLM_PROVIDER == "fake":
+            # Fake vectors have another dimension — keep them out of the real collections
+            persist_dir = os.path.join(persist_dir, "fake")
 
         # Ensure the persist directory exists
         os.makedirs(persist_dir, exist_ok=True)
@@ -371,8 +386,9 @@ def get_retriever(domain: str):
 def search_knowledge(domain: str, query: str) -> str:
     """Search the medical knowledge base for a specific domain and query."""
     try:
-        retriever = get_retriever(domain)
-        results = retriever.invoke(query)
+        with span("rag", domain):
+            retriever = get_retriever(domain)
+            results = retriever.invoke(query)
         if results:
             # Deduplicate
             seen = set()
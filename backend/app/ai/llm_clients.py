@@ -0,0 +1,113 @@
+"""
+Healix LLM Client Registry
+Process-wide, long-lived LangChain clients for Ollama:
+
+- one ChatOllama per (backend, model, temperature) and one OllamaEmbeddings per
+  (backend, model), created on first use
+- every client of a backend shares one keep-alive connection pool (async and
+  sync httpx transports, handed to langchain-ollama through its
+  async_client_kwargs / sync_client_kwargs), so no call pays for client
+  construction or a new TCP/TLS handshake
+- one TLS context for all transports: httpx otherwise loads the CA bundle for
+  every client it builds (~30ms each); clients on a shared transport build none
+- every request carries LLM_KEEP_ALIVE_SECONDS / EMBED_KEEP_ALIVE_SECONDS, so
+  the models stay loaded between requests (see model_warmup)
+- close_llm_clients() in the app lifespan closes the pools
+- with LLM_PROVIDER=fake both getters return the offline fakes (app.ai.fake_llm)
+"""
+
+import ssl
+from typing import Optional
+
+import httpx
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+from app.ai.fake_llm import get_fake_chat_model, get_fake_embeddings
+from app.config import settings
+
+# backend URL → shared httpx transports (each one keep-alive connection pool)
+_async_transports: dict[str, httpx.AsyncHTTPTransport] = {}
+_sync_transports: dict[str, httpx.HTTPTransport] = {}
+_chat_models: dict[tuple, ChatOllama] = {}
+_embeddings: dict[tuple, OllamaEmbeddings] = {}
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def _tls() -> dict:
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = httpx.create_ssl_context()
+    return {"verify": _ssl_context}
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS,
+        ),
+        **_tls(),
+    }
+
+
+def _client_kwargs(base_url: str) -> dict:
+    """langchain-ollama client arguments that put the client on the backend's shared transports."""
+    if base_url not in _async_transports:
+        _async_transports[base_url] = httpx.AsyncHTTPTransport(**_pool_kwargs())
+        _sync_transports[base_url] = httpx.HTTPTransport(**_pool_kwargs())
+    return {
+        "client_kwargs": {"timeout": httpx.Timeout(settings.LLM_HTTP_TIMEOUT_SECONDS, connect=5.0)},
+        "sync_client_kwargs": {"transport": _sync_transports[base_url]},
+        "async_client_kwargs": {"transport": _async_transports[base_url]},
+    }
+
+
+def get_chat_model(model: Optional[str] = None, temperature: float = 0.4, base_url: Optional[str] = None) -> ChatOllama:
+    """Shared ChatOllama for this model / temperature on one backend (default OLLAMA_BASE_URL)."""
+    if settings.LLM_PROVIDER == "fake":
+        return get_fake_chat_model()
+    model = model or settings.LLM_MODEL
+    base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+    key = (base_url, model, temperature)
+    if key not in _chat_models:
+        llm = ChatOllama(
+            model=model, base_url=base_url, temperature=temperature,
+            keep_alive=settings.LLM_KEEP_ALIVE_SECONDS, **_client_kwargs(base_url),
+        )
+        _chat_models[key] = llm
+    return _chat_models[key]
+
+
+def get_embeddings_client(model: Optional[str] = None, base_url: Optional[str] = None) -> OllamaEmbeddings:
+    """Shared OllamaEmbeddings for this model on one backend (default OLLAMA_BASE_URL)."""
+    if settings.LLM_PROVIDER == "fake":
+        return get_fake_embeddings()
+    model = model or settings.EMBED_MODEL
+    base_url = (base_url or settings.OLLAMA_BASE_URL).rstrip("/")
+    key = (base_url, model)
+    if key not in _embeddings:
+        _embeddings[key] = OllamaEmbeddings(
+            model=model, base_url=base_url, keep_alive=settings.EMBED_KEEP_ALIVE_SECONDS, **_client_kwargs(base_url)
+        )
+    return _embeddings[key]
+
+
+def llm_client_stats() -> dict:
+    return {
+        "provider": settings.LLM_PROVIDER,
+        "http_pools": len(_async_transports),
+        "chat_models": len(_chat_models),
+        "embedding_clients": len(_embeddings),
+    }
+
+
+async def close_llm_clients():
+    for transport in _async_transports.values():
+        await transport.aclose()
+    for transport in _sync_transports.values():
+        transport.close()
+    _async_transports.clear()
+    _sync_transports.clear()
+    _chat_models.clear()
+    _embeddings.clear()
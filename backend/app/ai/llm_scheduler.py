@@ -0,0 +1,180 @@
+"""
+Healix LLM Scheduler
+Admission control and priority scheduling for every call to Ollama.
+
+- global concurrency cap (LLM_MAX_CONCURRENCY) — Ollama serves a few requests
+  in parallel and queues the rest internally, where priorities are invisible
+- priority classes: interactive chat > triage (symptom checker, drug
+  interactions) > batch (reports, meal plans, journal); LLM_RESERVED_CHAT_SLOTS
+  slots are never handed to lower classes, so a report burst cannot block chat
+- per-user fairness — within a class, waiting users are served round-robin
+- fast rejection — a full class queue or a user over LLM_PER_USER_LIMIT raises
+  LLMSaturated, which the API turns into 429 + Retry-After
+- queue-time metrics per class for /admin/ai-metrics
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+import numpy as np
+
+from app.config import settings
+
+
+class Priority(IntEnum):
+    CHAT = 0
+    TRIAGE = 1
+    BATCH = 2
+
+
+class LLMSaturated(Exception):
+    """The LLM queue for this priority class is full — retry after `retry_after` seconds."""
+
+    def __init__(self, priority: Priority, retry_after: int, reason: str = "queue full"):
+        super().__init__(f"LLM saturated for {priority.name.lower()} requests ({reason})")
+        self.priority = priority
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency: int, reserved_chat_slots: int, queue_limits: dict,
+                 per_user_limit: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        # Slots each class may occupy: lower classes leave the reserved slots to chat
+        self.caps = {
+            p: max_concurrency if p == Priority.CHAT else max(max_concurrency - reserved_chat_slots, 1)
+            for p in Priority
+        }
+        self.queue_limits = queue_limits
+        self.per_user_limit = per_user_limit
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        # priority → user → waiting futures; user order is the round-robin order
+        self._queues: dict[Priority, "OrderedDict[str, deque[asyncio.Future]]"] = {p: OrderedDict() for p in Priority}
+        self._per_user: dict[str, int] = {}
+        # Metrics
+        self._queue_ms = {p: deque(maxlen=2000) for p in Priority}
+        self._service_s = {p: 5.0 for p in Priority}  # EWMA of call duration, for Retry-After
+        self.admitted = {p: 0 for p in Priority}
+        self.rejected = {p: 0 for p in Priority}
+        self.timeouts = {p: 0 for p in Priority}
+
+    # ── Queue state ──
+    def _waiting(self, priority: Priority) -> int:
+        return sum(1 for waiters in self._queues[priority].values() for f in waiters if not f.done())
+
+    def _waiting_ahead(self, priority: Priority) -> int:
+        return sum(self._waiting(p) for p in Priority if p <= priority)
+
+    def _retry_after(self, priority: Priority) -> int:
+        backlog = self._waiting_ahead(priority) + self._active
+        return max(1, math.ceil(backlog * self._service_s[priority] / self.max_concurrency))
+
+    def _dispatch(self):
+        """Hand free slots to waiters: highest class first, round-robin across its users."""
+        for p in Priority:
+            users = self._queues[p]
+            while users and self._active < self.caps[p]:
+                user_id, waiters = next(iter(users.items()))
+                fut = waiters.popleft()
+                if waiters:
+                    users.move_to_end(user_id)
+                else:
+                    del users[user_id]
+                if fut.done():  # timed out or cancelled while waiting
+                    continue
+                self._active += 1
+                fut.set_result(None)
+            if users:
+                # This class still waits for a slot — lower classes must not overtake it
+                return
+
+    # ── Public API ──
+    def admit(self, priority: Priority, user_id: str | None = None):
+        """Raise LLMSaturated right away if a new request of this class would be rejected."""
+        if self._waiting(priority) >= self.queue_limits[priority]:
+            self.rejected[priority] += 1
+            raise LLMSaturated(priority, self._retry_after(priority))
+        if user_id and self._per_user.get(user_id, 0) >= self.per_user_limit:
+            self.rejected[priority] += 1
+            raise LLMSaturated(priority, self._retry_after(priority), "too many requests from this user")
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, user_id: str | None = None, admitted: bool = False):
+        """
+        Hold one LLM slot for the duration of the block.
+        `admitted=True` skips the admission check (follow-up model calls of an admitted chat turn).
+        """
+        if not admitted:
+            self.admit(priority, user_id)
+        user_key = user_id or "anonymous"
+        self._per_user[user_key] = self._per_user.get(user_key, 0) + 1
+        queued_at = time.perf_counter()
+        try:
+            if self._active < self.caps[priority] and not self._waiting_ahead(priority):
+                self._active += 1
+            else:
+                fut = asyncio.get_running_loop().create_future()
+                self._queues[priority].setdefault(user_key, deque()).append(fut)
+                try:
+                    await asyncio.wait({fut}, timeout=self.queue_timeout)
+                except asyncio.CancelledError:
+                    if fut.done():
+                        self._release()
+                    fut.cancel()
+                    raise
+                if not fut.done():
+                    fut.cancel()
+                    self.timeouts[priority] += 1
+                    raise LLMSaturated(priority, self._retry_after(priority), "queue timeout")
+
+            self.admitted[priority] += 1
+            self._queue_ms[priority].append((time.perf_counter() - queued_at) * 1000)
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._service_s[priority] = 0.8 * self._service_s[priority] + 0.2 * (time.perf_counter() - started)
+                self._release()
+        finally:
+            self._per_user[user_key] -= 1
+            if not self._per_user[user_key]:
+                del self._per_user[user_key]
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def stats(self) -> dict:
+        classes = {}
+        for p in Priority:
+            samples = self._queue_ms[p]
+            classes[p.name.lower()] = {
+                "waiting": self._waiting(p),
+                "admitted": self.admitted[p],
+                "rejected": self.rejected[p],
+                "timeouts": self.timeouts[p],
+                "queue_ms_p50": round(float(np.percentile(samples, 50)), 1) if samples else 0.0,
+                "queue_ms_p95": round(float(np.percentile(samples, 95)), 1) if samples else 0.0,
+                "avg_call_s": round(self._service_s[p], 2),
+            }
+        return {"active": self._active, "max_concurrency": self.max_concurrency, "classes": classes}
+
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    reserved_chat_slots=settings.LLM_RESERVED_CHAT_SLOTS,
+    queue_limits={
+        Priority.CHAT: settings.LLM_QUEUE_LIMIT_CHAT,
+        Priority.TRIAGE: settings.LLM_QUEUE_LIMIT_TRIAGE,
+        Priority.BATCH: settings.LLM_QUEUE_LIMIT_BATCH,
+    },
+    per_user_limit=settings.LLM_PER_USER_LIMIT,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,192 @@
+"""
+Healix Model Warm Pool
+Keeps LLM_MODEL and EMBED_MODEL loaded on every Ollama backend that serves them,
+so the first chat or smart-feature request after a deploy or an idle period does
+not wait for Ollama to load the weights:
+
+- at startup the lifespan preloads both models on every backend (an empty
+  /api/generate, a one-word /api/embed) with their keep-alive, and waits up to
+  LLM_WARMUP_STARTUP_WAIT_SECONDS for it before serving
+- every request carries the same keep-alive (see llm_clients), so normal traffic
+  no longer shortens it to Ollama's 5-minute default
+- a background keeper reads /api/ps every LLM_WARMUP_INTERVAL_SECONDS and
+  reloads models that were evicted or expire before the next-but-one check
+- load state per backend and model backs /api/health and /api/health/ready:
+  ready = each model is loaded on at least one healthy backend
+"""
+
+import asyncio
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from app.ai.ollama_router import Backend, OllamaRouter, _model_key, ollama_router
+from app.ai.tracing import ai_metrics
+from app.config import settings
+
+COLD = "cold"
+LOADING = "loading"
+LOADED = "loaded"
+FAILED = "failed"
+
+
+def _parse_expiry(value: str) -> Optional[datetime]:
+    """Ollama's expires_at (RFC 3339, nanoseconds) → aware datetime."""
+    try:
+        value = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+        return datetime.fromisoformat(value)
+    except (AttributeError, ValueError):
+        return None
+
+
+class ModelWarmer:
+    """Preloads and keeps alive a set of models on every backend of the router."""
+
+    def __init__(self, router: OllamaRouter, models: dict[str, tuple[str, int]]):
+        self.router = router
+        self.models = models  # model → ("chat" | "embed", keep-alive seconds)
+        self._states: dict[tuple[str, str], dict] = {}  # (backend URL, model) → load state
+        self.first_pass = asyncio.Event()
+        self.loads = 0
+        self.load_failures = 0
+
+    def _state(self, backend: Backend, model: str) -> dict:
+        return self._states.setdefault((backend.url, model), {"state": COLD, "load_ms": None, "expires_at": None, "error": None})
+
+    async def _preload(self, client: httpx.AsyncClient, backend: Backend, model: str):
+        kind, keep_alive = self.models[model]
+        state = self._state(backend, model)
+        if state["state"] != LOADED:
+            state["state"] = LOADING
+        started = time.perf_counter()
+        try:
+            if kind == "embed":
+                body = {"model": model, "input": "warm-up", "keep_alive": keep_alive}
+                response = await client.post(f"{backend.url}/api/embed", json=body)
+            else:
+                body = {"model": model, "keep_alive": keep_alive}  # no prompt: load only
+                response = await client.post(f"{backend.url}/api/generate", json=body)
+            response.raise_for_status()
+        except Exception as e:
+            self.load_failures += 1
+            state.update(state=FAILED, error=f"{type(e).__name__}: {e}")
+            print(f"⚠️  Could not preload '{model}' on {backend.url}: {e}")
+            return
+        load_ms = (time.perf_counter() - started) * 1000
+        self.loads += 1
+        ai_metrics.record("model_load", model, load_ms)
+        expires = datetime.fromtimestamp(time.time() + keep_alive, timezone.utc).isoformat() if keep_alive >= 0 else None
+        state.update(state=LOADED, load_ms=round(load_ms, 1), expires_at=expires, error=None)
+
+    async def _check(self, client: httpx.AsyncClient, backend: Backend):
+        """Refresh one backend: read what is loaded, preload what is missing or about to expire."""
+        served = [m for m in self.models if backend.serves(m)]
+        if not backend.healthy:
+            for model in served:
+                self._state(backend, model).update(state=COLD, expires_at=None)
+            return
+        try:
+            response = await client.get(f"{backend.url}/api/ps")
+            response.raise_for_status()
+            running = {_model_key(m.get("name") or m.get("model", "")): m for m in response.json().get("models", [])}
+        except Exception as e:
+            print(f"⚠️  Could not read loaded models of {backend.url}: {e}")
+            running = {}
+
+        refresh_before = time.time() + 2 * settings.LLM_WARMUP_INTERVAL_SECONDS
+        # One model at a time per backend: parallel loads would compete for the same GPU memory
+        for model in served:
+            entry = running.get(_model_key(model))
+            expires = _parse_expiry(entry.get("expires_at", "")) if entry else None
+            if entry:
+                self._state(backend, model).update(state=LOADED, expires_at=expires.isoformat() if expires else None)
+            if entry is None or (expires is not None and expires.timestamp() < refresh_before):
+                await self._preload(client, backend, model)
+
+    async def run_pass(self, client: httpx.AsyncClient):
+        await asyncio.gather(*(self._check(client, b) for b in self.router.backends))
+        self.first_pass.set()
+
+    def status(self) -> dict:
+        """Load state per model and backend; `ready` when every model is loaded on a healthy backend."""
+        healthy = {b.url for b in self.router.backends if b.healthy}
+        models = {}
+        for model, (kind, keep_alive) in self.models.items():
+            backends = {
+                url: dict(state) for (url, m), state in sorted(self._states.items()) if m == model
+            }
+            models[model] = {
+                "kind": kind,
+                "keep_alive_seconds": keep_alive,
+                "loaded": any(s["state"] == LOADED and url in healthy for url, s in backends.items()),
+                "backends": backends,
+            }
+        return {
+            "ready": all(m["loaded"] for m in models.values()),
+            "models": models,
+            "loads": self.loads,
+            "load_failures": self.load_failures,
+        }
+
+
+model_warmer = ModelWarmer(ollama_router, {
+    settings.LLM_MODEL: ("chat", settings.LLM_KEEP_ALIVE_SECONDS),
+    settings.EMBED_MODEL: ("embed", settings.EMBED_KEEP_ALIVE_SECONDS),
+})
+_task: Optional[asyncio.Task] = None
+
+
+# ══════════════════════════════════════════════════════════
+#  PUBLIC API
+# ══════════════════════════════════════════════════════════
+
+def model_warmup_status() -> dict:
+    if settings.LLM_PROVIDER == "fake":
+        return {"ready": True, "warmup": "fake provider"}
+    if not settings.LLM_WARMUP_ENABLED:
+        return {"ready": True, "warmup": "disabled"}
+    return {"warmup": "on", **model_warmer.status()}
+
+
+async def _run():
+    timeout = httpx.Timeout(settings.LLM_WARMUP_TIMEOUT_SECONDS, connect=settings.OLLAMA_PROBE_TIMEOUT_SECONDS)
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        # Learn which backends have which models first, so nothing is preloaded where it is not pulled
+        await ollama_router.probe(client)
+        while True:
+            try:
+                await model_warmer.run_pass(client)
+            except Exception as e:
+                print(f"⚠️  Model warm-up pass failed: {e}")
+            await asyncio.sleep(settings.LLM_WARMUP_INTERVAL_SECONDS)
+
+
+async def start_model_warmup():
+    """Preload the models (waiting up to LLM_WARMUP_STARTUP_WAIT_SECONDS), then keep them loaded."""
+    global _task
+    if settings.LLM_PROVIDER == "fake" or not settings.LLM_WARMUP_ENABLED or _task is not None:
+        return
+    _task = asyncio.create_task(_run())
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(model_warmer.first_pass.wait(), settings.LLM_WARMUP_STARTUP_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"⏳ Models still loading after {settings.LLM_WARMUP_STARTUP_WAIT_SECONDS:.0f}s — serving, /api/health/ready reports them")
+        return
+    status = model_warmer.status()
+    loaded = ", ".join(f"{m}: {'loaded' if s['loaded'] else 'cold'}" for m, s in status["models"].items())
+    print(f"{'🔥' if status['ready'] else '⚠️ '} Model warm-up done in {time.perf_counter() - started:.1f}s ({loaded})")
+
+
+async def stop_model_warmup():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,296 @@
+"""
+Healix Ollama Router
+Spreads LLM and embedding calls over a pool of Ollama backends (OLLAMA_BACKENDS).
+
+- each backend is tagged with the models it serves (or serves everything);
+  LLM_MODEL and EMBED_MODEL are routed independently
+- dispatch goes to the least-loaded healthy backend (in-flight calls, then
+  average latency)
+- a background probe (GET /api/tags) marks backends up/down and learns which
+  models they have pulled
+- circuit breaker: OLLAMA_CIRCUIT_FAILURES consecutive failures take a backend
+  out for OLLAMA_CIRCUIT_OPEN_SECONDS, then one trial call decides
+- a call that cannot connect fails over to the next backend
+
+OLLAMA_BACKENDS format — comma-separated, models optional after `|`:
+    http://gpu1:11434|llama3.1:8b;nomic-embed-text,http://gpu2:11434|llama3.1:8b
+Unset, the pool is the single OLLAMA_BASE_URL.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+
+from app.ai.llm_clients import get_chat_model, get_embeddings_client
+from app.config import settings
+
+T = TypeVar("T")
+# Errors raised before the backend accepted the request — safe to retry elsewhere
+CONNECT_ERRORS = (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class NoBackendAvailable(ConnectionError):
+    """No healthy Ollama backend serves the requested model."""
+
+
+def _model_key(name: str) -> str:
+    return name if ":" in name else f"{name}:latest"
+
+
+class Backend:
+    def __init__(self, url: str, models: Optional[set[str]] = None):
+        self.url = url.rstrip("/")
+        self.models = {_model_key(m) for m in models} if models else None  # None → any model
+        self.available: Optional[set[str]] = None  # learnt from /api/tags
+        self.healthy = True
+        self.in_flight = 0
+        self.latency_s = 0.0
+        self.failures = 0  # consecutive
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.requests = 0
+        self.errors = 0
+
+    def serves(self, model: str) -> bool:
+        key = _model_key(model)
+        if self.models is not None and key not in self.models:
+            return False
+        return self.available is None or key in self.available
+
+    def state(self, now: float) -> str:
+        if self.open_until > now:
+            return "open"
+        if self.open_until:
+            return "half-open"
+        return "closed" if self.healthy else "down"
+
+
+class OllamaRouter:
+    def __init__(self, backends: list[Backend], circuit_failures: int, circuit_open_seconds: float):
+        self.backends = backends
+        self.circuit_failures = circuit_failures
+        self.circuit_open_seconds = circuit_open_seconds
+        self._lock = threading.Lock()  # sync embedding calls run in worker threads
+
+    # ── Dispatch ──
+    def _acquire(self, model: str, exclude: set[str] = frozenset()) -> Backend:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b.url not in exclude and b.serves(model)]
+            ready = [b for b in candidates if b.healthy and b.state(now) == "closed"]
+            if not ready:
+                # Circuit cooled down: allow a single trial call through
+                ready = [b for b in candidates if b.state(now) == "half-open" and not b.trial_in_flight]
+                for b in ready[:1]:
+                    b.trial_in_flight = True
+                ready = ready[:1]
+            if not ready:
+                raise NoBackendAvailable(f"No healthy Ollama backend serves '{model}'")
+            backend = min(ready, key=lambda b: (b.in_flight, b.latency_s))
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def _release(self, backend: Backend, ok: bool, elapsed: float):
+        with self._lock:
+            backend.in_flight -= 1
+            backend.trial_in_flight = False
+            if ok:
+                backend.failures = 0
+                if backend.open_until <= time.monotonic():  # a late success must not close an open circuit
+                    backend.open_until = 0.0
+                backend.healthy = True
+                backend.latency_s = elapsed if not backend.latency_s else 0.8 * backend.latency_s + 0.2 * elapsed
+                return
+            backend.errors += 1
+            backend.failures += 1
+            now = time.monotonic()
+            if backend.failures >= self.circuit_failures and backend.open_until <= now:
+                backend.open_until = now + self.circuit_open_seconds
+                print(f"⚠️  Ollama backend {backend.url} circuit open after {backend.failures} failures")
+
+    @asynccontextmanager
+    async def lease(self, model: str, exclude: set[str] = frozenset()):
+        backend = self._acquire(model, exclude)
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield backend
+            ok = True
+        except asyncio.CancelledError:
+            ok = True  # the caller gave up — not the backend's fault
+            raise
+        finally:
+            self._release(backend, ok, time.perf_counter() - started)
+
+    @contextmanager
+    def lease_sync(self, model: str, exclude: set[str] = frozenset()):
+        backend = self._acquire(model, exclude)
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield backend
+            ok = True
+        finally:
+            self._release(backend, ok, time.perf_counter() - started)
+
+    # ── Clients per backend (shared registry, see llm_clients) ──
+    def chat_model_for(self, model: ChatOllama, backend: Backend) -> ChatOllama:
+        return get_chat_model(model.model, model.temperature, backend.url)
+
+    def embedder_for(self, model: str, backend: Backend) -> OllamaEmbeddings:
+        return get_embeddings_client(model, backend.url)
+
+    async def call(self, model: str, call: Callable[[Backend], Awaitable[T]]) -> T:
+        """Run `call(backend)` on the best backend serving `model`, failing over on connection errors."""
+        tried: set[str] = set()
+        while True:
+            try:
+                async with self.lease(model, tried) as backend:
+                    tried.add(backend.url)
+                    return await call(backend)
+            except NoBackendAvailable as e:
+                if tried:
+                    raise ConnectionError(f"All Ollama backends for '{model}' failed") from e
+                raise
+            except CONNECT_ERRORS as e:
+                print(f"⚠️  Ollama call failed on {backend.url}, failing over: {e}")
+
+    def call_sync(self, model: str, call: Callable[[Backend], T]) -> T:
+        tried: set[str] = set()
+        while True:
+            try:
+                with self.lease_sync(model, tried) as backend:
+                    tried.add(backend.url)
+                    return call(backend)
+            except NoBackendAvailable as e:
+                if tried:
+                    raise ConnectionError(f"All Ollama backends for '{model}' failed") from e
+                raise
+            except CONNECT_ERRORS as e:
+                print(f"⚠️  Ollama call failed on {backend.url}, failing over: {e}")
+
+    async def call_chat(self, model, call: Callable[[object], Awaitable[T]]) -> T:
+        """
+        Run `call(model)` with `model` re-pointed at the best backend serving it.
+        Non-Ollama models (test fakes) are called as they are.
+        """
+        if not isinstance(model, ChatOllama):
+            return await call(model)
+        return await self.call(model.model, lambda backend: call(self.chat_model_for(model, backend)))
+
+    # ── Health probes ──
+    async def probe(self, client: httpx.AsyncClient):
+        async def one(backend: Backend):
+            try:
+                response = await client.get(f"{backend.url}/api/tags")
+                response.raise_for_status()
+                names = {_model_key(m.get("name") or m.get("model", "")) for m in response.json().get("models", [])}
+                with self._lock:
+                    if not backend.healthy:
+                        print(f"✅ Ollama backend {backend.url} is back")
+                    backend.healthy = True
+                    backend.available = names
+                    if backend.open_until and backend.open_until <= time.monotonic():
+                        backend.open_until, backend.failures = 0.0, 0
+            except Exception as e:
+                with self._lock:
+                    if backend.healthy:
+                        print(f"⚠️  Ollama backend {backend.url} is down: {e}")
+                    backend.healthy = False
+
+        await asyncio.gather(*(one(b) for b in self.backends))
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "url": b.url,
+                "models": sorted(b.models) if b.models else "any",
+                "available": sorted(b.available) if b.available is not None else None,
+                "state": b.state(now),
+                "in_flight": b.in_flight,
+                "avg_latency_ms": round(b.latency_s * 1000, 1),
+                "requests": b.requests,
+                "errors": b.errors,
+            }
+            for b in self.backends
+        ]
+
+
+class RoutedOllamaEmbeddings(Embeddings):
+    """Embeddings client that sends each call to the best backend serving `model`."""
+
+    def __init__(self, router: OllamaRouter, model: str):
+        self.router = router
+        self.model = model
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.router.call_sync(
+            self.model, lambda backend: self.router.embedder_for(self.model, backend).embed_documents(texts)
+        )
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.router.call(
+            self.model, lambda backend: self.router.embedder_for(self.model, backend).aembed_documents(texts)
+        )
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+# ══════════════════════════════════════════════════════════
+#  PUBLIC API
+# ══════════════════════════════════════════════════════════
+
+def parse_backends(spec: str, default_url: str) -> list[Backend]:
+    backends = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        url, _, models = item.partition("|")
+        backends.append(Backend(url.strip(), {m.strip() for m in models.split(";") if m.strip()} or None))
+    return backends or [Backend(default_url)]
+
+
+ollama_router = OllamaRouter(
+    parse_backends(settings.OLLAMA_BACKENDS, settings.OLLAMA_BASE_URL),
+    circuit_failures=settings.OLLAMA_CIRCUIT_FAILURES,
+    circuit_open_seconds=settings.OLLAMA_CIRCUIT_OPEN_SECONDS,
+)
+_task: Optional[asyncio.Task] = None
+
+
+async def _run():
+    async with httpx.AsyncClient(timeout=settings.OLLAMA_PROBE_TIMEOUT_SECONDS) as client:
+        while True:
+            await ollama_router.probe(client)
+            await asyncio.sleep(settings.OLLAMA_HEALTH_INTERVAL_SECONDS)
+
+
+async def start_ollama_health_checks():
+    global _task
+    if settings.LLM_PROVIDER == "fake":
+        print("🧪 LLM_PROVIDER=fake — offline fake model, no Ollama health checks")
+        return
+    if _task is None:
+        _task = asyncio.create_task(_run())
+        print(f"🩺 Ollama health checks started ({len(ollama_router.backends)} backend(s))")
+
+
+async def stop_ollama_health_checks():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,200 @@
+"""
+Healix Chat Response Cache
+Semantic cache in front of the agents for knowledge-style questions
+("what is normal SpO2", "how much protein should I eat").
+
+- keyed by agent type + coarse profile bucket (age band, gender, conditions,
+  fitness level) + message script (Arabic / Latin), matched on the normalized
+  message — exactly, then by embedding cosine similarity above
+  RESPONSE_CACHE_THRESHOLD
+- messages that need personal data or conversation context ("my", "today",
+  "that", …) bypass the cache entirely and always reach the agent
+- only answers built without personal-data tools are stored, with a TTL and
+  a global LRU bound
+- cacheable turns are answered by a shared per-bucket agent that sees only the
+  bucket fields (see bucket_profile) — no name, weight, allergies, goals,
+  conversation history or personal-data tools — since the answer may be served
+  to anyone in the bucket
+
+The cache is per process, like the compiled agent cache.
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.ai.knowledge_base import get_embeddings
+
+# Words that tie a question to the user's own data or to the ongoing conversation
+# (matched on the normalized message, so "I'm" appears as "i m")
+PERSONAL_MARKERS = re.compile(
+    r"\b(my|me|mine|myself|our|us|am i|i am|i m|i ve|i have|i had|i feel|i took|do i have"
+    r"|today|yesterday|tonight|tomorrow|this (week|month|morning)|last (night|week|month)"
+    r"|recent(ly)?|current(ly)?|it|that|this|those|these|above|again)\b"
+    r"|(عندي|لدي|حالتي|صحتي|ضغطي|نبضي|وزني|خطتي|أدويتي|اليوم|أمس|هذا|ذلك)"
+)
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_ARABIC = re.compile(r"[\u0600-\u06FF]")
+MIN_WORDS = 3
+
+
+def normalize_message(message: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", message.lower()).split())
+
+
+def is_cacheable(message: str) -> bool:
+    """Generic questions only — anything personal or conversational goes to the agent."""
+    text = normalize_message(message)
+    return len(text.split()) >= MIN_WORDS and not PERSONAL_MARKERS.search(text)
+
+
+def bucket_profile(user: dict) -> dict:
+    """The user cut down to the bucket fields — all a cacheable answer may be tailored to."""
+    age = user.get("age")
+    return {
+        "age": f"{age // 10 * 10}s" if isinstance(age, int) else None,
+        "gender": user.get("gender"),
+        "medical_conditions": sorted(c.lower() for c in user.get("medical_conditions") or []),
+        "fitness_level": user.get("fitness_level"),
+    }
+
+
+def profile_bucket(user: dict) -> str:
+    """Coarse profile key: answers may be tailored to these fields, not to exact values."""
+    bucket = bucket_profile(user)
+    parts = [
+        bucket["age"] or "-",
+        str(bucket["gender"] or "-"),
+        ",".join(bucket["medical_conditions"]) or "-",
+        str(bucket["fitness_level"] or "-"),
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+
+@dataclass
+class _Entry:
+    text: str
+    vector: np.ndarray
+    result: dict
+    expires: float
+
+
+@dataclass
+class CacheLookup:
+    """Outcome of a lookup: `result` on a hit, otherwise what store() needs after the agent run."""
+    key: tuple
+    text: str
+    vector: Optional[np.ndarray]
+    result: Optional[dict] = None
+    cache: "ResponseCache" = field(default=None, repr=False)
+
+    def store(self, result: dict):
+        if self.vector is not None and self.cache is not None:
+            self.cache.store(self, result)
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl_seconds: int, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        # (agent_type, profile bucket) → entry id → entry; _order is the global LRU
+        self._buckets: dict[tuple, OrderedDict[int, _Entry]] = {}
+        self._order: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self.hits = self.semantic_hits = self.misses = self.bypassed = self.stores = self.errors = 0
+
+    def _match(self, key: tuple, text: str, vector: Optional[np.ndarray]) -> Optional[tuple[int, _Entry]]:
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return None
+        now = time.monotonic()
+        for entry_id in [i for i, e in bucket.items() if e.expires <= now]:
+            del bucket[entry_id]
+            self._order.pop(entry_id, None)
+
+        for entry_id, entry in bucket.items():
+            if entry.text == text:
+                return entry_id, entry
+        if vector is None or not bucket:
+            return None
+
+        ids = list(bucket)
+        scores = np.stack([bucket[i].vector for i in ids]) @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            self.semantic_hits += 1
+            return ids[best], bucket[ids[best]]
+        return None
+
+    async def lookup(self, agent_type: str, user: dict, message: str) -> Optional[CacheLookup]:
+        """None when the message bypasses the cache; otherwise a hit or a pending miss."""
+        if not is_cacheable(message):
+            self.bypassed += 1
+            return None
+
+        key = (agent_type, profile_bucket(user), "ar" if _ARABIC.search(message) else "en")
+        text = normalize_message(message)
+        exact = self._match(key, text, None)
+        vector = exact[1].vector if exact else None
+        if vector is None:
+            try:
+                vector = np.asarray(await get_embeddings().aembed_query(text), dtype=np.float32)
+                vector /= np.linalg.norm(vector) or 1.0
+            except Exception as e:
+                print(f"⚠️  Response cache embedding failed: {e}")
+                self.errors += 1
+                vector = None
+
+        lookup = CacheLookup(key=key, text=text, vector=vector, cache=self)
+        match = exact or self._match(key, text, vector)
+        if match:
+            self._order.move_to_end(match[0])
+            self.hits += 1
+            lookup.result = {**match[1].result, "cached": True}
+        else:
+            self.misses += 1
+        return lookup
+
+    def store(self, lookup: CacheLookup, result: dict):
+        bucket = self._buckets.setdefault(lookup.key, OrderedDict())
+        entry_id = self._next_id
+        self._next_id += 1
+        bucket[entry_id] = _Entry(
+            text=lookup.text,
+            vector=lookup.vector,
+            result={k: result[k] for k in ("response", "agent", "sources") if k in result},
+            expires=time.monotonic() + self.ttl_seconds,
+        )
+        self._order[entry_id] = lookup.key
+        self.stores += 1
+        while len(self._order) > self.max_entries:
+            old_id, old_key = self._order.popitem(last=False)
+            self._buckets.get(old_key, {}).pop(old_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._order),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "embedding_errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "hit_rate_all_messages": round(self.hits / (lookups + self.bypassed), 3) if lookups + self.bypassed else 0.0,
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    threshold=settings.RESPONSE_CACHE_THRESHOLD,
+)
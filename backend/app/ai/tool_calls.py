@@ -0,0 +1,47 @@
+"""
+Healix Agent Tool Calls
+Execution policy for the tool calls of an agent turn:
+
+- the tool calls of one model step already run concurrently (one graph task per
+  call); a per-turn semaphore (AGENT_TOOL_CONCURRENCY) caps how many Mongo /
+  knowledge-base calls a single turn can have in flight
+- every call is timed (time waiting for a slot, run time); the timings of a turn
+  are returned with its reply and recorded as "tool" spans (see tracing)
+"""
+
+import time
+from contextlib import nullcontext
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware.types import ToolCallRequest
+
+from app.ai.tracing import record_span
+
+
+class ToolCallMiddleware(AgentMiddleware):
+    """
+    Runs each tool call under the turn's concurrency limit and records its timing.
+    The limit and the timing list come from the runtime context (`tool_slots`,
+    `tool_timings`); without them calls run unlimited and are only traced.
+    """
+
+    async def awrap_tool_call(self, request: ToolCallRequest, handler):
+        context = request.runtime.context if request.runtime else None
+        slots = getattr(context, "tool_slots", None)
+        name = request.tool_call["name"]
+
+        queued = time.perf_counter()
+        async with slots or nullcontext():
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = await handler(request)
+                ok = getattr(result, "status", "success") != "error"
+                return result
+            finally:
+                run_ms = (time.perf_counter() - started) * 1000
+                wait_ms = (started - queued) * 1000
+                record_span("tool", name, run_ms, wait_ms=round(wait_ms, 1), ok=ok)
+                turn = getattr(context, "tool_timings", None)
+                if turn is not None:
+                    turn.append({"tool": name, "ms": round(run_ms, 1), "wait_ms": round(wait_ms, 1), "ok": ok})
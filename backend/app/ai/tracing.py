@@ -0,0 +1,229 @@
+"""
+Healix AI Tracing
+Per-turn spans for agent chat turns and a bounded store of latency percentiles.
+
+- a Trace is opened per chat turn and bound to a context variable, so spans
+  recorded anywhere below it (model calls, tools, knowledge-base search, Mongo
+  queries) land on that turn, including inside LangGraph tasks and executor threads
+- model calls are timed through a LangChain callback: time to first token,
+  generation time, input / output tokens, decode rate
+- every span also feeds ai_metrics: the last AI_METRICS_WINDOW samples per
+  (kind, name) series, reported as p50 / p95 / p99 in /admin/ai-metrics
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+from uuid import UUID
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.constants import TAG_NOSTREAM
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+# ══════════════════════════════════════════════════════════
+#  METRICS STORE
+# ══════════════════════════════════════════════════════════
+
+class AIMetrics:
+    """Rolling samples per (kind, name) series; least recently updated series are evicted."""
+
+    def __init__(self, window: int, max_series: int):
+        self.window = window
+        self.max_series = max_series
+        self._series: "OrderedDict[tuple[str, str], deque]" = OrderedDict()
+        self._counts: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()  # knowledge-base spans are recorded from executor threads
+
+    def record(self, kind: str, name: str, value: float):
+        key = (kind, name)
+        with self._lock:
+            samples = self._series.get(key)
+            if samples is None:
+                samples = self._series[key] = deque(maxlen=self.window)
+                while len(self._series) > self.max_series:
+                    old, _ = self._series.popitem(last=False)
+                    self._counts.pop(old, None)
+            else:
+                self._series.move_to_end(key)
+            samples.append(value)
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            series = [(key, list(samples), self._counts[key]) for key, samples in self._series.items()]
+        out: dict[str, dict] = {}
+        for (kind, name), samples, count in sorted(series):
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            out.setdefault(kind, {})[name] = {
+                "count": count,
+                "p50": round(float(p50), 1),
+                "p95": round(float(p95), 1),
+                "p99": round(float(p99), 1),
+                "max": round(float(max(samples)), 1),
+            }
+        return out
+
+
+ai_metrics = AIMetrics(settings.AI_METRICS_WINDOW, settings.AI_METRICS_MAX_SERIES)
+
+
+# ══════════════════════════════════════════════════════════
+#  TRACES & SPANS
+# ══════════════════════════════════════════════════════════
+
+class Trace:
+    """Spans of one chat turn."""
+
+    def __init__(self, agent: str = ""):
+        self.agent = agent
+        self.started = time.perf_counter()
+        self.spans: list[dict] = []
+        self.ttft_ms: Optional[float] = None  # first token of the turn's first model call
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def add(self, kind: str, name: str, ms: float, **attrs):
+        self.spans.append({"kind": kind, "name": name, "ms": round(ms, 1), **attrs})
+
+    def summary(self) -> dict:
+        by_kind: dict[str, float] = {}
+        for s in self.spans:
+            by_kind[s["kind"]] = round(by_kind.get(s["kind"], 0.0) + s["ms"], 1)
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "ttft_ms": self.ttft_ms,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "by_kind": by_kind,  # summed span time; concurrent spans overlap
+            "spans": self.spans,
+        }
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("healix_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def record_span(kind: str, name: str, ms: float, **attrs):
+    """Record a finished span on the current turn (if any) and in the metrics store."""
+    ai_metrics.record(kind, name, ms)
+    trace = _current.get()
+    if trace is not None:
+        trace.add(kind, name, ms, **attrs)
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(kind, name, (time.perf_counter() - started) * 1000, **attrs)
+
+
+async def timed(kind: str, name: str, awaitable: Awaitable[T]) -> T:
+    with span(kind, name):
+        return await awaitable
+
+
+def traced(kind: str, name: Optional[str] = None):
+    """Decorator: record every call of an async function as a span."""
+    def decorate(fn):
+        label = name or fn.__name__.removeprefix("_db_get_").lstrip("_")
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(kind, label):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_trace(agent: str = "") -> Trace:
+    """Open a turn trace in the current context (an agent run started after this inherits it)."""
+    trace = Trace(agent)
+    _current.set(trace)
+    return trace
+
+
+def finish_trace(trace: Trace, kind: str = "turn") -> dict:
+    """Close the turn: record its totals per agent and return the summary for the reply."""
+    if _current.get() is trace:
+        _current.set(None)
+    summary = trace.summary()
+    ai_metrics.record(kind, trace.agent, summary["total_ms"])
+    if trace.ttft_ms is not None:
+        ai_metrics.record("ttft", trace.agent, trace.ttft_ms)
+    return summary
+
+
+# ══════════════════════════════════════════════════════════
+#  MODEL CALL CALLBACK
+# ══════════════════════════════════════════════════════════
+
+class TraceCallback(BaseCallbackHandler):
+    """Times every chat model call of an agent run (passed in the run config's callbacks)."""
+
+    run_inline = True  # timestamps are taken on the event loop, not in an executor
+
+    def __init__(self, trace: Trace, agent: str = ""):
+        self.trace = trace
+        self.agent = agent  # label of this run's spans (default: the turn's agent)
+        self._runs: dict[UUID, dict] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, tags: Optional[list[str]] = None, **kwargs):
+        step = "summary" if tags and TAG_NOSTREAM in tags else "agent"
+        self._runs[run_id] = {"start": time.perf_counter(), "first": None, "step": step}
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs):
+        run = self._runs.get(run_id)
+        if run and run["first"] is None:
+            run["first"] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        end = time.perf_counter()
+        first = run["first"] or end
+        ttft_ms = (first - run["start"]) * 1000
+        gen_ms = (end - first) * 1000
+        usage = {}
+        try:
+            usage = response.generations[0][0].message.usage_metadata or {}
+        except (IndexError, AttributeError):
+            pass
+        tokens_in, tokens_out = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+        agent = self.agent or self.trace.agent
+        name = agent if run["step"] == "agent" else f"{agent}:summary"
+        record_span(
+            "llm", name, (end - run["start"]) * 1000,
+            ttft_ms=round(ttft_ms, 1), gen_ms=round(gen_ms, 1), tokens_in=tokens_in, tokens_out=tokens_out,
+        )
+        if run["step"] == "agent":
+            ai_metrics.record("llm_ttft", name, ttft_ms)
+            if tokens_out and gen_ms > 0:
+                ai_metrics.record("tokens_per_s", name, tokens_out / gen_ms * 1000)
+            if self.trace.ttft_ms is None:
+                self.trace.ttft_ms = round((first - self.trace.started) * 1000, 1)
+        self.trace.tokens_in += tokens_in
+        self.trace.tokens_out += tokens_out
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run:
+            record_span("llm", f"{self.agent or self.trace.agent}:error", (time.perf_counter() - run["start"]) * 1000,
+                        error=type(error).__name__)
@@ -0,0 +1,295 @@
+"""
+Healix LLM Usage Metering
+Token accounting for every chat-model call made for a user, and daily quotas:
+
+- UsageCallback (passed in the run config's callbacks, like TraceCallback) takes
+  each call's prompt / completion tokens and duration and records them under the
+  user and a feature: chat (agents, fan-out synthesis, history summaries),
+  symptoms, drugs, report, meals, journal (other smart-route calls: smart)
+- increments are buffered in memory and flushed every LLM_USAGE_FLUSH_SECONDS as
+  one $inc upsert per user and day into `llm_usage` (_id "<user_id>:<YYYY-MM-DD>",
+  totals plus per-feature counters), so metering adds no database round trip
+  to a call
+- daily quotas on the user's total tokens (UTC day), 0 disables either:
+  past LLM_QUOTA_SOFT_TOKENS_PER_DAY the user's calls drop one scheduler priority
+  class; past LLM_QUOTA_HARD_TOKENS_PER_DAY new requests are refused with 429 and
+  Retry-After until midnight UTC (a turn already running finishes)
+- a process knows a user's daily total from one read, refreshed every
+  LLM_USAGE_REFRESH_SECONDS, plus what it recorded itself since — with several
+  workers a quota can lag by about that long
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.database import get_db, get_analytics_db
+from app.ai.llm_scheduler import LLMSaturated, Priority
+
+COLLECTION = "llm_usage"
+FEATURES = ("chat", "symptoms", "drugs", "report", "meals", "journal", "smart")
+COUNTERS = ("calls", "tokens_in", "tokens_out", "ms")
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _seconds_to_midnight() -> int:
+    now = datetime.now(timezone.utc)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+class LLMQuotaExceeded(LLMSaturated):
+    """The user spent their daily token quota — answered like a full queue (429 + Retry-After)."""
+
+    def __init__(self, priority: Priority, retry_after: int):
+        super().__init__(priority, retry_after, "daily token quota exceeded")
+
+
+class UsageMeter:
+    def __init__(self, soft_quota: int, hard_quota: int, refresh_seconds: float):
+        self.soft_quota = soft_quota
+        self.hard_quota = hard_quota
+        self.refresh_seconds = refresh_seconds
+        # (user_id, day) → $inc fields not yet written
+        self._pending: dict[tuple[str, str], dict[str, float]] = {}
+        # batches being written right now — still counted by day_tokens
+        self._inflight: list[dict[tuple[str, str], dict[str, float]]] = []
+        # user_id → [day, tokens in the database when read, tokens recorded here since, read at]
+        self._totals: dict[str, list] = {}
+        self.recorded = {"calls": 0, "tokens_in": 0, "tokens_out": 0}
+        self.limited = {"soft": 0, "hard": 0}
+        self.flushes = 0
+        self.flush_errors = 0
+
+    # ── Recording ──
+    def record(self, user_id: str, feature: str, tokens_in: int, tokens_out: int, ms: float):
+        day = _today()
+        inc = self._pending.setdefault((user_id, day), {})
+        for name, value in zip(COUNTERS, (1, tokens_in, tokens_out, ms)):
+            inc[name] = inc.get(name, 0) + value
+            key = f"features.{feature}.{name}"
+            inc[key] = inc.get(key, 0) + value
+        inc["tokens"] = inc.get("tokens", 0) + tokens_in + tokens_out
+
+        total = self._totals.get(user_id)
+        if total and total[0] == day:
+            total[2] += tokens_in + tokens_out
+        self.recorded["calls"] += 1
+        self.recorded["tokens_in"] += tokens_in
+        self.recorded["tokens_out"] += tokens_out
+
+    def _requeue(self, pending: dict, keys):
+        for key in keys:
+            merged = self._pending.setdefault(key, {})
+            for name, value in pending[key].items():
+                merged[name] = merged.get(name, 0) + value
+
+    async def flush(self):
+        """
+        Write the buffered increments (one upsert per user and day). Upserts that failed
+        are kept for the next flush; with an unordered bulk write the others were applied.
+        """
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        ops = [
+            UpdateOne(
+                {"_id": f"{user_id}:{day}"},
+                {
+                    "$inc": {k: round(v, 1) if k.endswith("ms") else v for k, v in inc.items()},
+                    "$setOnInsert": {
+                        "user_id": user_id,
+                        "day": day,
+                        "date": datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc),  # TTL field
+                    },
+                },
+                upsert=True,
+            )
+            for (user_id, day), inc in pending.items()
+        ]
+        self._inflight.append(pending)
+        try:
+            await get_db()[COLLECTION].bulk_write(ops, ordered=False)
+            self.flushes += 1
+        except BulkWriteError as e:
+            failed = sorted({error["index"] for error in e.details.get("writeErrors", [])})
+            self.flush_errors += 1
+            print(f"⚠️  LLM usage flush failed for {len(failed)} of {len(ops)} users, retrying later: {e}")
+            self._requeue(pending, [keys[i] for i in failed])
+        except Exception as e:
+            self.flush_errors += 1
+            print(f"⚠️  LLM usage flush failed ({len(ops)} users), retrying later: {e}")
+            self._requeue(pending, keys)
+        finally:
+            self._inflight.remove(pending)
+        # Forget totals of users not seen for a while (and of previous days)
+        today, stale = _today(), time.monotonic() - 10 * self.refresh_seconds
+        for user_id in [u for u, t in self._totals.items() if t[0] != today or t[3] < stale]:
+            del self._totals[user_id]
+
+    # ── Quotas ──
+    async def day_tokens(self, user_id: str) -> int:
+        """The user's tokens today (last read from the database plus this process's since)."""
+        day = _today()
+        total = self._totals.get(user_id)
+        if total is None or total[0] != day or time.monotonic() - total[3] > self.refresh_seconds:
+            try:
+                doc = await get_db()[COLLECTION].find_one({"_id": f"{user_id}:{day}"}, {"tokens": 1})
+            except Exception as e:
+                print(f"⚠️  Could not read LLM usage of {user_id}: {e}")
+                doc = None
+            # Buffered and in-flight increments (one just written may briefly count twice)
+            unflushed = sum(
+                batch.get((user_id, day), {}).get("tokens", 0) for batch in (self._pending, *self._inflight)
+            )
+            total = [day, (doc or {}).get("tokens", 0), unflushed, time.monotonic()]
+            self._totals[user_id] = total
+        return total[1] + total[2]
+
+    def priority_for(self, priority: Priority, user_id: Optional[str]) -> Priority:
+        """One class lower for a user past the soft quota (from the known total, no read)."""
+        total = self._totals.get(user_id) if user_id else None
+        if self.soft_quota and total and total[0] == _today() and total[1] + total[2] >= self.soft_quota:
+            return Priority(min(priority + 1, Priority.BATCH))
+        return priority
+
+    async def enforce(self, user_id: Optional[str], priority: Priority) -> Priority:
+        """
+        Check a new request against the daily quotas: raises LLMQuotaExceeded past the hard
+        quota, else returns the priority to schedule it with (lowered past the soft quota).
+        """
+        if not user_id or not (self.soft_quota or self.hard_quota):
+            return priority
+        used = await self.day_tokens(user_id)
+        if self.hard_quota and used >= self.hard_quota:
+            self.limited["hard"] += 1
+            raise LLMQuotaExceeded(priority, _seconds_to_midnight())
+        effective = self.priority_for(priority, user_id)
+        if effective != priority:
+            self.limited["soft"] += 1
+        return effective
+
+    def stats(self) -> dict:
+        return {
+            **self.recorded,
+            "pending_users": len(self._pending),
+            "known_totals": len(self._totals),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "quota": {"soft": self.soft_quota, "hard": self.hard_quota},
+            "limited": dict(self.limited),
+        }
+
+
+usage_meter = UsageMeter(
+    soft_quota=settings.LLM_QUOTA_SOFT_TOKENS_PER_DAY,
+    hard_quota=settings.LLM_QUOTA_HARD_TOKENS_PER_DAY,
+    refresh_seconds=settings.LLM_USAGE_REFRESH_SECONDS,
+)
+
+
+# ══════════════════════════════════════════════════════════
+#  MODEL CALL CALLBACK
+# ══════════════════════════════════════════════════════════
+
+class UsageCallback(BaseCallbackHandler):
+    """Meters every chat model call of a run for one user and feature (passed in the run config's callbacks)."""
+
+    run_inline = True
+
+    def __init__(self, user_id: str, feature: str):
+        self.user_id = user_id
+        self.feature = feature
+        self._started: dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        usage = {}
+        try:
+            usage = response.generations[0][0].message.usage_metadata or {}
+        except (IndexError, AttributeError):
+            pass
+        usage_meter.record(
+            self.user_id, self.feature,
+            usage.get("input_tokens", 0), usage.get("output_tokens", 0),
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._started.pop(run_id, None)
+
+
+# ══════════════════════════════════════════════════════════
+#  PUBLIC API
+# ══════════════════════════════════════════════════════════
+
+_task: Optional[asyncio.Task] = None
+
+
+async def usage_report(day: Optional[str] = None, limit: int = 20) -> dict:
+    """A day's totals, per-feature totals and heaviest users (from the analytics connection)."""
+    day = day or _today()
+    collection = get_analytics_db()[COLLECTION]
+    group = {"_id": None, "users": {"$sum": 1}, "tokens": {"$sum": "$tokens"}}
+    for name in COUNTERS:
+        group[name] = {"$sum": f"${name}"}
+    for feature in FEATURES:
+        for name in COUNTERS:
+            group[f"{feature}__{name}"] = {"$sum": f"$features.{feature}.{name}"}
+    totals = await collection.aggregate([{"$match": {"day": day}}, {"$group": group}]).to_list(1)
+    totals = totals[0] if totals else {}
+    features = {
+        feature: {name: totals.pop(f"{feature}__{name}", 0) for name in COUNTERS}
+        for feature in FEATURES
+    }
+    totals.pop("_id", None)
+    top = await collection.find({"day": day}, {"_id": 0, "date": 0}).sort("tokens", -1).limit(limit).to_list(limit)
+    return {
+        "day": day,
+        "totals": totals,
+        "features": {f: v for f, v in features.items() if v["calls"]},
+        "top_users": top,
+    }
+
+
+async def _run():
+    while True:
+        await asyncio.sleep(settings.LLM_USAGE_FLUSH_SECONDS)
+        await usage_meter.flush()
+
+
+async def start_usage_meter():
+    global _task
+    await get_db()[COLLECTION].create_index([("day", 1), ("tokens", -1)])
+    if _task is None:
+        _task = asyncio.create_task(_run())
+
+
+async def stop_usage_meter():
+    """Stop the flush loop and write what is still buffered."""
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    await usage_meter.flush()
@@ -7,12 +7,117 @@ load_dotenv()
 class Settings:
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://192.168.101.73:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "healix")
+    # Analytics read path — reporting scans go to secondaries with their own pool and time budget
+    ANALYTICS_MONGODB_URL: str = os.getenv("ANALYTICS_MONGODB_URL", MONGODB_URL)
+    ANALYTICS_MAX_POOL_SIZE: int = int(os.getenv("ANALYTICS_MAX_POOL_SIZE", "10"))
+    ANALYTICS_TIMEOUT_MS: int = int(os.getenv("ANALYTICS_TIMEOUT_MS", "15000"))
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "healix-secret-key")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_EXPIRATION_MINUTES: int = int(os.getenv("JWT_EXPIRATION_MINUTES", "1440"))
+    # Realtime push of HTTP-written data via MongoDB change streams (requires a replica set)
+    REALTIME_CHANGE_FEED: bool = os.getenv("REALTIME_CHANGE_FEED", "true").lower() == "true"
+    REALTIME_MAX_AWAIT_MS: int = int(os.getenv("REALTIME_MAX_AWAIT_MS", "500"))
+    # Stable id of this worker's change-feed consumer (default: host name; set one per worker when
+    # several run on a host) — a restarted worker resumes from its stored position
+    REALTIME_CONSUMER_ID: str = os.getenv("REALTIME_CONSUMER_ID", "")
+    # Socket resume — per-user replay buffer for reconnecting clients
+    SOCKET_REPLAY_BUFFER_SIZE: int = int(os.getenv("SOCKET_REPLAY_BUFFER_SIZE", "300"))
+    SOCKET_REPLAY_MAX_USERS: int = int(os.getenv("SOCKET_REPLAY_MAX_USERS", "5000"))
+    SOCKET_REPLAY_MAX_SAMPLES: int = int(os.getenv("SOCKET_REPLAY_MAX_SAMPLES", "2000"))
+    SOCKET_REPLAY_WINDOW_HOURS: int = int(os.getenv("SOCKET_REPLAY_WINDOW_HOURS", "24"))
+    # Retention (opt-in, all off by default) — raw vitals older than this are compacted into
+    # daily archive buckets; chat history / alerts / archive buckets expire after N days (0 disables)
+    VITALS_RAW_RETENTION_DAYS: int = int(os.getenv("VITALS_RAW_RETENTION_DAYS", "0"))
+    VITALS_ARCHIVE_TTL_DAYS: int = int(os.getenv("VITALS_ARCHIVE_TTL_DAYS", "0"))
+    CHAT_HISTORY_TTL_DAYS: int = int(os.getenv("CHAT_HISTORY_TTL_DAYS", "0"))
+    ALERTS_TTL_DAYS: int = int(os.getenv("ALERTS_TTL_DAYS", "0"))
+    RETENTION_INTERVAL_MINUTES: int = int(os.getenv("RETENTION_INTERVAL_MINUTES", "60"))
+    RETENTION_MAX_DAYS_PER_RUN: int = int(os.getenv("RETENTION_MAX_DAYS_PER_RUN", "5000"))
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://176.65.148.253:8554")
+    # Pool of Ollama backends: "url|model;model,url|model" (models optional) — defaults to OLLAMA_BASE_URL
+    OLLAMA_BACKENDS: str = os.getenv("OLLAMA_BACKENDS", "")
+    OLLAMA_HEALTH_INTERVAL_SECONDS: float = float(os.getenv("OLLAMA_HEALTH_INTERVAL_SECONDS", "15"))
+    OLLAMA_PROBE_TIMEOUT_SECONDS: float = float(os.getenv("OLLAMA_PROBE_TIMEOUT_SECONDS", "3"))
+    OLLAMA_CIRCUIT_FAILURES: int = int(os.getenv("OLLAMA_CIRCUIT_FAILURES", "3"))
+    OLLAMA_CIRCUIT_OPEN_SECONDS: float = float(os.getenv("OLLAMA_CIRCUIT_OPEN_SECONDS", "30"))
+    # Shared keep-alive HTTP pool per Ollama backend (all LLM / embedding clients reuse it)
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "32"))
+    LLM_HTTP_KEEPALIVE_SECONDS: float = float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "120"))
+    LLM_HTTP_TIMEOUT_SECONDS: float = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "300"))
     EMBED_MODEL: str = os.getenv("EMBED_MODEL", "qwen3-embedding:8b")
     LLM_MODEL: str = os.getenv("LLM_MODEL", "glm-4.7-flash:q4_K_M")
+    # How long Ollama keeps each model loaded after a request (seconds, -1 = until evicted)
+    LLM_KEEP_ALIVE_SECONDS: int = int(os.getenv("LLM_KEEP_ALIVE_SECONDS", "1800"))
+    EMBED_KEEP_ALIVE_SECONDS: int = int(os.getenv("EMBED_KEEP_ALIVE_SECONDS", "1800"))
+    # Warm pool: preload both models at startup, then re-check / reload them on a schedule
+    LLM_WARMUP_ENABLED: bool = os.getenv("LLM_WARMUP_ENABLED", "true").lower() == "true"
+    LLM_WARMUP_INTERVAL_SECONDS: float = float(os.getenv("LLM_WARMUP_INTERVAL_SECONDS", "120"))
+    LLM_WARMUP_STARTUP_WAIT_SECONDS: float = float(os.getenv("LLM_WARMUP_STARTUP_WAIT_SECONDS", "30"))
+    LLM_WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("LLM_WARMUP_TIMEOUT_SECONDS", "300"))
+    # "ollama", or "fake" for the offline deterministic stand-in (app.ai.fake_llm)
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "ollama").lower()
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+    FAKE_LLM_PREFILL_CHARS_PER_MS: float = float(os.getenv("FAKE_LLM_PREFILL_CHARS_PER_MS", "40"))
+    FAKE_LLM_TOKENS_PER_S: float = float(os.getenv("FAKE_LLM_TOKENS_PER_S", "40"))
+    FAKE_LLM_REPLY_TOKENS: int = int(os.getenv("FAKE_LLM_REPLY_TOKENS", "60"))
+    # Tools called per model step: rounds split by ";", tool names / prefixes by ","
+    FAKE_LLM_TOOL_ROUNDS: str = os.getenv("FAKE_LLM_TOOL_ROUNDS", "search_")
+    FAKE_EMBED_LATENCY_MS: float = float(os.getenv("FAKE_EMBED_LATENCY_MS", "5"))
+    # Compiled agent cache (per agent type × user × profile version)
+    AGENT_CACHE_SIZE: int = int(os.getenv("AGENT_CACHE_SIZE", "256"))
+    AGENT_CACHE_TTL_SECONDS: int = int(os.getenv("AGENT_CACHE_TTL_SECONDS", "1800"))
+    # Gather the agent's core data into the prompt instead of a first tool round-trip
+    AGENT_PREFETCH_SNAPSHOT: bool = os.getenv("AGENT_PREFETCH_SNAPSHOT", "true").lower() == "true"
+    # Agent routing: embedding classifier for messages the keywords cannot decide (ties / no match)
+    AGENT_ROUTER_EMBEDDINGS: bool = os.getenv("AGENT_ROUTER_EMBEDDINGS", "true").lower() == "true"
+    AGENT_ROUTER_CACHE_SIZE: int = int(os.getenv("AGENT_ROUTER_CACHE_SIZE", "2048"))
+    AGENT_ROUTER_EMBED_TIMEOUT_SECONDS: float = float(os.getenv("AGENT_ROUTER_EMBED_TIMEOUT_SECONDS", "2"))
+    # Cross-domain questions: up to N agents run concurrently, answers merged in one synthesis pass
+    # (opt-in: 1 disables); each agent needs MIN_SCORE keyword weight or its own part of an "and" question
+    AGENT_FANOUT_MAX_AGENTS: int = int(os.getenv("AGENT_FANOUT_MAX_AGENTS", "1"))
+    AGENT_FANOUT_MIN_SHARE: float = float(os.getenv("AGENT_FANOUT_MIN_SHARE", "0.5"))
+    AGENT_FANOUT_MIN_SCORE: float = float(os.getenv("AGENT_FANOUT_MIN_SCORE", "2"))
+    AGENT_FANOUT_DEADLINE_SECONDS: float = float(os.getenv("AGENT_FANOUT_DEADLINE_SECONDS", "60"))
+    # Max tool calls of one agent turn running at once (calls of a model step run concurrently)
+    AGENT_TOOL_CONCURRENCY: int = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+    # Rendered vitals / plan tool outputs kept per (user, tool), reused while the data is unchanged
+    AGENT_TOOL_OUTPUT_CACHE_SIZE: int = int(os.getenv("AGENT_TOOL_OUTPUT_CACHE_SIZE", "4096"))
+    # AI performance metrics: samples kept per (kind, name) series, max series
+    AI_METRICS_WINDOW: int = int(os.getenv("AI_METRICS_WINDOW", "1000"))
+    AI_METRICS_MAX_SERIES: int = int(os.getenv("AI_METRICS_MAX_SERIES", "500"))
+    # Prompt token budget per agent thread (system prompt + snapshot + summary + messages);
+    # per-agent overrides as "risk=6000,clinical=5000"
+    AGENT_CONTEXT_TOKENS: int = int(os.getenv("AGENT_CONTEXT_TOKENS", "4000"))
+    AGENT_CONTEXT_TOKENS_BY_AGENT: dict = {
+        name.strip(): int(value)
+        for name, value in (item.split("=") for item in os.getenv("AGENT_CONTEXT_TOKENS_BY_AGENT", "").split(",") if "=" in item)
+    }
+    # Semantic cache for generic knowledge questions (cosine similarity on EMBED_MODEL vectors)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_THRESHOLD: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.93"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+    # LLM admission control: concurrent Ollama calls, slots kept free for chat, queue bounds per class
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_RESERVED_CHAT_SLOTS: int = int(os.getenv("LLM_RESERVED_CHAT_SLOTS", "1"))
+    LLM_QUEUE_LIMIT_CHAT: int = int(os.getenv("LLM_QUEUE_LIMIT_CHAT", "64"))
+    LLM_QUEUE_LIMIT_TRIAGE: int = int(os.getenv("LLM_QUEUE_LIMIT_TRIAGE", "16"))
+    LLM_QUEUE_LIMIT_BATCH: int = int(os.getenv("LLM_QUEUE_LIMIT_BATCH", "4"))
+    LLM_PER_USER_LIMIT: int = int(os.getenv("LLM_PER_USER_LIMIT", "3"))
+    LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+    # LLM usage metering (per user per day in `llm_usage`) and daily token quotas (0 = no quota)
+    LLM_USAGE_FLUSH_SECONDS: float = float(os.getenv("LLM_USAGE_FLUSH_SECONDS", "10"))
+    LLM_USAGE_REFRESH_SECONDS: float = float(os.getenv("LLM_USAGE_REFRESH_SECONDS", "60"))
+    LLM_USAGE_TTL_DAYS: int = int(os.getenv("LLM_USAGE_TTL_DAYS", "0"))  # 0 keeps usage history
+    LLM_QUOTA_SOFT_TOKENS_PER_DAY: int = int(os.getenv("LLM_QUOTA_SOFT_TOKENS_PER_DAY", "0"))
+    LLM_QUOTA_HARD_TOKENS_PER_DAY: int = int(os.getenv("LLM_QUOTA_HARD_TOKENS_PER_DAY", "0"))
+    # Agent conversation memory — "mongo" (persistent, shared by workers) or "memory" (bounded, per process)
+    CHECKPOINTER: str = os.getenv("CHECKPOINTER", "mongo")
+    CHECKPOINT_KEEP_LAST: int = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+    CHECKPOINT_TTL_DAYS: int = int(os.getenv("CHECKPOINT_TTL_DAYS", "0"))  # idle threads expire after N days (0 never)
+    CHECKPOINT_MEMORY_MAX_THREADS: int = int(os.getenv("CHECKPOINT_MEMORY_MAX_THREADS", "2000"))
+    CHECKPOINT_MEMORY_MAX_MB: int = int(os.getenv("CHECKPOINT_MEMORY_MAX_MB", "256"))
+    CHECKPOINT_IDLE_TTL_SECONDS: int = int(os.getenv("CHECKPOINT_IDLE_TTL_SECONDS", "3600"))
     CHROMA_PERSIST_DIR: str = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
     CORS_ORIGINS: list[str] = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 
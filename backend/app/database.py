@@ -1,15 +1,32 @@
+from contextlib import contextmanager
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
 from app.config import settings
 
 client: AsyncIOMotorClient = None
 db = None
 
+# Analytics client — secondaryPreferred reads, separate pool and default time budget,
+# so heavy reporting scans never compete with the ingest / chat path for connections.
+analytics_client: AsyncIOMotorClient = None
+analytics_db = None
+
 
 async def connect_db():
-    global client, db
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    global client, db, analytics_client, analytics_db
+    client = AsyncIOMotorClient(settings.MONGODB_URL, appname="healix-api")
     db = client[settings.DATABASE_NAME]
 
+    analytics_client = AsyncIOMotorClient(
+        settings.ANALYTICS_MONGODB_URL,
+        appname="healix-analytics",
+        readPreference="secondaryPreferred",
+        maxPoolSize=settings.ANALYTICS_MAX_POOL_SIZE,
+        timeoutMS=settings.ANALYTICS_TIMEOUT_MS,
+    )
+    analytics_db = analytics_client[settings.DATABASE_NAME]
+
     # Create indexes
     await db.users.create_index("email", unique=True)
     await db.vitals.create_index([("user_id", 1), ("timestamp", -1)])
@@ -18,11 +35,15 @@ async def connect_db():
     await db.medications.create_index("user_id")
     await db.chat_history.create_index([("user_id", 1), ("created_at", -1)])
     await db.alerts.create_index([("user_id", 1), ("created_at", -1)])
+    await db.nutrition_plans.create_index([("user_id", 1), ("created_at", -1)])
+    await db.exercise_plans.create_index([("user_id", 1), ("created_at", -1)])
     print("✅ Connected to MongoDB")
 
 
 async def close_db():
-    global client
+    global client, analytics_client
+    if analytics_client:
+        analytics_client.close()
     if client:
         client.close()
         print("❌ Disconnected from MongoDB")
@@ -30,3 +51,23 @@ async def close_db():
 
 def get_db():
     return db
+
+
+def get_analytics_db():
+    """Database handle for reporting / dashboard reads (secondaryPreferred, time-budgeted)."""
+    return analytics_db
+
+
+class AnalyticsTimeout(Exception):
+    """An analytics read ran past its time budget (ANALYTICS_TIMEOUT_MS) — answered with a retryable 503."""
+
+
+@contextmanager
+def analytics_reads():
+    """Wrap reads on the analytics connection: a timeout of its time budget becomes AnalyticsTimeout."""
+    try:
+        yield
+    except PyMongoError as e:
+        if e.timeout:
+            raise AnalyticsTimeout() from e
+        raise
@@ -142,11 +142,14 @@ class MedicationUpdate(BaseModel):
 class ChatMessage(BaseModel):
     message: str
     agent: Optional[str] = None  # clinical, nutrition, exercise, risk
+    # Client chat window / tab — a new message supersedes only this conversation's running turn
+    conversation_id: Optional[str] = Field(None, max_length=64)
 
 
 class ChatResponse(BaseModel):
     response: str
     agent: str
+    agents: list[str] = []  # every agent that answered a cross-domain (fan-out) question
     sources: list[str] = []
 
 
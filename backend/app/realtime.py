@@ -0,0 +1,218 @@
+"""
+Healix Realtime Change Feed
+Watches MongoDB change streams and pushes compact deltas for data written over
+HTTP (vitals upload, medication updates, alerts, smart features) to the owning
+user's Socket.IO room — so connected dashboards update without polling.
+
+Without a Socket.IO message queue each worker only reaches its own sockets, so
+every worker runs a consumer. Each one stores its stream position (resume token)
+under its consumer id after every flushed batch, so a restarted worker resumes
+exactly where it stopped. The id is REALTIME_CONSUMER_ID, by default the host
+name — stable across restarts; several workers on one host each need their own
+REALTIME_CONSUMER_ID, and a consumer that sees another process writing its
+position says so loudly. Positions not updated for a day are dropped by a TTL index.
+Change streams need a replica set; on a standalone mongod the feed logs a
+warning and stays off.
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timezone
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.database import get_db
+from app.socket_server import sio, check_vital_alerts, remember_vitals
+
+# One stream position per consumer id — stable across restarts of the worker
+CONSUMER_NAME = f"socketio_push:{settings.REALTIME_CONSUMER_ID or socket.gethostname()}"
+_process = f"{socket.gethostname()}:{os.getpid()}"
+_saved = False  # this process has written the position at least once
+_shared_warned = False
+CHECKPOINT_COLLECTION = "stream_checkpoints"
+CHECKPOINT_TTL_SECONDS = 24 * 3600
+
+# Collection → Socket.IO event pushed to the user's room
+WATCHED_COLLECTIONS = {
+    "vitals": "vitals_data",
+    "medications": "medication_update",
+    "alerts": "health_alert",
+}
+# Smart-feature results, pushed together as one event ({"changes": [{"feature", "id", ...}]})
+SMART_COLLECTIONS = ("symptom_checks", "drug_checks", "health_reports", "meal_plans", "health_journal")
+SMART_EVENT = "smart_update"
+
+VITAL_FIELDS = (
+    "heart_rate", "spo2", "stress_level", "steps", "calories_burned", "blood_pressure_sys",
+    "blood_pressure_dia", "hrv", "body_temp", "sleep_hours", "sleep_quality", "timestamp",
+)
+MEDICATION_FIELDS = ("name", "name_ar", "dosage", "frequency", "time", "status", "taken_at")
+ALERT_FIELDS = ("type", "severity", "message", "message_ar", "created_at")
+
+# Mongo error codes meaning "change streams unavailable" / "resume token too old"
+_UNSUPPORTED_CODES = {40573, 40324}
+_HISTORY_LOST_CODES = {286, 280}
+
+_task: asyncio.Task | None = None
+
+
+def _jsonable(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    return value
+
+
+def _compact(doc: dict, fields: tuple) -> dict:
+    return {k: _jsonable(doc[k]) for k in fields if doc.get(k) is not None}
+
+
+# ══════════════════════════════════════════════════════════
+#  RESUME TOKENS
+# ══════════════════════════════════════════════════════════
+
+async def _load_resume_token():
+    doc = await get_db()[CHECKPOINT_COLLECTION].find_one({"_id": CONSUMER_NAME})
+    return doc.get("resume_token") if doc else None
+
+
+async def _save_resume_token(token):
+    global _saved, _shared_warned
+    if token is None:
+        return
+    previous = await get_db()[CHECKPOINT_COLLECTION].find_one_and_update(
+        {"_id": CONSUMER_NAME},
+        {"$set": {"resume_token": token, "owner": _process, "updated_at": datetime.now(timezone.utc)}},
+        projection={"owner": 1},
+        upsert=True,
+    )
+    # Someone else wrote it since our last save — two live workers share the consumer id
+    owner = previous.get("owner") if previous else None
+    if _saved and owner not in (None, _process) and not _shared_warned:
+        _shared_warned = True
+        print(f"❌ Change feed position '{CONSUMER_NAME}' is also written by {owner} — "
+              f"set a distinct REALTIME_CONSUMER_ID per worker, or restarts may miss or replay events")
+    _saved = True
+
+
+# ══════════════════════════════════════════════════════════
+#  DELTA BUILDING & PUSH
+# ══════════════════════════════════════════════════════════
+
+def _collect(change: dict, pending: dict):
+    """Fold one change event into the per-user pending batch."""
+    collection = change["ns"]["coll"]
+    doc = change.get("fullDocument")
+    if not doc or not doc.get("user_id"):
+        return
+    user = pending.setdefault(doc["user_id"], {"vitals": [], "medications": {}, "alerts": [], "smart": []})
+
+    if collection == "vitals":
+        user["vitals"].append(doc)
+    elif collection == "medications":
+        delta = {"id": str(doc["_id"]), "operation": change["operationType"]}
+        updated = (change.get("updateDescription") or {}).get("updatedFields")
+        fields = tuple(f for f in MEDICATION_FIELDS if f in updated) if updated else MEDICATION_FIELDS
+        delta.update(_compact(doc, fields))
+        user["medications"][delta["id"]] = delta
+    elif collection == "alerts":
+        user["alerts"].append(_compact(doc, ALERT_FIELDS))
+    else:
+        user["smart"].append({
+            "feature": collection,
+            "id": str(doc["_id"]),
+            "operation": change["operationType"],
+            "created_at": _jsonable(doc.get("created_at")),
+        })
+
+
+async def _flush(pending: dict):
+    """Emit one compact message per user and event type for the drained batch."""
+    for user_id, batch in pending.items():
+        room = f"user_{user_id}"
+        if batch["vitals"]:
+            samples = sorted(batch["vitals"], key=lambda d: d.get("timestamp") or datetime.min)
+            compact = [_compact(sample, VITAL_FIELDS) for sample in samples]
+            for sample in compact:
+                remember_vitals(user_id, sample)
+                # Every sample is checked — a spike early in the batch still alerts
+                for alert in check_vital_alerts(sample):
+                    alert["timestamp"] = sample.get("timestamp")
+                    batch["alerts"].append(alert)
+            # Only the push is collapsed to the newest sample
+            latest = {**compact[-1], "source": "upload", "batch_size": len(samples)}
+            await sio.emit(WATCHED_COLLECTIONS["vitals"], latest, room=room)
+        if batch["medications"]:
+            await sio.emit(WATCHED_COLLECTIONS["medications"], {"changes": list(batch["medications"].values())}, room=room)
+        if batch["alerts"]:
+            await sio.emit(WATCHED_COLLECTIONS["alerts"], {"alerts": batch["alerts"]}, room=room)
+        if batch["smart"]:
+            await sio.emit(SMART_EVENT, {"changes": batch["smart"]}, room=room)
+    pending.clear()
+
+
+# ══════════════════════════════════════════════════════════
+#  CONSUMER LOOP
+# ══════════════════════════════════════════════════════════
+
+async def _consume():
+    pipeline = [{"$match": {
+        "operationType": {"$in": ["insert", "update", "replace"]},
+        "ns.coll": {"$in": [*WATCHED_COLLECTIONS, *SMART_COLLECTIONS]},
+    }}]
+    backoff = 1
+    while True:
+        token = await _load_resume_token()
+        try:
+            async with get_db().watch(
+                pipeline,
+                full_document="updateLookup",
+                resume_after=token,
+                max_await_time_ms=settings.REALTIME_MAX_AWAIT_MS,
+            ) as stream:
+                print(f"📡 Change feed started ({'resumed' if token else 'from now'})")
+                backoff = 1
+                pending: dict = {}
+                while stream.alive:
+                    change = await stream.try_next()
+                    if change is not None:
+                        _collect(change, pending)
+                        continue
+                    # Batch drained — push everything gathered, then persist the position
+                    if pending:
+                        await _flush(pending)
+                    if stream.resume_token != token:
+                        token = stream.resume_token
+                        await _save_resume_token(token)
+        except OperationFailure as e:
+            if e.code in _UNSUPPORTED_CODES:
+                print(f"⚠️  Change feed disabled — MongoDB is not a replica set ({e.code})")
+                return
+            if e.code in _HISTORY_LOST_CODES:
+                print("⚠️  Change feed resume token expired — restarting from now")
+                await get_db()[CHECKPOINT_COLLECTION].delete_one({"_id": CONSUMER_NAME})
+                continue
+            print(f"⚠️  Change feed error: {e}")
+        except PyMongoError as e:
+            print(f"⚠️  Change feed connection error: {e}")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 30)
+
+
+async def start_change_feed():
+    global _task
+    if settings.REALTIME_CHANGE_FEED and _task is None:
+        await get_db()[CHECKPOINT_COLLECTION].create_index("updated_at", expireAfterSeconds=CHECKPOINT_TTL_SECONDS)
+        _task = asyncio.create_task(_consume())
+
+
+async def stop_change_feed():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,301 @@
+"""
+Healix Data Retention
+Keeps the hot collections (and their indexes) bounded:
+
+- TTL policies expire ephemeral data (chat history, alerts, old archive buckets,
+  idle agent checkpoints, daily LLM usage counters).
+- A background job compacts raw vitals older than VITALS_RAW_RETENTION_DAYS into
+  one compressed bucket document per user per day in `vitals_archive`, then
+  removes the raw samples. Buckets keep every field of a sample and its timestamp
+  to the millisecond (BSON precision); only the raw document `_id` is replaced.
+
+Everything is opt-in: with the default settings (all 0) no TTL index is created
+and no vitals are compacted.
+
+Archived samples stay readable through fetch_vitals_range(), which the vitals
+history / export APIs and the agents use, so callers never see the seam.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import zlib
+from datetime import datetime, timezone, timedelta
+
+from bson import Binary, json_util
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.config import settings
+from app.database import get_db
+
+ARCHIVE_COLLECTION = "vitals_archive"
+ARCHIVE_CODEC = "zlib+json-columns-v2"  # v1 buckets ("zlib+json-columns") still decode
+ARCHIVE_FIELDS = (
+    "heart_rate", "spo2", "stress_level", "steps", "calories_burned", "blood_pressure_sys",
+    "blood_pressure_dia", "hrv", "body_temp", "sleep_hours", "sleep_quality",
+)
+# Sample keys that are not data (replaced on decode)
+_SAMPLE_KEYS = ("_id", "user_id", "timestamp", "archived")
+LOCK_NAME = "vitals_compaction"
+
+# Per-collection TTL policies: collection → (date field, days to keep; 0 disables)
+TTL_POLICIES = {
+    "chat_history": ("created_at", settings.CHAT_HISTORY_TTL_DAYS),
+    "alerts": ("created_at", settings.ALERTS_TTL_DAYS),
+    ARCHIVE_COLLECTION: ("day", settings.VITALS_ARCHIVE_TTL_DAYS),
+    # Agent conversation state of idle threads (Mongo checkpointer)
+    "agent_checkpoints": ("updated_at", settings.CHECKPOINT_TTL_DAYS),
+    "agent_checkpoint_writes": ("updated_at", settings.CHECKPOINT_TTL_DAYS),
+    # Per-user daily LLM token counters (app.ai.usage)
+    "llm_usage": ("date", settings.LLM_USAGE_TTL_DAYS),
+}
+
+_task: asyncio.Task | None = None
+_owner = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _day_start(dt: datetime) -> datetime:
+    return _utc(dt).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def raw_vitals_cutoff(now: datetime | None = None) -> datetime:
+    """Start of the oldest day still kept as raw samples."""
+    now = now or datetime.now(timezone.utc)
+    return _day_start(now - timedelta(days=settings.VITALS_RAW_RETENTION_DAYS))
+
+
+# ══════════════════════════════════════════════════════════
+#  TTL INDEXES
+# ══════════════════════════════════════════════════════════
+
+async def ensure_retention_indexes():
+    """Create / update / drop TTL indexes so they match TTL_POLICIES."""
+    db = get_db()
+    await db[ARCHIVE_COLLECTION].create_index([("user_id", 1), ("day", 1)], unique=True)
+
+    for collection, (field, days) in TTL_POLICIES.items():
+        name = f"ttl_{field}"
+        if days <= 0:
+            existing = await db[collection].index_information()
+            if name in existing:
+                await db[collection].drop_index(name)
+            continue
+        seconds = int(timedelta(days=days).total_seconds())
+        try:
+            await db[collection].create_index(field, name=name, expireAfterSeconds=seconds)
+        except OperationFailure as e:
+            # IndexOptionsConflict — the TTL changed since the index was built
+            if e.code not in (85, 86):
+                raise
+            await db.command({"collMod": collection, "index": {"name": name, "expireAfterSeconds": seconds}})
+    print("🧹 Retention indexes ready")
+
+
+# ══════════════════════════════════════════════════════════
+#  BUCKET ENCODING
+# ══════════════════════════════════════════════════════════
+
+def encode_bucket(day: datetime, samples: list[dict]) -> dict:
+    """Column-encode one day of samples (offsets in ms from midnight) and compress."""
+    samples = sorted(samples, key=lambda s: _utc(s["timestamp"]))
+    columns = {"ms": [(_utc(s["timestamp"]) - day) // timedelta(milliseconds=1) for s in samples]}
+    stats = {}
+    for field in ARCHIVE_FIELDS:
+        values = [s.get(field) for s in samples]
+        present = [v for v in values if v is not None]
+        if not present:
+            continue
+        columns[field] = values
+        stats[field] = {
+            "min": min(present),
+            "max": max(present),
+            "avg": round(sum(present) / len(present), 2),
+        }
+    # Any other fields, as extended JSON so dates / ids / nested values round-trip
+    extras = [{k: v for k, v in s.items() if k not in ARCHIVE_FIELDS and k not in _SAMPLE_KEYS} for s in samples]
+    if any(extras):
+        columns["x"] = json_util.dumps(extras, json_options=json_util.CANONICAL_JSON_OPTIONS)
+    payload = zlib.compress(json.dumps(columns, separators=(",", ":")).encode(), 6)
+    return {
+        "day": day,
+        "count": len(samples),
+        "first": _utc(samples[0]["timestamp"]),
+        "last": _utc(samples[-1]["timestamp"]),
+        "stats": stats,
+        "codec": ARCHIVE_CODEC,
+        "data": Binary(payload),
+    }
+
+
+def decode_bucket(bucket: dict) -> list[dict]:
+    """Expand an archive bucket back into vitals sample dicts."""
+    columns = json.loads(zlib.decompress(bucket["data"]))
+    day = _utc(bucket["day"])
+    # v2 stores ms offsets, v1 whole seconds
+    offsets = columns["ms"] if "ms" in columns else [t * 1000 for t in columns["t"]]
+    extras = json_util.loads(columns["x"]) if "x" in columns else None
+    samples = []
+    for i, offset in enumerate(offsets):
+        sample = {
+            "_id": f"{bucket['_id']}:{i}",
+            "user_id": bucket["user_id"],
+            # Naive UTC, matching what the driver returns for raw samples
+            "timestamp": (day + timedelta(milliseconds=offset)).replace(tzinfo=None),
+            "archived": True,
+        }
+        if extras:
+            sample.update(extras[i])
+        for field in ARCHIVE_FIELDS:
+            if field in columns and columns[field][i] is not None:
+                sample[field] = columns[field][i]
+        samples.append(sample)
+    return samples
+
+
+# ══════════════════════════════════════════════════════════
+#  READ PATH — raw + archive merged
+# ══════════════════════════════════════════════════════════
+
+async def fetch_vitals_range(user_id: str, start: datetime, end: datetime | None = None, db=None) -> list[dict]:
+    """All vitals for a user in [start, end), oldest first, transparently including archived days."""
+    db = db if db is not None else get_db()
+    window = {"$gte": start}
+    if end is not None:
+        window["$lt"] = end
+
+    records = []
+    cursor = db.vitals.find({"user_id": user_id, "timestamp": window}, sort=[("timestamp", 1)])
+    async for doc in cursor:
+        doc["_id"] = str(doc["_id"])
+        records.append(doc)
+
+    # Compaction off: no archive read (buckets of an earlier configuration show again once it is back on)
+    if settings.VITALS_RAW_RETENTION_DAYS <= 0 or _utc(start) >= raw_vitals_cutoff():
+        return records
+
+    day_window = {"$gte": _day_start(start)}
+    if end is not None:
+        day_window["$lt"] = end
+    archived = []
+    cursor = db[ARCHIVE_COLLECTION].find({"user_id": user_id, "day": day_window}, sort=[("day", 1)])
+    async for bucket in cursor:
+        archived.extend(
+            s for s in decode_bucket(bucket)
+            if _utc(s["timestamp"]) >= _utc(start) and (end is None or _utc(s["timestamp"]) < _utc(end))
+        )
+    if not archived:
+        return records
+    # A day being compacted can briefly exist in both places — merge by timestamp, raw wins
+    raw_times = {_utc(r["timestamp"]) for r in records}
+    merged = [s for s in archived if _utc(s["timestamp"]) not in raw_times] + records
+    merged.sort(key=lambda r: _utc(r["timestamp"]))
+    return merged
+
+
+# ══════════════════════════════════════════════════════════
+#  COMPACTION JOB
+# ══════════════════════════════════════════════════════════
+
+async def _acquire_lease(db, ttl_seconds: int) -> bool:
+    """Single-runner lease so several API workers never compact the same day twice."""
+    now = datetime.now(timezone.utc)
+    try:
+        lease = await db.job_locks.find_one_and_update(
+            {"_id": LOCK_NAME, "$or": [{"expires_at": {"$lt": now}}, {"owner": _owner}]},
+            {"$set": {"owner": _owner, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return False
+    return lease is not None and lease.get("owner") == _owner
+
+
+async def _archive_day(db, user_id: str, day: datetime, samples: list[dict]):
+    existing = await db[ARCHIVE_COLLECTION].find_one({"user_id": user_id, "day": day})
+    if existing:
+        # Late-arriving samples (or a retry after a crash) — merge, dropping duplicate timestamps
+        merged = {_utc(s["timestamp"]): s for s in decode_bucket(existing)}
+        merged.update({_utc(s["timestamp"]): s for s in samples})
+        samples = list(merged.values())
+    bucket = encode_bucket(day, samples)
+    await db[ARCHIVE_COLLECTION].update_one(
+        {"user_id": user_id, "day": day},
+        {"$set": bucket},
+        upsert=True,
+    )
+
+
+async def compact_vitals(max_days_per_run: int | None = None) -> dict:
+    """Move raw vitals older than the retention window into per-day archive buckets."""
+    db = get_db()
+    cutoff = raw_vitals_cutoff()
+    budget = max_days_per_run or settings.RETENTION_MAX_DAYS_PER_RUN
+    archived_days = archived_samples = 0
+
+    for user_id in await db.vitals.distinct("user_id"):
+        if archived_days >= budget:
+            break
+        current_day, samples, ids = None, [], []
+        cursor = db.vitals.find(
+            {"user_id": user_id, "timestamp": {"$lt": cutoff}},
+            sort=[("timestamp", 1)],
+        )
+        async for doc in cursor:
+            day = _day_start(doc["timestamp"])
+            if current_day is not None and day != current_day:
+                await _archive_day(db, user_id, current_day, samples)
+                await db.vitals.delete_many({"_id": {"$in": ids}})
+                archived_days += 1
+                archived_samples += len(ids)
+                samples, ids = [], []
+                if archived_days >= budget:
+                    break
+            current_day = day
+            samples.append(doc)
+            ids.append(doc["_id"])
+        else:
+            if samples:
+                await _archive_day(db, user_id, current_day, samples)
+                await db.vitals.delete_many({"_id": {"$in": ids}})
+                archived_days += 1
+                archived_samples += len(ids)
+
+    return {"archived_days": archived_days, "archived_samples": archived_samples, "cutoff": cutoff.isoformat()}
+
+
+async def _run():
+    interval = settings.RETENTION_INTERVAL_MINUTES * 60
+    while True:
+        try:
+            if await _acquire_lease(get_db(), interval):
+                result = await compact_vitals()
+                if result["archived_days"]:
+                    print(f"🗄️  Archived {result['archived_samples']} raw vitals into {result['archived_days']} day buckets")
+        except Exception as e:
+            print(f"⚠️  Vitals compaction failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def start_retention_worker():
+    global _task
+    await ensure_retention_indexes()
+    if settings.VITALS_RAW_RETENTION_DAYS > 0 and _task is None:
+        _task = asyncio.create_task(_run())
+
+
+async def stop_retention_worker():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -1,6 +1,19 @@
+from typing import Optional
 from fastapi import APIRouter, Depends
 from app.auth import get_admin_user
-from app.database import get_db
+from app.database import analytics_reads, get_analytics_db
+from app.ai.agent_system import agent_cache_stats
+from app.ai.agent_router import agent_router
+from app.ai.cancellation import chat_turns
+from app.ai.checkpointer import get_checkpointer
+from app.ai.response_cache import response_cache
+from app.ai.llm_scheduler import llm_scheduler
+from app.ai.ollama_router import ollama_router
+from app.ai.llm_clients import llm_client_stats
+from app.ai.model_warmup import model_warmup_status
+from app.ai.tool_format import tool_outputs
+from app.ai.tracing import ai_metrics
+from app.ai.usage import usage_meter, usage_report
 from datetime import datetime, timezone, timedelta
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -8,18 +21,19 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 
 @router.get("/stats")
 async def get_admin_stats(user: dict = Depends(get_admin_user)):
-    db = get_db()
-    total_users = await db.users.count_documents({})
+    db = get_analytics_db()
     now = datetime.now(timezone.utc)
     week_ago = now - timedelta(days=7)
-    active_users = await db.users.count_documents({"updated_at": {"$gte": week_ago}})
+    with analytics_reads():
+        total_users = await db.users.count_documents({})
+        active_users = await db.users.count_documents({"updated_at": {"$gte": week_ago}})
 
-    # Count high-risk users (simplified)
-    high_risk = await db.users.count_documents({"risk_level": {"$gte": 60}})
+        # Count high-risk users (simplified)
+        high_risk = await db.users.count_documents({"risk_level": {"$gte": 60}})
 
-    # Compliance rate
-    total_meds = await db.medications.count_documents({})
-    taken_meds = await db.medications.count_documents({"status": "taken"})
+        # Compliance rate
+        total_meds = await db.medications.count_documents({})
+        taken_meds = await db.medications.count_documents({"status": "taken"})
     compliance = (taken_meds / total_meds * 100) if total_meds > 0 else 87.0
 
     return {
@@ -38,39 +52,42 @@ async def get_all_users(
     skip: int = 0, limit: int = 50,
     user: dict = Depends(get_admin_user),
 ):
-    db = get_db()
+    db = get_analytics_db()
     cursor = db.users.find(
         {}, {"password": 0}
     ).skip(skip).limit(limit).sort("created_at", -1)
     users = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        users.append(doc)
+    with analytics_reads():
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            users.append(doc)
     return users
 
 
 @router.get("/alerts")
 async def get_system_alerts(user: dict = Depends(get_admin_user)):
-    db = get_db()
+    db = get_analytics_db()
     cursor = db.alerts.find({}).sort("created_at", -1).limit(50)
     alerts = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        alerts.append(doc)
+    with analytics_reads():
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            alerts.append(doc)
     return alerts
 
 
 @router.get("/high-risk-users")
 async def get_high_risk_users(user: dict = Depends(get_admin_user)):
-    db = get_db()
+    db = get_analytics_db()
     cursor = db.users.find(
         {"risk_level": {"$gte": 60}},
         {"password": 0},
     ).sort("risk_level", -1).limit(20)
     users = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        users.append(doc)
+    with analytics_reads():
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            users.append(doc)
 
     if not users:
         return [
@@ -81,3 +98,29 @@ async def get_high_risk_users(user: dict = Depends(get_admin_user)):
             {"name": "Khaled S.", "name_ar": "خالد س.", "risk": 65, "condition": "Cardiac", "condition_ar": "قلبي", "trend": "down"},
         ]
     return users
+
+
+@router.get("/ai-metrics")
+async def get_ai_metrics(user: dict = Depends(get_admin_user)):
+    """Per-process AI serving metrics: LLM queues, Ollama backends, model warm pool, shared clients, response cache, agent cache and routing, tool output memo, running / cancelled chat turns, token metering, checkpointer, latency percentiles."""
+    return {
+        "llm_scheduler": llm_scheduler.stats(),
+        "ollama_backends": ollama_router.stats(),
+        "model_warmup": model_warmup_status(),
+        "llm_clients": llm_client_stats(),
+        "response_cache": response_cache.stats(),
+        "agent_cache": agent_cache_stats(),
+        "agent_router": agent_router.stats(),
+        "tool_outputs": tool_outputs.stats(),
+        "chat_turns": chat_turns.stats(),
+        "llm_usage": usage_meter.stats(),
+        "performance": ai_metrics.stats(),
+        "checkpointer": await get_checkpointer().stats(),
+    }
+
+
+@router.get("/llm-usage")
+async def get_llm_usage(day: Optional[str] = None, limit: int = 20, user: dict = Depends(get_admin_user)):
+    """LLM tokens of one UTC day (YYYY-MM-DD, default today): totals, per feature and the heaviest users."""
+    with analytics_reads():
+        return await usage_report(day, min(limit, 200))
@@ -1,63 +1,171 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+from contextlib import aclosing, asynccontextmanager
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
 from datetime import datetime, timezone
+from typing import Optional
 from app.models import ChatMessage, ChatResponse
 from app.auth import get_current_user
 from app.database import get_db
-from app.ai.agent_system import process_chat_message
+from app.ai.agent_system import process_chat_message, stream_chat_message, clear_agent_memory
+from app.ai.cancellation import TurnCancelled, conversation_key, run_turn, stream_turn, wait_for_disconnect
+from app.ai.llm_scheduler import LLMSaturated, Priority, llm_scheduler
+from app.ai.usage import LLMQuotaExceeded, usage_meter
 
 router = APIRouter(prefix="/chat", tags=["AI Chat"])
 
 
-@router.post("", response_model=ChatResponse)
-@router.post("/", response_model=ChatResponse)
-async def chat(data: ChatMessage, user: dict = Depends(get_current_user)):
+# ── Shared turn persistence (plain, SSE and Socket.IO chat) ──
+
+async def begin_chat_turn(user: dict, message: str) -> list[dict]:
+    """Save the user message and return the recent history for context."""
     db = get_db()
 
     # Save user message
     await db.chat_history.insert_one({
         "user_id": user["id"],
         "role": "user",
-        "content": data.message,
+        "content": message,
         "created_at": datetime.now(timezone.utc),
     })
 
     # Get recent history for context
     history_cursor = db.chat_history.find(
         {"user_id": user["id"]},
-        sort=[("created_at", -1)],
+        sort=[("created_at", -1), ("_id", -1)],  # _id breaks same-millisecond ties
         limit=10,
     )
     history = []
     async for doc in history_cursor:
-        history.append({"role": doc["role"], "content": doc["content"]})
+        history.append({
+            "role": doc["role"],
+            "content": doc["content"],
+            "agent": doc.get("agent"),
+            "cached": doc.get("cached", False),
+            "generic": doc.get("generic", False),
+            "created_at": doc["created_at"],
+        })
     history.reverse()
+    return history
 
-    # Process with AI agent system
-    result = await process_chat_message(
-        message=data.message,
-        user=user,
-        history=history,
-        requested_agent=data.agent,
-    )
 
-    # Save assistant response
-    await db.chat_history.insert_one({
+@asynccontextmanager
+async def chat_turn_history(user: dict, message: str):
+    """
+    Start begin_chat_turn as a task and yield it as the turn's history. The task is
+    always finished on exit, so the user message is saved even when the turn is
+    superseded, cancelled or its client disconnects before the agent awaits it.
+    """
+    task = asyncio.ensure_future(begin_chat_turn(user, message))
+    history = asyncio.shield(task)  # cancelling the agent's await does not cancel the save
+    try:
+        yield history
+    finally:
+        await asyncio.wait({task})  # not cancelled with the turn
+        if not task.cancelled() and task.exception() is not None:
+            history.cancelled() or history.exception()  # retrieved here if the agent never awaited it
+            print(f"⚠️  Chat history save failed for {user['id']}: {task.exception()}")
+
+
+async def save_chat_reply(user: dict, result: dict):
+    """Persist the assistant reply of a turn (called once per turn)."""
+    await get_db().chat_history.insert_one({
         "user_id": user["id"],
         "role": "assistant",
         "agent": result["agent"],
         "content": result["response"],
         "sources": result.get("sources", []),
+        "cached": result.get("cached", False),
+        "generic": result.get("generic", False),
         "created_at": datetime.now(timezone.utc),
     })
 
+
+def _saturated_event(e: LLMSaturated) -> dict:
+    if isinstance(e, LLMQuotaExceeded):
+        return {"type": "error", "detail": "You have used today's AI assistant allowance.", "retry_after": e.retry_after}
+    return {"type": "error", "detail": "The AI assistant is busy, please retry shortly.", "retry_after": e.retry_after}
+
+
+async def stream_chat_turn(user: dict, message: str, requested_agent: Optional[str] = None):
+    """Run one streamed chat turn, persisting the final reply before the `done` event goes out."""
+    try:
+        llm_scheduler.admit(await usage_meter.enforce(user["id"], Priority.CHAT), user["id"])
+    except LLMSaturated as e:
+        yield _saturated_event(e)
+        return
+
+    # History loading runs concurrently with the agent's data snapshot prefetch
+    try:
+        async with chat_turn_history(user, message) as history:
+            async for event in stream_chat_message(message, user, history, requested_agent):
+                if event["type"] == "done":
+                    # Shielded so a client disconnecting right now cannot lose the reply
+                    await asyncio.shield(save_chat_reply(user, event))
+                yield event
+    except LLMSaturated as e:
+        yield _saturated_event(e)
+    except Exception as e:
+        print(f"⚠️  Chat stream failed for {user['id']}: {e}")
+        yield {"type": "error", "detail": "The AI system could not complete this reply. Please try again."}
+
+
+@router.post("", response_model=ChatResponse)
+@router.post("/", response_model=ChatResponse)
+async def chat(data: ChatMessage, request: Request, user: dict = Depends(get_current_user)):
+    # Reject before saving anything when the LLM queue is full or the daily token quota is spent
+    # (429 via the LLMSaturated handler)
+    llm_scheduler.admit(await usage_meter.enforce(user["id"], Priority.CHAT), user["id"])
+
+    # Process with AI agent system — history loads concurrently with the data snapshot prefetch.
+    # A newer message in the same conversation or the client disconnecting cancels the turn.
+    try:
+        async with chat_turn_history(user, data.message) as history:
+            result = await run_turn(conversation_key(user["id"], data.conversation_id, data.agent), process_chat_message(
+                message=data.message,
+                user=user,
+                history=history,
+                requested_agent=data.agent,
+            ), disconnected=wait_for_disconnect(request.receive))
+    except TurnCancelled as e:
+        raise HTTPException(status_code=409, detail=f"Chat turn cancelled ({e.reason})")
+
+    # Save assistant response
+    await save_chat_reply(user, result)
+
     return ChatResponse(
         response=result["response"],
         agent=result["agent"],
+        agents=result.get("agents", [result["agent"]]),
         sources=result.get("sources", []),
     )
 
 
+@router.post("/stream")
+async def chat_stream(data: ChatMessage, user: dict = Depends(get_current_user)):
+    """
+    Server-Sent Events: agent / tool_start / tool_end / token events, then done (or error).
+    Disconnecting cancels the turn; a turn superseded by a newer message ends with `cancelled`.
+    """
+    # Checked here too so a saturated queue / spent quota is a real 429, not an error event after a 200
+    llm_scheduler.admit(await usage_meter.enforce(user["id"], Priority.CHAT), user["id"])
+
+    key = conversation_key(user["id"], data.conversation_id, data.agent)
+
+    async def events():
+        async with aclosing(stream_turn(key, stream_chat_turn(user, data.message, data.agent))) as turn:
+            async for event in turn:
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/history")
 async def get_chat_history(user: dict = Depends(get_current_user)):
     db = get_db()
@@ -78,4 +186,5 @@ async def get_chat_history(user: dict = Depends(get_current_user)):
 async def clear_chat_history(user: dict = Depends(get_current_user)):
     db = get_db()
     await db.chat_history.delete_many({"user_id": user["id"]})
+    await clear_agent_memory(user["id"])
     return {"message": "Chat history cleared"}
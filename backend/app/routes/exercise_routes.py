@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from app.models import ExerciseLog
 from app.auth import get_current_user
 from app.database import get_db
+from app.snapshot import invalidate_snapshot
 
 router = APIRouter(prefix="/exercises", tags=["Exercises"])
 
@@ -74,6 +75,7 @@ async def log_exercise(data: ExerciseLog, user: dict = Depends(get_current_user)
     doc["user_id"] = user["id"]
     doc["created_at"] = datetime.now(timezone.utc)
     result = await db.exercise_logs.insert_one(doc)
+    invalidate_snapshot(user["id"])
     return {"id": str(result.inserted_id), "message": "Exercise logged"}
 
 
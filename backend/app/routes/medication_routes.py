@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from app.models import MedicationCreate, MedicationUpdate
 from app.auth import get_current_user
 from app.database import get_db
+from app.snapshot import invalidate_snapshot
 
 router = APIRouter(prefix="/medications", tags=["Medications"])
 
@@ -27,6 +28,7 @@ async def add_medication(data: MedicationCreate, user: dict = Depends(get_curren
     doc["status"] = "upcoming"
     doc["created_at"] = datetime.now(timezone.utc)
     result = await db.medications.insert_one(doc)
+    invalidate_snapshot(user["id"])
     return {"id": str(result.inserted_id), "message": "Medication added"}
 
 
@@ -48,6 +50,7 @@ async def update_medication_status(med_id: str, data: MedicationUpdate, user: di
         {"_id": ObjectId(med_id), "user_id": user["id"]},
         {"$set": update},
     )
+    invalidate_snapshot(user["id"])
     return {"message": "Medication updated"}
 
 
@@ -55,6 +58,7 @@ async def update_medication_status(med_id: str, data: MedicationUpdate, user: di
 async def delete_medication(med_id: str, user: dict = Depends(get_current_user)):
     db = get_db()
     await db.medications.delete_one({"_id": ObjectId(med_id), "user_id": user["id"]})
+    invalidate_snapshot(user["id"])
     return {"message": "Medication deleted"}
 
 
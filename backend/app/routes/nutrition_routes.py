@@ -4,6 +4,7 @@ from datetime import datetime, timezone, timedelta
 from app.models import MealLog
 from app.auth import get_current_user
 from app.database import get_db
+from app.snapshot import invalidate_snapshot
 
 router = APIRouter(prefix="/nutrition", tags=["Nutrition"])
 
@@ -70,6 +71,7 @@ async def log_meal(data: MealLog, user: dict = Depends(get_current_user)):
     doc["date"] = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     doc["created_at"] = datetime.now(timezone.utc)
     result = await db.nutrition_logs.insert_one(doc)
+    invalidate_snapshot(user["id"])
     return {"id": str(result.inserted_id), "message": "Meal logged"}
 
 
@@ -10,6 +10,7 @@ Healix Smart Features Routes — Fully LLM-Powered
 NO rule-based fallbacks — all intelligence comes from the LLM.
 """
 
+import asyncio
 import json
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
@@ -17,36 +18,57 @@ from bson import ObjectId
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
-from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from app.auth import get_current_user
-from app.database import get_db
+from app.database import analytics_reads, get_db, get_analytics_db
+from app.retention import fetch_vitals_range
+from app.snapshot import get_health_snapshot
 from app.config import settings
+from app.ai.llm_clients import get_chat_model
+from app.ai.llm_scheduler import Priority, llm_scheduler
+from app.ai.ollama_router import ollama_router
+from app.ai.usage import UsageCallback, usage_meter
 
 router = APIRouter(prefix="/smart", tags=["Smart Features"])
 
 
 # ── LLM Setup ─────────────────────────────────────────
+# get_llm() only describes the model; ollama_router picks the backend per call and
+# the shared client registry reuses one keep-alive connection pool per backend
 def get_llm(temperature: float = 0.4):
-    return ChatOllama(
-        model=settings.LLM_MODEL,
-        base_url=settings.OLLAMA_BASE_URL,
-        temperature=temperature,
-    )
+    return get_chat_model(settings.LLM_MODEL, temperature)
+
 
+def _usage_config(user_id: Optional[str], feature: str) -> dict:
+    return {"callbacks": [UsageCallback(user_id, feature)]} if user_id else {}
 
-async def call_llm_json(system_prompt: str, user_prompt: str, temperature: float = 0.3) -> dict:
-    """Call LLM and parse JSON response. Returns parsed dict or empty dict on failure."""
+
+async def call_llm_json(
+    system_prompt: str, user_prompt: str, temperature: float = 0.3,
+    priority: Priority = Priority.BATCH, user_id: Optional[str] = None, feature: str = "smart",
+) -> dict:
+    """
+    Call LLM and parse JSON response. Returns parsed dict or empty dict on failure.
+    Waits for a scheduler slot of `priority`; raises LLMSaturated (→ 429) when that queue is full
+    or the user's daily token quota is spent. Tokens are metered under `feature`.
+    """
     llm = get_llm(temperature)
-    try:
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt),
-        ]
-        response = await llm.ainvoke(messages)
-        text = response.content
+    priority = await usage_meter.enforce(user_id, priority)
+    async with llm_scheduler.slot(priority, user_id):
+        try:
+            messages = [
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=user_prompt),
+            ]
+            config = _usage_config(user_id, feature)
+            response = await ollama_router.call_chat(llm, lambda model: model.ainvoke(messages, config=config))
+            text = response.content
+        except Exception as e:
+            print(f"[Smart LLM Error] {e}")
+            return {}
 
+    try:
         # Extract JSON block from response
         if "```json" in text:
             start = text.index("```json") + 7
@@ -69,52 +91,34 @@ async def call_llm_json(system_prompt: str, user_prompt: str, temperature: float
         return {}
 
 
-async def call_llm_text(system_prompt: str, user_prompt: str, temperature: float = 0.5) -> str:
-    """Call LLM and return raw text response."""
+async def call_llm_text(
+    system_prompt: str, user_prompt: str, temperature: float = 0.5,
+    priority: Priority = Priority.BATCH, user_id: Optional[str] = None, feature: str = "smart",
+) -> str:
+    """Call LLM and return raw text response (scheduled and metered like call_llm_json)."""
     llm = get_llm(temperature)
-    try:
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt),
-        ]
-        response = await llm.ainvoke(messages)
-        return response.content
-    except Exception as e:
-        print(f"[Smart LLM Text Error] {e}")
-        return ""
+    priority = await usage_meter.enforce(user_id, priority)
+    async with llm_scheduler.slot(priority, user_id):
+        try:
+            messages = [
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=user_prompt),
+            ]
+            config = _usage_config(user_id, feature)
+            response = await ollama_router.call_chat(llm, lambda model: model.ainvoke(messages, config=config))
+            return response.content
+        except Exception as e:
+            print(f"[Smart LLM Text Error] {e}")
+            return ""
 
 
 async def get_user_context(user: dict) -> dict:
-    """Get full user health context from DB."""
-    db = get_db()
-    profile = await db.users.find_one({"_id": ObjectId(user["id"])})
-    vitals_cursor = db.vitals.find(
-        {"user_id": user["id"]}, sort=[("timestamp", -1)], limit=5
-    )
-    vitals = []
-    async for v in vitals_cursor:
-        v["_id"] = str(v["_id"])
-        vitals.append(v)
-
-    meds_cursor = db.medications.find({"user_id": user["id"]})
-    meds = []
-    async for m in meds_cursor:
-        m["_id"] = str(m["_id"])
-        meds.append(m)
-
+    """User health context for the prompts, from the request's (memoized) health snapshot."""
+    snapshot = await get_health_snapshot(user["id"], profile=user)
     return {
-        "name": profile.get("name", "") if profile else "",
-        "age": profile.get("age"),
-        "gender": profile.get("gender"),
-        "weight": profile.get("weight"),
-        "height": profile.get("height"),
-        "conditions": profile.get("medical_conditions", []) if profile else [],
-        "allergies": profile.get("allergies", []) if profile else [],
-        "blood_type": profile.get("blood_type"),
-        "fitness_level": profile.get("fitness_level"),
-        "diet_type": profile.get("diet_type"),
-        "vitals": vitals[0] if vitals else {},
-        "medications": [{"name": m.get("name"), "dosage": m.get("dosage")} for m in meds],
+        **snapshot["profile"],
+        "vitals": snapshot["latest_vitals"],
+        "medications": [{"name": m.get("name"), "dosage": m.get("dosage")} for m in snapshot["medications"]],
     }
 
 
@@ -197,7 +201,10 @@ ADDITIONAL NOTES: {data.additional_notes or 'None'}
 
 Provide your clinical assessment as JSON."""
 
-    result = await call_llm_json(SYMPTOM_SYSTEM_PROMPT, user_prompt, temperature=0.3)
+    result = await call_llm_json(
+        SYMPTOM_SYSTEM_PROMPT, user_prompt, temperature=0.3, priority=Priority.TRIAGE, user_id=user["id"],
+        feature="symptoms",
+    )
 
     # Ensure required fields exist
     result.setdefault("possible_conditions", [{"name": "Requires Further Evaluation", "probability": "medium", "description": "The reported symptoms need clinical assessment."}])
@@ -301,7 +308,10 @@ Analyze all possible:
 
 Provide your pharmacological assessment as JSON."""
 
-    result = await call_llm_json(DRUG_SYSTEM_PROMPT, user_prompt, temperature=0.2)
+    result = await call_llm_json(
+        DRUG_SYSTEM_PROMPT, user_prompt, temperature=0.2, priority=Priority.TRIAGE, user_id=user["id"],
+        feature="drugs",
+    )
 
     # Ensure required fields
     result.setdefault("interactions", [])
@@ -352,41 +362,46 @@ You MUST respond with ONLY a valid JSON object (no extra text):
 }"""
 
 
+def calc_trend(vals: list) -> str:
+    """Newer half vs older half of readings in chronological order (as fetch_vitals_range returns them)."""
+    if len(vals) < 2:
+        return "stable"
+    mid = len(vals) // 2
+    older = vals[:mid]
+    recent = vals[mid:]
+    r_avg = sum(recent) / len(recent)
+    o_avg = sum(older) / len(older)
+    diff = ((r_avg - o_avg) / o_avg * 100) if o_avg else 0
+    if diff > 5:
+        return "increasing"
+    elif diff < -5:
+        return "decreasing"
+    return "stable"
+
+
 @router.get("/health-report")
 async def generate_health_report(user: dict = Depends(get_current_user)):
     db = get_db()
-    ctx = await get_user_context(user)
-
-    # Get vitals history (last 7 days)
+    analytics = get_analytics_db()
+    # Context and the week's vitals / exercise / nutrition scans run concurrently
     week_ago = datetime.now(timezone.utc) - timedelta(days=7)
-    vitals_cursor = db.vitals.find(
-        {"user_id": user["id"], "timestamp": {"$gte": week_ago}},
-        sort=[("timestamp", -1)]
-    )
-    vitals_history = []
-    async for v in vitals_cursor:
-        v["_id"] = str(v["_id"])
-        vitals_history.append(v)
-
-    # Get exercise logs
-    exercise_cursor = db.exercises.find(
-        {"user_id": user["id"], "created_at": {"$gte": week_ago}},
-        sort=[("created_at", -1)]
-    )
-    exercises = []
-    async for e in exercise_cursor:
-        e["_id"] = str(e["_id"])
-        exercises.append(e)
-
-    # Get nutrition logs
-    nutrition_cursor = db.nutrition.find(
-        {"user_id": user["id"], "date": {"$gte": week_ago.strftime("%Y-%m-%d")}},
-        sort=[("date", -1)]
-    )
-    nutrition = []
-    async for n in nutrition_cursor:
-        n["_id"] = str(n["_id"])
-        nutrition.append(n)
+    async def week_scans():
+        with analytics_reads():
+            return await asyncio.gather(
+                fetch_vitals_range(user["id"], week_ago, db=analytics),
+                analytics.exercises.find(
+                    {"user_id": user["id"], "created_at": {"$gte": week_ago}},
+                    sort=[("created_at", -1)]
+                ).to_list(None),
+                analytics.nutrition.find(
+                    {"user_id": user["id"], "date": {"$gte": week_ago.strftime("%Y-%m-%d")}},
+                    sort=[("date", -1)]
+                ).to_list(None),
+            )
+
+    ctx, (vitals_history, exercises, nutrition) = await asyncio.gather(get_user_context(user), week_scans())
+    for doc in exercises + nutrition:
+        doc["_id"] = str(doc["_id"])
 
     meds = ctx.get("medications", [])
 
@@ -439,22 +454,6 @@ async def generate_health_report(user: dict = Depends(get_current_user)):
     health_score = round(sum(scores) / len(scores)) if scores else 70
     health_grade = "A" if health_score >= 85 else "B" if health_score >= 70 else "C" if health_score >= 55 else "D" if health_score >= 40 else "F"
 
-    # Trend calculation
-    def calc_trend(vals):
-        if len(vals) < 2:
-            return "stable"
-        mid = len(vals) // 2
-        recent = vals[:mid]
-        older = vals[mid:]
-        r_avg = sum(recent) / len(recent)
-        o_avg = sum(older) / len(older)
-        diff = ((r_avg - o_avg) / o_avg * 100) if o_avg else 0
-        if diff > 5:
-            return "increasing"
-        elif diff < -5:
-            return "decreasing"
-        return "stable"
-
     # ── Build data summary for LLM ──
     vitals_text = f"""Vitals Summary (last 7 days, {len(vitals_history)} readings):
 - Heart Rate: avg={avg(hr_vals) or 'N/A'}, min={min(hr_vals) if hr_vals else 'N/A'}, max={max(hr_vals) if hr_vals else 'N/A'}, trend={calc_trend(hr_vals)}
@@ -483,7 +482,7 @@ HEALTH DATA:
 
 Analyze the data and provide your clinical assessment as JSON."""
 
-    llm_analysis = await call_llm_json(REPORT_SYSTEM_PROMPT, user_prompt, temperature=0.4)
+    llm_analysis = await call_llm_json(REPORT_SYSTEM_PROMPT, user_prompt, temperature=0.4, user_id=user["id"], feature="report")
 
     # Build full report
     report_data = {
@@ -670,7 +669,7 @@ NUTRITION TARGETS:
 Create {data.meals_per_day} balanced meals that total approximately {target_cals} kcal.
 Include both English and Arabic food names. Provide your meal plan as JSON."""
 
-    llm_result = await call_llm_json(MEAL_SYSTEM_PROMPT, user_prompt, temperature=0.6)
+    llm_result = await call_llm_json(MEAL_SYSTEM_PROMPT, user_prompt, temperature=0.6, user_id=user["id"], feature="meals")
 
     # Build response
     meals = llm_result.get("meals", [])
@@ -762,7 +761,7 @@ JOURNAL ENTRY:
 
 Provide your psychological and health analysis as JSON."""
 
-    ai_analysis = await call_llm_json(JOURNAL_SYSTEM_PROMPT, user_prompt, temperature=0.4)
+    ai_analysis = await call_llm_json(JOURNAL_SYSTEM_PROMPT, user_prompt, temperature=0.4, user_id=user["id"], feature="journal")
 
     # Ensure required fields
     ai_analysis.setdefault("sentiment", "neutral")
@@ -797,7 +796,7 @@ async def get_journal_entries(user: dict = Depends(get_current_user)):
 @router.get("/journal/insights")
 async def get_journal_insights(user: dict = Depends(get_current_user)):
     """Get aggregated insights from journal entries."""
-    db = get_db()
+    db = get_analytics_db()
     month_ago = datetime.now(timezone.utc) - timedelta(days=30)
     cursor = db.health_journal.find(
         {"user_id": user["id"], "created_at": {"$gte": month_ago}},
@@ -805,8 +804,9 @@ async def get_journal_insights(user: dict = Depends(get_current_user)):
     )
 
     entries = []
-    async for doc in cursor:
-        entries.append(doc)
+    with analytics_reads():
+        async for doc in cursor:
+            entries.append(doc)
 
     if not entries:
         return {"message": "No journal entries found", "total_entries": 0}
@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 from app.models import OnboardingData
 from app.auth import get_current_user
 from app.database import get_db
+from app.snapshot import invalidate_snapshot
+from app.ai.agent_system import invalidate_user_agents
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -15,6 +17,8 @@ async def complete_onboarding(data: OnboardingData, user: dict = Depends(get_cur
     update_data["onboarding_completed"] = True
     update_data["updated_at"] = datetime.now(timezone.utc)
     await db.users.update_one({"_id": ObjectId(user["id"])}, {"$set": update_data})
+    invalidate_user_agents(user["id"])
+    invalidate_snapshot(user["id"])
     return {"message": "Onboarding completed successfully"}
 
 
@@ -54,4 +58,6 @@ async def update_profile(data: dict, user: dict = Depends(get_current_user)):
     update = {k: v for k, v in data.items() if k in allowed_fields}
     update["updated_at"] = datetime.now(timezone.utc)
     await db.users.update_one({"_id": ObjectId(user["id"])}, {"$set": update})
+    invalidate_user_agents(user["id"])
+    invalidate_snapshot(user["id"])
     return {"message": "Profile updated successfully"}
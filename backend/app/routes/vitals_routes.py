@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, Query
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 from app.models import VitalSigns, VitalsUpload
 from app.auth import get_current_user
 from app.database import get_db
+from app.snapshot import invalidate_snapshot
+from app.retention import fetch_vitals_range, ARCHIVE_FIELDS
 
 router = APIRouter(prefix="/vitals", tags=["Vital Signs"])
 
 
+def _as_utc(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
 @router.post("/upload")
 async def upload_vitals(data: VitalsUpload, user: dict = Depends(get_current_user)):
     db = get_db()
@@ -19,6 +29,7 @@ async def upload_vitals(data: VitalsUpload, user: dict = Depends(get_current_use
         docs.append(doc)
     if docs:
         await db.vitals.insert_many(docs)
+        invalidate_snapshot(user["id"])
     return {"message": f"Uploaded {len(docs)} vital records"}
 
 
@@ -44,38 +55,69 @@ async def get_current_vitals(user: dict = Depends(get_current_user)):
 
 @router.get("/history")
 async def get_vitals_history(
-    period: str = Query("24h", regex="^(24h|7d|30d)$"),
+    response: Response,
+    period: str = Query("24h", regex="^(24h|7d|30d|90d|365d)$"),
+    since: Optional[datetime] = Query(None, description="Watermark from a previous call — only newer samples are returned"),
     user: dict = Depends(get_current_user),
 ):
-    db = get_db()
     now = datetime.now(timezone.utc)
-    delta = {"24h": timedelta(hours=24), "7d": timedelta(days=7), "30d": timedelta(days=30)}
+    delta = {
+        "24h": timedelta(hours=24), "7d": timedelta(days=7), "30d": timedelta(days=30),
+        "90d": timedelta(days=90), "365d": timedelta(days=365),
+    }
     start = now - delta.get(period, timedelta(hours=24))
+    if since is not None:
+        since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        start = max(start, since)
 
-    cursor = db.vitals.find(
-        {"user_id": user["id"], "timestamp": {"$gte": start}},
-        sort=[("timestamp", 1)]
-    )
-    records = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        records.append(doc)
+    # Days past the raw retention window come back from the archive buckets
+    records = await fetch_vitals_range(user["id"], start)
+    if since is not None:
+        records = [r for r in records if _as_utc(r["timestamp"]) > since]
+
+    # Incremental sync: the client passes this back as `since` on its next call
+    watermark = _as_utc(records[-1]["timestamp"]) if records else (since or start)
+    response.headers["X-Vitals-Watermark"] = watermark.isoformat()
     return records
 
 
+@router.get("/export")
+async def export_vitals(
+    start: datetime = Query(..., description="Inclusive start (ISO 8601)"),
+    end: Optional[datetime] = Query(None, description="Exclusive end (ISO 8601), defaults to now"),
+    format: str = Query("json", regex="^(json|csv)$"),
+    user: dict = Depends(get_current_user),
+):
+    """Export raw and archived vitals for an arbitrary range (max 2 years)."""
+    start = _as_utc(start)
+    end = _as_utc(end or datetime.now(timezone.utc))
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > timedelta(days=731):
+        raise HTTPException(status_code=400, detail="Export range is limited to 2 years")
+
+    records = await fetch_vitals_range(user["id"], start, end)
+    if format == "json":
+        return records
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["timestamp", *ARCHIVE_FIELDS], extrasaction="ignore")
+    writer.writeheader()
+    for r in records:
+        writer.writerow({**r, "timestamp": _as_utc(r["timestamp"]).isoformat()})
+    buffer.seek(0)
+    return StreamingResponse(
+        iter([buffer.getvalue()]),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=vitals_{start:%Y%m%d}_{end:%Y%m%d}.csv"},
+    )
+
+
 @router.get("/weekly-trends")
 async def get_weekly_trends(user: dict = Depends(get_current_user)):
     """Get weekly vital trends for dashboard / monitoring."""
-    db = get_db()
     start = datetime.now(timezone.utc) - timedelta(days=7)
-    cursor = db.vitals.find(
-        {"user_id": user["id"], "timestamp": {"$gte": start}},
-        sort=[("timestamp", 1)],
-    )
-    records = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        records.append(doc)
+    records = await fetch_vitals_range(user["id"], start)
     if not records:
         # Return sample weekly data so dashboard is not empty
         days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
@@ -0,0 +1,166 @@
+"""
+Healix Health Snapshot
+One assembled view of a user's health state, shared by the smart routes and the
+chat agents:
+
+- profile, latest vitals (+ the last 5 readings), medications and compliance,
+  7-day activity counts and pointers to the current nutrition / exercise plans
+- all queries run concurrently (one round-trip of latency); the profile the auth
+  dependency already loaded is reused instead of re-reading `users`
+- memoized per request / chat turn: the first caller loads it, concurrent and
+  later callers in the same scope await the same load
+
+A scope is opened per HTTP request by SnapshotScopeMiddleware and per chat turn
+by the agent system. Outside a scope every call loads afresh. Routes that write
+one of the snapshot's collections call invalidate_snapshot, so a later read in
+the same request sees the write.
+"""
+
+import asyncio
+from contextvars import ContextVar
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from bson import ObjectId
+
+from app.ai.tracing import span
+from app.database import get_db
+
+RECENT_VITALS = 5
+ACTIVITY_DAYS = 7
+PROFILE_FIELDS = (
+    "name", "age", "gender", "weight", "height", "blood_type", "fitness_level", "diet_type",
+)
+
+_memo: ContextVar[Optional[dict]] = ContextVar("healix_snapshot_memo", default=None)
+
+
+def begin_snapshot_scope():
+    """Start a fresh memo for this request / chat turn (tasks started afterwards share it)."""
+    _memo.set({})
+
+
+def invalidate_snapshot(user_id: str):
+    """Drop the memoized snapshot after a write in the same scope."""
+    memo = _memo.get()
+    if memo is not None:
+        memo.pop(user_id, None)
+
+
+class SnapshotScopeMiddleware:
+    """ASGI middleware: one snapshot memo per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            begin_snapshot_scope()
+        await self.app(scope, receive, send)
+
+
+# ══════════════════════════════════════════════════════════
+#  LOADING
+# ══════════════════════════════════════════════════════════
+
+def _empty(user_id: str, profile: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "profile": profile,
+        "latest_vitals": {},
+        "recent_vitals": [],
+        "medications": [],
+        "compliance": {"total": 0, "taken": 0, "compliance": 100},
+        "activity": {"exercises_completed_7d": 0, "meals_logged_7d": 0, "alerts_7d": 0},
+        "plans": {"nutrition": None, "exercise": None},
+        "fetched_at": datetime.now(timezone.utc),
+    }
+
+
+def _profile(doc: Optional[dict]) -> dict:
+    doc = doc or {}
+    profile = {field: doc.get(field) for field in PROFILE_FIELDS}
+    profile["name"] = profile["name"] or ""
+    profile["conditions"] = doc.get("medical_conditions", []) or []
+    profile["allergies"] = doc.get("allergies", []) or []
+    profile["fitness_goals"] = doc.get("fitness_goals", []) or []
+    return profile
+
+
+def _plan_pointer(doc: Optional[dict]) -> Optional[dict]:
+    return {"id": str(doc["_id"]), "created_at": doc.get("created_at")} if doc else None
+
+
+async def _load(user_id: str, profile_doc: Optional[dict]) -> dict:
+    db = get_db()
+    if db is None:
+        return _empty(user_id, _profile(profile_doc))
+
+    since = datetime.now(timezone.utc) - timedelta(days=ACTIVITY_DAYS)
+    newest = [("created_at", -1)]
+
+    async def profile():
+        if profile_doc is not None or not ObjectId.is_valid(user_id):
+            return profile_doc
+        return await db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+
+    async def vitals():
+        return await db.vitals.find({"user_id": user_id}, sort=[("timestamp", -1)], limit=RECENT_VITALS).to_list(RECENT_VITALS)
+
+    async def medications():
+        return await db.medications.find({"user_id": user_id}).to_list(None)
+
+    with span("mongo", "health_snapshot"):
+        (profile_doc, recent, meds, exercises, meals, alerts, nutrition_plan, exercise_plan) = await asyncio.gather(
+            profile(),
+            vitals(),
+            medications(),
+            db.exercise_logs.count_documents({"user_id": user_id, "created_at": {"$gte": since}, "completed": True}),
+            db.nutrition_logs.count_documents({"user_id": user_id, "created_at": {"$gte": since}}),
+            db.alerts.count_documents({"user_id": user_id, "created_at": {"$gte": since}}),
+            db.nutrition_plans.find_one({"user_id": user_id}, {"_id": 1, "created_at": 1}, sort=newest),
+            db.exercise_plans.find_one({"user_id": user_id}, {"_id": 1, "created_at": 1}, sort=newest),
+        )
+
+    for doc in recent + meds:
+        doc["_id"] = str(doc["_id"])
+    taken = sum(1 for m in meds if m.get("status") == "taken")
+
+    snapshot = _empty(user_id, _profile(profile_doc))
+    snapshot.update(
+        latest_vitals=recent[0] if recent else {},
+        recent_vitals=recent,
+        medications=meds,
+        compliance={
+            "total": len(meds),
+            "taken": taken,
+            "compliance": round(taken / len(meds) * 100, 1) if meds else 100,
+        },
+        activity={"exercises_completed_7d": exercises, "meals_logged_7d": meals, "alerts_7d": alerts},
+        plans={"nutrition": _plan_pointer(nutrition_plan), "exercise": _plan_pointer(exercise_plan)},
+    )
+    return snapshot
+
+
+# ══════════════════════════════════════════════════════════
+#  PUBLIC API
+# ══════════════════════════════════════════════════════════
+
+def prefetch_health_snapshot(user_id: str, profile: Optional[dict] = None) -> asyncio.Future:
+    """
+    Start (or join) the scope's snapshot load without waiting for it.
+    Pass `profile` (the authenticated user document) to skip the `users` read.
+    """
+    memo = _memo.get()
+    task = memo.get(user_id) if memo is not None else None
+    if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+        task = asyncio.ensure_future(_load(user_id, profile))
+        if memo is not None:
+            memo[user_id] = task
+    return task
+
+
+async def get_health_snapshot(user_id: str, profile: Optional[dict] = None) -> dict:
+    """The user's health snapshot, computed at most once per scope. Treat it as read-only."""
+    # shield: one caller giving up must not cancel the load for the others
+    return await asyncio.shield(prefetch_health_snapshot(user_id, profile))
@@ -2,8 +2,19 @@
 Socket.IO server for real-time vital signs updates
 """
 
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import aclosing
+from datetime import datetime, timezone, timedelta
+
 import socketio
+from bson import ObjectId
 from app.auth import decode_token
+from app.config import settings
+from app.database import get_db
+from app.retention import fetch_vitals_range
+from app.ai.cancellation import conversation_key, stream_turn
+from app.routes.chat_routes import stream_chat_turn
 
 sio = socketio.AsyncServer(
     async_mode="asgi",
@@ -12,9 +23,91 @@ sio = socketio.AsyncServer(
 )
 
 
+# sid → running chat_message handlers, cancelled (with their chat turns) on disconnect
+_chat_tasks: dict[str, set[asyncio.Task]] = {}
+
+
+# ── Replay buffer: recent vitals per user, for resuming reconnecting clients ──
+# user_id → deque[(timestamp, sample)], least recently written user evicted first
+_recent_vitals: "OrderedDict[str, deque]" = OrderedDict()
+
+
+def _parse_ts(value) -> datetime | None:
+    if isinstance(value, datetime):
+        ts = value
+    elif isinstance(value, str):
+        try:
+            ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def remember_vitals(user_id: str, sample: dict):
+    """Append a pushed sample to the user's bounded replay buffer."""
+    ts = _parse_ts(sample.get("timestamp")) or datetime.now(timezone.utc)
+    sample = {**sample, "timestamp": ts.isoformat()}
+    buffer = _recent_vitals.get(user_id)
+    if buffer is None:
+        buffer = _recent_vitals[user_id] = deque(maxlen=settings.SOCKET_REPLAY_BUFFER_SIZE)
+        while len(_recent_vitals) > settings.SOCKET_REPLAY_MAX_USERS:
+            _recent_vitals.popitem(last=False)
+    else:
+        _recent_vitals.move_to_end(user_id)
+    if buffer and ts < buffer[-1][0]:
+        # Out-of-order sample (late upload) — keep the buffer sorted
+        items = sorted([*buffer, (ts, sample)], key=lambda item: item[0])
+        buffer.clear()
+        buffer.extend(items)
+    else:
+        buffer.append((ts, sample))
+
+
+async def _missed_vitals(user_id: str, since: datetime) -> tuple[list[dict], str, bool]:
+    """Samples newer than `since` — from the buffer when it covers the gap, else from Mongo."""
+    floor = datetime.now(timezone.utc) - timedelta(hours=settings.SOCKET_REPLAY_WINDOW_HOURS)
+    truncated = since < floor
+    since = max(since, floor)
+    buffer = _recent_vitals.get(user_id) or ()
+    buffered = [sample for ts, sample in buffer if ts > since]
+    if buffer and buffer[0][0] <= since:
+        return buffered, "buffer", truncated
+
+    samples = {}
+    for doc in await fetch_vitals_range(user_id, since):
+        ts = _parse_ts(doc.get("timestamp"))
+        if ts and ts > since:
+            samples[ts] = {
+                k: (_parse_ts(v).isoformat() if k == "timestamp" else v)
+                for k, v in doc.items() if k not in ("_id", "user_id", "archived")
+            }
+    # Socket-only samples never reach Mongo — merge what the buffer still holds
+    for ts, sample in buffer:
+        if ts > since:
+            samples.setdefault(ts, sample)
+    ordered = [samples[ts] for ts in sorted(samples)]
+    if len(ordered) > settings.SOCKET_REPLAY_MAX_SAMPLES:
+        ordered = ordered[-settings.SOCKET_REPLAY_MAX_SAMPLES:]
+        truncated = True
+    return ordered, "database", truncated
+
+
+async def _resume(sid: str, user_id: str, since: datetime):
+    samples, source, truncated = await _missed_vitals(user_id, since)
+    await sio.emit("vitals_resume", {
+        "samples": samples,
+        "watermark": samples[-1]["timestamp"] if samples else since.isoformat(),
+        "source": source,
+        # Gap longer than the replay window — client should refetch /vitals/history
+        "truncated": truncated,
+    }, to=sid)
+
+
 @sio.event
 async def connect(sid, environ, auth):
-    """Handle client connection with JWT auth."""
+    """Handle client connection with JWT auth, replaying vitals missed since `auth.since`."""
     token = auth.get("token") if auth else None
     if not token:
         raise socketio.exceptions.ConnectionRefusedError("Authentication required")
@@ -27,9 +120,18 @@ async def connect(sid, environ, auth):
     except Exception as e:
         raise socketio.exceptions.ConnectionRefusedError(str(e))
 
+    since = _parse_ts(auth.get("since"))
+    if since:
+        try:
+            await _resume(sid, user_id, since)
+        except Exception as e:
+            print(f"⚠️  Vitals resume failed for {user_id}: {e}")
+
 
 @sio.event
 async def disconnect(sid):
+    for task in _chat_tasks.pop(sid, ()):
+        task.cancel()
     session = await sio.get_session(sid)
     user_id = session.get("user_id", "unknown")
     print(f"🔌 User {user_id} disconnected")
@@ -41,6 +143,8 @@ async def vitals_update(sid, data):
     session = await sio.get_session(sid)
     user_id = session.get("user_id")
     if user_id:
+        data = {**data, "timestamp": data.get("timestamp") or datetime.now(timezone.utc).isoformat()}
+        remember_vitals(user_id, data)
         # Broadcast to user's room (for family monitoring)
         await sio.emit("vitals_data", data, room=f"user_{user_id}")
 
@@ -50,6 +154,44 @@ async def vitals_update(sid, data):
             await sio.emit("health_alert", {"alerts": alerts}, room=f"user_{user_id}")
 
 
+@sio.event
+async def chat_message(sid, data):
+    """
+    Streamed AI chat over the socket: emits `chat_stream` events (same shapes as POST /chat/stream).
+    The turn is cancelled when the socket disconnects or a newer message in the same
+    conversation (`conversation_id`, else the requested agent) supersedes it.
+    """
+    session = await sio.get_session(sid)
+    user = await _load_user(session.get("user_id"))
+    message = (data or {}).get("message", "").strip()
+    request_id = (data or {}).get("request_id")
+    if not user or not message:
+        await sio.emit("chat_stream", {"type": "error", "request_id": request_id, "detail": "Invalid chat message"}, to=sid)
+        return
+    key = conversation_key(user["id"], str(data.get("conversation_id") or "")[:64] or None, data.get("agent"))
+    task = asyncio.current_task()
+    _chat_tasks.setdefault(sid, set()).add(task)
+    try:
+        async with aclosing(stream_turn(key, stream_chat_turn(user, message, data.get("agent")))) as turn:
+            async for event in turn:
+                await sio.emit("chat_stream", {**event, "request_id": request_id}, to=sid)
+    finally:
+        tasks = _chat_tasks.get(sid)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del _chat_tasks[sid]
+
+
+async def _load_user(user_id: str | None) -> dict | None:
+    if not user_id:
+        return None
+    user = await get_db().users.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+    if user:
+        user["id"] = str(user.pop("_id"))
+    return user
+
+
 def check_vital_alerts(data: dict) -> list:
     """Check vital signs for concerning values."""
     alerts = []
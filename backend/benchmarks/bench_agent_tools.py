@@ -0,0 +1,196 @@
+"""
+Healix Agent Tool Benchmark
+Measures the per-call overhead of agent data tools against a database loaded by
+benchmarks.seed_data, comparing:
+
+- legacy — the old dispatch: a sync tool, which LangChain runs in a worker
+  thread, spinning up a fresh event loop per DB call (the removed `_run_async`
+  helper), with the risk tool's three queries issued one after another
+- native — the current coroutine tools, awaited on the application loop with
+  independent queries gathered
+
+Both paths go through tool.ainvoke() and run the same Motor queries, so the
+difference is dispatch overhead.
+No LLM is involved.
+
+Run from backend/ after seeding:
+    python -m benchmarks.bench_agent_tools --calls 200 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from langchain_core.tools import StructuredTool
+
+from benchmarks.bench_routes import _percentiles
+
+# Tool name → argument passed by the agent
+TOOL_ARGS = {
+    "lookup_vitals": "current",
+    "get_vital_trends": "7d",
+    "check_health_alerts": "recent",
+    "get_nutrition_history": "7",
+    "get_exercise_history": "7",
+    "analyze_risk_factors": "overall",
+    "check_medication_compliance": "all",
+}
+
+
+def _legacy_run_async(coro):
+    """The removed helper: a brand-new event loop for every coroutine."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+# The old tools' own queries for data now read from the shared health snapshot (app.snapshot)
+async def _legacy_latest_vitals(user_id: str) -> dict:
+    from app.database import get_db
+    return await get_db().vitals.find_one({"user_id": user_id}, sort=[("timestamp", -1)]) or {}
+
+
+async def _legacy_medications(user_id: str) -> list:
+    from app.database import get_db
+    return await get_db().medications.find({"user_id": user_id}).to_list(None)
+
+
+async def _legacy_medication_compliance(user_id: str) -> dict:
+    from app.database import get_db
+    total = await get_db().medications.count_documents({"user_id": user_id})
+    taken = await get_db().medications.count_documents({"user_id": user_id, "status": "taken"})
+    return {"total": total, "taken": taken}
+
+
+async def _legacy_exercise_count(user_id: str, days: int) -> int:
+    from datetime import datetime, timedelta, timezone
+    from app.database import get_db
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    return await get_db().exercise_logs.count_documents({"user_id": user_id, "created_at": {"$gte": start}, "completed": True})
+
+
+def _legacy_calls(agent_system, name: str, user_id: str, arg: str) -> list:
+    """Coroutines the old sync tool body drove one by one through _run_async."""
+    if name == "lookup_vitals":
+        return [lambda: _legacy_latest_vitals(user_id)]
+    if name == "get_vital_trends":
+        return [lambda: agent_system._db_get_vitals_history(user_id, arg)]
+    if name == "check_health_alerts":
+        return [lambda: agent_system._db_get_alerts(user_id)]
+    if name == "get_nutrition_history":
+        return [lambda: agent_system._db_get_nutrition_logs(user_id, int(arg))]
+    if name == "get_exercise_history":
+        return [lambda: agent_system._db_get_exercise_logs(user_id, int(arg))]
+    if name == "analyze_risk_factors":
+        return [
+            lambda: _legacy_latest_vitals(user_id),
+            lambda: _legacy_medication_compliance(user_id),
+            lambda: _legacy_exercise_count(user_id, 7),
+        ]
+    if name == "check_medication_compliance":
+        return [
+            lambda: _legacy_medications(user_id),
+            lambda: _legacy_medication_compliance(user_id),
+        ]
+    raise KeyError(name)
+
+
+def _legacy_tool(agent_system, name: str, user_id: str) -> StructuredTool:
+    def sync_tool(query: str) -> str:
+        """Legacy sync tool body."""
+        return str([_legacy_run_async(make()) for make in _legacy_calls(agent_system, name, user_id, query)])
+
+    return StructuredTool.from_function(func=sync_tool, name=name)
+
+
+async def _measure(call, calls: int, concurrency: int) -> list[float]:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies
+
+
+async def run_suite(args) -> dict:
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["DATABASE_NAME"] = args.db
+
+    from app.database import connect_db, close_db, get_db
+    from app.ai import agent_system
+
+    await connect_db()
+    users = [str(u["_id"]) async for u in get_db().users.find({"synthetic": True}, {"_id": 1}).limit(args.sample_users)]
+    if not users:
+        raise SystemExit(f"No synthetic users in '{args.db}' — run benchmarks.seed_data first")
+
+    tools = {}
+    for agent_type, factory in agent_system._TOOL_FACTORIES.items():
+        for user_id in users:
+            for t in factory(user_id, "benchmark profile"):
+                tools.setdefault(t.name, {})[user_id] = t
+
+    loop = asyncio.get_running_loop()
+    results = {}
+    for name, arg in TOOL_ARGS.items():
+        if args.only and not any(sel in name for sel in args.only):
+            continue
+
+        legacy_tools = {user_id: _legacy_tool(agent_system, name, user_id) for user_id in users}
+
+        async def legacy(i: int):
+            await legacy_tools[users[i % len(users)]].ainvoke(arg)
+
+        async def native(i: int):
+            await tools[name][users[i % len(users)]].ainvoke(arg)
+
+        await _measure(legacy, args.warmup, 1)
+        await _measure(native, args.warmup, 1)
+        legacy_ms = await _measure(legacy, args.calls, args.concurrency)
+        native_ms = await _measure(native, args.calls, args.concurrency)
+        results[name] = {"legacy": _percentiles(legacy_ms), "native": _percentiles(native_ms)}
+
+        before, after = results[name]["legacy"], results[name]["native"]
+        print(f"  🔧 {name:<30} legacy p50 {before['p50']:>7.2f}ms p95 {before['p95']:>7.2f}ms  │  "
+              f"native p50 {after['p50']:>7.2f}ms p95 {after['p95']:>7.2f}ms  │  "
+              f"Δp50 {after['p50'] - before['p50']:+.2f}ms")
+
+    # Pure dispatch cost: an empty coroutine through each path
+    async def noop():
+        return None
+
+    legacy_noop = await _measure(lambda i: loop.run_in_executor(None, _legacy_run_async, noop()), args.calls, args.concurrency)
+    native_noop = await _measure(lambda i: noop(), args.calls, args.concurrency)
+    results["_dispatch_only"] = {"legacy": _percentiles(legacy_noop), "native": _percentiles(native_noop)}
+    print(f"  ⚙️  {'dispatch only (no DB)':<30} legacy p50 {results['_dispatch_only']['legacy']['p50']:>7.3f}ms  │  "
+          f"native p50 {results['_dispatch_only']['native']['p50']:>7.3f}ms")
+
+    await close_db()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent data-tool dispatch: fresh loop per call vs native coroutines.")
+    parser.add_argument("--mongodb-url", default=os.getenv("BENCH_MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("BENCH_DATABASE_NAME", "healix_bench"))
+    parser.add_argument("--calls", type=int, default=200, help="Measured calls per tool and mode")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent tool calls (simulates parallel chats)")
+    parser.add_argument("--sample-users", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="Substrings selecting a subset of tools")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking agent tools on '{args.db}' ({args.calls} calls/tool, concurrency {args.concurrency})")
+    asyncio.run(run_suite(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Healix Agent Benchmark
+Drives the four chat agents and the five smart features end to end against a
+database loaded by benchmarks.seed_data, with the LLM replaced by the offline
+fake (LLM_PROVIDER=fake, app.ai.fake_llm), and reports per turn:
+
+- wall      — end-to-end time of process_chat_message() / the route function
+- llm       — simulated model time the fake spent (latency + prefill + decode)
+- tools     — summed tool spans of the turn (Mongo reads, knowledge-base search)
+- overhead  — wall − llm − tools: LangGraph / LangChain machinery, middleware,
+  prompt building, history / checkpoint I/O and, for the smart features, their
+  own Mongo reads and writes
+- memory    — tracemalloc peak above the turn's starting point, and what the
+  turn left allocated (checkpointed messages, caches)
+
+The agent:fanout scenario asks a cross-domain question that runs three agents
+concurrently; its `llm` column sums their model time, so `overhead` goes negative
+by the time the agents overlapped. Turns run one at a time so the fake's
+simulated time can be attributed to the turn; the tracemalloc pass runs
+separately (it slows everything down). Sleep jitter of the fake lands in
+`overhead` — keep --tokens-per-s 0 (one sleep per call) when measuring the
+framework itself.
+
+Run from backend/ after seeding:
+    python -m benchmarks.bench_agents --turns 40 --tool-rounds "search_"
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+from typing import Optional
+
+import numpy as np
+
+from benchmarks.bench_routes import _percentiles
+
+AGENT_MESSAGES = {
+    "clinical": "How is my heart rate and blood pressure today?",
+    "nutrition": "What should I eat for dinner given my nutrition plan?",
+    "exercise": "Is my workout plan too hard this week?",
+    "risk": "What is my risk of a cardiac event based on my trends?",
+}
+# Routed to three agents at once (fan-out): wall time should track the slowest one plus the synthesis
+FANOUT_MESSAGE = "What should I eat and how should I train given my blood pressure?"
+
+
+def _scenarios(users: list[dict]) -> dict:
+    """Scenario name → async turn(i), returning the turn's tool time in ms."""
+    from app.ai.agent_system import process_chat_message
+    from app.routes import smart_routes as smart
+    from app.snapshot import begin_snapshot_scope
+
+    def agent(agent_type: Optional[str]):
+        message = AGENT_MESSAGES[agent_type] if agent_type else FANOUT_MESSAGE
+
+        async def turn(i: int) -> float:
+            reply = await process_chat_message(message, users[i % len(users)], [], agent_type)
+            return reply.get("trace", {}).get("by_kind", {}).get("tool", 0.0)
+        return turn
+
+    def feature(call):
+        async def turn(i: int) -> float:
+            begin_snapshot_scope()  # SnapshotScopeMiddleware's job for a real request
+            await call(users[i % len(users)])
+            return 0.0
+        return turn
+
+    return {
+        **{f"agent:{name}": agent(name) for name in AGENT_MESSAGES},
+        "agent:fanout": agent(None),
+        "smart:symptoms": feature(lambda u: smart.check_symptoms(
+            smart.SymptomRequest(symptoms=["headache", "dizziness"], duration="2 days"), user=u)),
+        "smart:drugs": feature(lambda u: smart.check_drug_interactions(
+            smart.DrugCheckRequest(drug_name="ibuprofen", current_medications=["lisinopril"]), user=u)),
+        "smart:report": feature(lambda u: smart.generate_health_report(user=u)),
+        "smart:meals": feature(lambda u: smart.generate_meal_plan(smart.MealPlanRequest(goal="heart_health"), user=u)),
+        "smart:journal": feature(lambda u: smart.create_journal_entry(
+            smart.JournalEntry(content="Slept badly, mild headache after lunch.", mood="tired", energy_level=4), user=u)),
+    }
+
+
+async def _latency(turn, turns: int) -> dict:
+    from app.ai.fake_llm import fake_llm_stats
+
+    wall, llm, tools, overhead = [], [], [], []
+    for i in range(turns):
+        simulated = fake_llm_stats()["simulated_ms"]
+        started = time.perf_counter()
+        tool_ms = await turn(i)
+        elapsed = (time.perf_counter() - started) * 1000
+        llm_ms = fake_llm_stats()["simulated_ms"] - simulated
+        wall.append(elapsed)
+        llm.append(llm_ms)
+        tools.append(tool_ms)
+        overhead.append(elapsed - llm_ms - tool_ms)
+    return {
+        "wall": _percentiles(wall),
+        "llm_p50": round(float(np.median(llm)), 2),
+        "tools_p50": round(float(np.median(tools)), 2),
+        "overhead": _percentiles(overhead),
+    }
+
+
+async def _memory(turn, turns: int, offset: int) -> dict:
+    peaks, retained = [], []
+    for i in range(turns):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await turn(offset + i)
+        after, peak = tracemalloc.get_traced_memory()
+        peaks.append((peak - before) / 1024)
+        retained.append((after - before) / 1024)
+    return {"peak_kb": round(float(np.median(peaks)), 1), "retained_kb": round(float(np.mean(retained)), 1)}
+
+
+async def run_suite(args) -> dict:
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["DATABASE_NAME"] = args.db
+    os.environ.setdefault("CHECKPOINTER", "memory")
+
+    from app.config import settings
+    from app.database import connect_db, close_db, get_db
+    from app.ai.fake_llm import configure_fake_llm, parse_tool_rounds
+
+    settings.LLM_PROVIDER = "fake"
+    settings.RESPONSE_CACHE_ENABLED = args.response_cache
+    configure_fake_llm(
+        latency_ms=args.latency_ms,
+        tokens_per_s=args.tokens_per_s,
+        reply_tokens=args.reply_tokens,
+        tool_rounds=parse_tool_rounds(args.tool_rounds),
+    )
+
+    await connect_db()
+    users = [u async for u in get_db().users.find({"synthetic": True}, {"password": 0}).limit(args.sample_users)]
+    if not users:
+        raise SystemExit(f"No synthetic users in '{args.db}' — run benchmarks.seed_data first")
+    for u in users:
+        u["id"] = str(u.pop("_id"))
+
+    scenarios = _scenarios(users)
+    if args.only:
+        scenarios = {name: turn for name, turn in scenarios.items() if any(name.startswith(o) for o in args.only)}
+
+    results = {}
+    print(f"  {'scenario':<16} {'wall p50':>9} {'p95':>9} {'llm':>8} {'tools':>8} {'overhead p50':>13} {'p95':>8}")
+    for name, turn in scenarios.items():
+        for i in range(args.warmup):  # agent build, knowledge-base collections, first checkpoint
+            await turn(i)
+        result = await _latency(turn, args.turns)
+        results[name] = result
+        print(f"  {name:<16} {result['wall']['p50']:>7.1f}ms {result['wall']['p95']:>7.1f}ms "
+              f"{result['llm_p50']:>6.1f}ms {result['tools_p50']:>6.1f}ms "
+              f"{result['overhead']['p50']:>11.1f}ms {result['overhead']['p95']:>6.1f}ms")
+
+    if args.memory_turns:
+        print(f"  {'scenario':<16} {'peak/turn':>10} {'retained/turn':>14}")
+        tracemalloc.start()
+        for name, turn in scenarios.items():
+            memory = await _memory(turn, args.memory_turns, args.turns)
+            results[name]["memory"] = memory
+            print(f"  {name:<16} {memory['peak_kb']:>8.1f}KB {memory['retained_kb']:>12.1f}KB")
+        tracemalloc.stop()
+
+    await close_db()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agents and smart features against the offline fake LLM.")
+    parser.add_argument("--mongodb-url", default=os.getenv("BENCH_MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("BENCH_DATABASE_NAME", "healix_bench"))
+    parser.add_argument("--turns", type=int, default=40, help="Measured turns per scenario")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--memory-turns", type=int, default=10, help="Turns per scenario under tracemalloc (0 = skip)")
+    parser.add_argument("--sample-users", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="Scenario name prefixes, e.g. agent: smart:report")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake-LLM fixed latency per model call")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Fake-LLM decode rate (0 = instant)")
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--tool-rounds", default="search_", help='Tools per model step, e.g. "search_;get_"')
+    parser.add_argument("--response-cache", action="store_true", help="Keep the semantic response cache on")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking agents and smart features on '{args.db}' ({args.turns} turns each, fake LLM)")
+    asyncio.run(run_suite(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Healix Chat Prefetch Benchmark
+Measures end-to-end latency of process_chat_message() against a database loaded
+by benchmarks.seed_data, with the agent data snapshot prefetch on and off
+(AGENT_PREFETCH_SNAPSHOT).
+
+The LLM is the offline fake (LLM_PROVIDER=fake, app.ai.fake_llm) with a fixed
+cost per model call (base latency + prompt prefill + output decode). Like a real
+model following the prompt rules, it answers straight away when the system
+prompt carries the data snapshot, and otherwise first calls the agent's primary
+data tool:
+
+- off — model call → tool round-trip → model call
+- on  — snapshot gathered concurrently with the history load → one model call
+
+Tools, checkpointer and agent cache are the real ones, so the difference is the
+saved model round-trip minus the snapshot's extra prompt tokens.
+
+Run from backend/ after seeding:
+    python -m benchmarks.bench_chat_prefetch --turns 100 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+
+from benchmarks.bench_agent_tools import _measure
+from benchmarks.bench_routes import _percentiles
+
+# One message per agent, routed by keyword detection
+MESSAGES = [
+    "How is my heart rate and blood pressure today?",
+    "What should I eat for dinner given my nutrition plan?",
+    "Is my workout plan too hard this week?",
+    "What is my risk of a cardiac event based on my trends?",
+]
+
+
+async def run_suite(args) -> dict:
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["DATABASE_NAME"] = args.db
+    os.environ.setdefault("CHECKPOINTER", "memory")
+
+    from app.config import settings
+    from app.ai.fake_llm import configure_fake_llm
+    from app.database import connect_db, close_db, get_db
+    from app.ai import agent_system
+
+    await connect_db()
+    users = [u async for u in get_db().users.find({"synthetic": True}, {"password": 0}).limit(args.sample_users)]
+    if not users:
+        raise SystemExit(f"No synthetic users in '{args.db}' — run benchmarks.seed_data first")
+    for u in users:
+        u["id"] = str(u.pop("_id"))
+
+    # Each agent's primary data tool is the first one its snapshot prefetches
+    first_tools = [calls[0][0] for calls in agent_system.SNAPSHOT_TOOLS.values()]
+    settings.LLM_PROVIDER = "fake"
+    configure_fake_llm(
+        latency_ms=args.base_ms,
+        tokens_per_s=args.tokens_per_s,
+        reply_tokens=60,
+        tool_rounds=[first_tools],
+    )
+
+    async def history():
+        # Stands in for begin_chat_turn: one indexed read of recent messages
+        await get_db().chat_history.find_one({"user_id": "bench"})
+        return []
+
+    async def turn(i: int):
+        user = users[i % len(users)]
+        await agent_system.process_chat_message(MESSAGES[i % len(MESSAGES)], user, history(), None)
+
+    results = {}
+    for mode, enabled in (("off", False), ("on", True)):
+        settings.AGENT_PREFETCH_SNAPSHOT = enabled
+        await _measure(turn, args.warmup, 1)
+        results[mode] = _percentiles(await _measure(turn, args.turns, args.concurrency))
+
+    before, after = results["off"], results["on"]
+    print(f"  💬 prefetch off p50 {before['p50']:>8.1f}ms p95 {before['p95']:>8.1f}ms")
+    print(f"  💬 prefetch on  p50 {after['p50']:>8.1f}ms p95 {after['p95']:>8.1f}ms  │  "
+          f"Δp50 {after['p50'] - before['p50']:+.1f}ms ({(after['p50'] / before['p50'] - 1) * 100:+.0f}%)")
+
+    await close_db()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat latency with and without the agent data snapshot prefetch.")
+    parser.add_argument("--mongodb-url", default=os.getenv("BENCH_MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("BENCH_DATABASE_NAME", "healix_bench"))
+    parser.add_argument("--turns", type=int, default=100, help="Measured chat turns per mode")
+    parser.add_argument("--warmup", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent chat turns")
+    parser.add_argument("--sample-users", type=int, default=20)
+    parser.add_argument("--base-ms", type=float, default=250.0, help="Fixed fake-LLM latency per model call")
+    parser.add_argument("--tokens-per-s", type=float, default=40.0, help="Fake-LLM decode rate")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking chat prefetch on '{args.db}' ({args.turns} turns/mode, concurrency {args.concurrency})")
+    asyncio.run(run_suite(args))
+
+
+if __name__ == "__main__":
+    main()
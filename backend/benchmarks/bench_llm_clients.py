@@ -0,0 +1,96 @@
+"""
+Healix LLM Client Benchmark
+Per-call client overhead against a zero-latency local fake Ollama
+(benchmarks.fake_ollama), so what is left is client construction plus HTTP
+connection setup:
+
+- construct   — ChatOllama(...) alone, new instance vs registry lookup
+- per-call    — a new ChatOllama (and its own httpx pool) per call, the old
+  smart_routes.get_llm() behaviour
+- shared      — app.ai.llm_clients.get_chat_model(), one keep-alive pool per backend
+
+No MongoDB or real Ollama needed.
+
+Run from backend/:
+    python -m benchmarks.bench_llm_clients --calls 300 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import time
+
+import uvicorn
+from langchain_ollama import ChatOllama
+
+from app.ai.llm_clients import close_llm_clients, get_chat_model
+from benchmarks.bench_agent_tools import _measure
+from benchmarks.bench_routes import _percentiles
+from benchmarks.fake_ollama import create_fake_ollama
+
+LLM_MODEL = "llama3.1:8b"
+
+
+def _construct(n: int) -> dict:
+    results = {}
+    for name, make in (
+        ("new", lambda url: ChatOllama(model=LLM_MODEL, base_url=url, temperature=0.4)),
+        ("shared", lambda url: get_chat_model(LLM_MODEL, 0.4, url)),
+    ):
+        started = time.perf_counter()
+        for _ in range(n):
+            make("http://127.0.0.1:1")
+        results[name] = round((time.perf_counter() - started) / n * 1e6, 1)
+    print(f"  🏗️  construct  new {results['new']:>8.1f}µs   shared {results['shared']:>6.1f}µs per client")
+    return results
+
+
+async def _scenario(name: str, make, args) -> dict:
+    async def call(i: int):
+        await make().ainvoke(f"question {i}")
+
+    await call(-1)  # warm the fake server and the import paths
+    started = time.perf_counter()
+    latencies = await _measure(call, args.calls, args.concurrency)
+    wall = time.perf_counter() - started
+    result = {"latency": _percentiles(latencies), "calls_per_s": round(args.calls / wall, 1)}
+    print(f"  🔌 {name:<9} p50 {result['latency']['p50']:>7.2f}ms p95 {result['latency']['p95']:>7.2f}ms  "
+          f"{result['calls_per_s']:>7.1f} calls/s")
+    return result
+
+
+async def run_suite(args) -> dict:
+    app = create_fake_ollama([LLM_MODEL], latency_ms=0, ms_per_token=0, reply_tokens=10)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="error"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    url = f"http://127.0.0.1:{args.port}"
+
+    results = {
+        "construct_us": _construct(args.construct),
+        "per_call": await _scenario("per-call", lambda: ChatOllama(model=LLM_MODEL, base_url=url, temperature=0.4), args),
+        "shared": await _scenario("shared", lambda: get_chat_model(LLM_MODEL, 0.4, url), args),
+    }
+    saved = results["per_call"]["latency"]["p50"] - results["shared"]["latency"]["p50"]
+    print(f"  ⏱️  shared clients save {saved:.2f}ms p50 per call")
+
+    await close_llm_clients()
+    server.should_exit = True
+    await asyncio.sleep(0.2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call vs shared Ollama clients.")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--construct", type=int, default=500, help="Clients built for the construction timing")
+    parser.add_argument("--port", type=int, default=11521)
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking LLM clients ({args.calls} calls, concurrency {args.concurrency})")
+    asyncio.run(run_suite(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Healix Ollama Router Benchmark
+Drives concurrent chat and embedding calls through app.ai.ollama_router against
+local fake Ollama servers (benchmarks.fake_ollama) and reports:
+
+- single — every call pinned to one backend (the old OLLAMA_BASE_URL setup)
+- pool   — least-loaded dispatch over all backends, one of them slow, plus one
+  URL with nothing listening (taken out by health probes / circuit breaker)
+- failover — the pool again, with one backend shut down halfway through
+
+No MongoDB or real Ollama needed.
+
+Run from backend/:
+    python -m benchmarks.bench_ollama_router --calls 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import uvicorn
+from langchain_ollama import ChatOllama
+
+from app.ai.ollama_router import Backend, OllamaRouter, RoutedOllamaEmbeddings
+from benchmarks.bench_agent_tools import _measure
+from benchmarks.bench_routes import _percentiles
+from benchmarks.fake_ollama import create_fake_ollama
+
+LLM_MODEL = "llama3.1:8b"
+EMBED_MODEL = "nomic-embed-text"
+
+
+async def _start(port: int, latency_ms: float, parallel: int) -> uvicorn.Server:
+    app = create_fake_ollama([LLM_MODEL, f"{EMBED_MODEL}:latest"], latency_ms=latency_ms, ms_per_token=2,
+                             reply_tokens=30, parallel=parallel)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server
+
+
+async def _scenario(name: str, router: OllamaRouter, args, stop: uvicorn.Server | None = None) -> dict:
+    model = ChatOllama(model=LLM_MODEL, base_url="http://unused", temperature=0.3)
+    embeddings = RoutedOllamaEmbeddings(router, EMBED_MODEL)
+    failed = 0
+
+    async def call(i: int):
+        nonlocal failed
+        if stop is not None and i == args.calls // 2:
+            stop.should_exit = True
+        try:
+            if i % 4 == 3:
+                await embeddings.aembed_query(f"question {i}")
+            else:
+                await router.call_chat(model, lambda m: m.ainvoke(f"question {i}"))
+        except Exception:
+            failed += 1
+
+    async with httpx.AsyncClient(timeout=1) as client:
+        await router.probe(client)
+    started = time.perf_counter()
+    latencies = await _measure(call, args.calls, args.concurrency)
+    wall = time.perf_counter() - started
+
+    result = {"latency": _percentiles(latencies), "failed": failed, "calls_per_s": round(args.calls / wall, 1),
+              "backends": router.stats()}
+    print(f"  🔀 {name:<9} p50 {result['latency']['p50']:>7.1f}ms p95 {result['latency']['p95']:>7.1f}ms  "
+          f"{result['calls_per_s']:>6.1f} calls/s  failed {failed}")
+    for b in result["backends"]:
+        print(f"       {b['url']:<28} {b['state']:<9} requests {b['requests']:>4}  errors {b['errors']:>3}  "
+              f"avg {b['avg_latency_ms']:>7.1f}ms")
+    return result
+
+
+async def run_suite(args) -> dict:
+    ports = [args.base_port + i for i in range(args.backends)]
+    servers = [
+        await _start(port, args.latency_ms * (3 if i == args.backends - 1 else 1), args.parallel)
+        for i, port in enumerate(ports)
+    ]
+    dead = f"http://127.0.0.1:{args.base_port + args.backends}"
+
+    def pool() -> OllamaRouter:
+        return OllamaRouter([Backend(f"http://127.0.0.1:{p}") for p in ports] + [Backend(dead)],
+                            circuit_failures=2, circuit_open_seconds=30)
+
+    results = {
+        "single": await _scenario("single", OllamaRouter([Backend(f"http://127.0.0.1:{ports[0]}")], 2, 30), args),
+        "pool": await _scenario("pool", pool(), args),
+        "failover": await _scenario("failover", pool(), args, stop=servers[0]),
+    }
+    for server in servers:
+        server.should_exit = True
+    await asyncio.sleep(0.2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Ollama pool dispatch against local fake servers.")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--backends", type=int, default=3, help="Fake backends (the last one is 3x slower)")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--parallel", type=int, default=2, help="Concurrent generations per fake backend")
+    parser.add_argument("--base-port", type=int, default=11501)
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking the Ollama router ({args.calls} calls, concurrency {args.concurrency}, {args.backends} fake backends)")
+    asyncio.run(run_suite(args))
+
+
+if __name__ == "__main__":
+    main()
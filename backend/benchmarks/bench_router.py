@@ -0,0 +1,152 @@
+"""
+Healix Agent Router Benchmark
+Routing accuracy and latency of the agent router on a labelled set of English
+and Arabic chat messages (including the ambiguous "weight" cases and messages
+with no keyword at all):
+
+- legacy     — the old detect_agent(): substring scan of every keyword list
+- keywords   — the compiled keyword pattern alone (AGENT_ROUTER_EMBEDDINGS=false)
+- embedding  — keywords, with the embedding classifier for ties / no match
+
+Embeddings come from the offline fake by default (hashed bag-of-words, so the
+fallback is only lexical); pass --ollama to use the configured EMBED_MODEL.
+No MongoDB needed. Exits non-zero when an accuracy falls below --min-accuracy.
+
+Run from backend/:
+    python -m benchmarks.bench_router --repeat 2000
+    python -m benchmarks.bench_router --ollama --verbose
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+# (message, expected agent)
+CASES = [
+    ("How is my heart rate and blood pressure today?", "clinical"),
+    ("I have a headache and feel dizzy since yesterday", "clinical"),
+    ("Is an SpO2 of 93 dangerous?", "clinical"),
+    ("My resting pulse is 110, should I see a doctor?", "clinical"),
+    ("I have had a fever for two days", "clinical"),
+    ("What does my HRV say about my stress?", "clinical"),
+    ("What should I eat for dinner given my nutrition plan?", "nutrition"),
+    ("How many calories are in a banana?", "nutrition"),
+    ("I want to lose weight before summer", "nutrition"),
+    ("Is it ok to skip breakfast?", "nutrition"),
+    ("Which supplements help with vitamin D?", "nutrition"),
+    ("How much water should I drink daily?", "nutrition"),
+    ("Is my workout plan too hard this week?", "exercise"),
+    ("How much weight should I lift for squats?", "exercise"),
+    ("My shoulder hurts during bench press", "exercise"),
+    ("How many sets and reps for bicep curls?", "exercise"),
+    ("Should I add weight training to my routine?", "exercise"),
+    ("Can I go running with knee pain?", "exercise"),
+    ("What is my risk of a cardiac event based on my trends?", "risk"),
+    ("Predict my blood pressure for next month", "risk"),
+    ("What happens if I stop taking my medication? Show scenarios", "risk"),
+    ("How can I prevent diabetes in the future?", "risk"),
+    ("Is my health deteriorating?", "risk"),
+    ("Run a digital twin simulation for me", "risk"),
+    ("I feel great after my session at the gym", "exercise"),
+    ("Is fatigue a symptom of anemia?", "clinical"),
+    ("Is my heart okay?", "clinical"),
+    ("Tips for a better back workout", "exercise"),
+    ("What stretches help with fatigue?", "exercise"),
+    ("Can I train in this heat?", "exercise"),
+    ("Is it normal to wake up with an alarm-like ringing in my ears?", "clinical"),
+    ("I keep getting cramps in my legs at night", "exercise"),
+    ("ما هو معدل نبضي اليوم؟", "clinical"),
+    ("عندي صداع وضغط الدم مرتفع", "clinical"),
+    ("هل درجة الحرارة عندي طبيعية؟", "clinical"),
+    ("ماذا آكل على العشاء؟", "nutrition"),
+    ("كم سعرة حرارية في وجبة الغداء؟", "nutrition"),
+    ("أريد خسارة الوزن بسرعة", "nutrition"),
+    ("هل البروتين مهم للعضلات؟", "nutrition"),
+    ("ما هو أفضل تمرين للكتف؟", "exercise"),
+    ("كيف أبدأ رفع الأثقال؟", "exercise"),
+    ("هل التدريب يوميا مفيد؟", "exercise"),
+    ("ما هو خطر إصابتي بأمراض القلب في المستقبل؟", "risk"),
+    ("توقع حالتي الصحية بعد شهر", "risk"),
+    ("هل هناك تحذير بخصوص صحتي؟", "risk"),
+    ("عدم انتظام الوجبات يتعبني", "nutrition"),
+    ("أشعر بتعب بعد الجري", "exercise"),
+]
+
+
+def _legacy_detect(message: str, keywords: dict) -> str:
+    """The old detect_agent(): lowercase + substring count per agent."""
+    message_lower = message.lower()
+    scores = {agent: sum(1 for kw in words if kw in message_lower) for agent, words in keywords.items()}
+    best_agent = max(scores, key=scores.get)
+    return best_agent if scores[best_agent] > 0 else "clinical"
+
+
+def _report(name: str, predicted: list[str], verbose: bool) -> float:
+    correct = sum(p == expected for p, (_, expected) in zip(predicted, CASES))
+    accuracy = correct / len(CASES)
+    print(f"  🎯 {name:<10} accuracy {accuracy * 100:5.1f}% ({correct}/{len(CASES)})")
+    if verbose:
+        for p, (message, expected) in zip(predicted, CASES):
+            if p != expected:
+                print(f"       ✗ {message!r} → {p} (expected {expected})")
+    return accuracy
+
+
+def _timing(name: str, fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message, _ in CASES:
+            fn(message)
+    us = (time.perf_counter() - started) / (repeat * len(CASES)) * 1e6
+    print(f"  ⏱️  {name:<10} {us:7.2f}µs per message")
+    return us
+
+
+async def run_suite(args) -> dict:
+    from app.config import settings
+
+    if not args.ollama:
+        settings.LLM_PROVIDER = "fake"
+    from app.ai.agent_router import AGENT_KEYWORDS, agent_router
+
+    results = {"accuracy": {}, "latency_us": {}}
+    results["accuracy"]["legacy"] = _report("legacy", [_legacy_detect(m, AGENT_KEYWORDS) for m, _ in CASES], args.verbose)
+
+    settings.AGENT_ROUTER_EMBEDDINGS = False
+    results["accuracy"]["keywords"] = _report("keywords", [await agent_router.route(m) for m, _ in CASES], args.verbose)
+
+    settings.AGENT_ROUTER_EMBEDDINGS = True
+    started = time.perf_counter()
+    predicted = [await agent_router.route(m) for m, _ in CASES]
+    cold_ms = (time.perf_counter() - started) * 1000
+    results["accuracy"]["embedding"] = _report("embedding", predicted, args.verbose)
+    started = time.perf_counter()
+    for m, _ in CASES:
+        await agent_router.route(m)
+    warm_us = (time.perf_counter() - started) / len(CASES) * 1e6
+    print(f"  📊 routed {agent_router.stats()}")
+
+    results["latency_us"]["legacy"] = _timing("legacy", lambda m: _legacy_detect(m, AGENT_KEYWORDS), args.repeat)
+    results["latency_us"]["keywords"] = _timing("keywords", agent_router.keyword_candidates, args.repeat)
+    print(f"  ⏱️  {'embedding':<10} {warm_us:7.2f}µs per message with cached vectors (first pass {cold_ms:.0f}ms total)")
+    results["latency_us"]["embedding_cached"] = warm_us
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent routing accuracy and latency.")
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over the cases for the latency timing")
+    parser.add_argument("--ollama", action="store_true", help="Use the configured Ollama embeddings for the fallback")
+    parser.add_argument("--min-accuracy", type=float, default=0.0, help="Fail when the embedding router scores below this")
+    parser.add_argument("--verbose", action="store_true", help="List misrouted messages")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking agent routing ({len(CASES)} labelled messages)")
+    results = asyncio.run(run_suite(args))
+    if results["accuracy"]["embedding"] < args.min_accuracy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Healix Route Benchmark Suite
+Exercises every read (GET) endpoint registered under /api against a database
+loaded by benchmarks.seed_data, and reports latency percentiles plus MongoDB
+work per request (documents / keys examined, collection scans) taken from the
+database profiler.
+
+Requests go through the real FastAPI stack (auth, validation, serialization)
+via an in-process ASGI transport — no network, no Ollama. Endpoints that call
+the LLM are skipped so the suite runs fully offline.
+
+Run from backend/ after seeding:
+    python -m benchmarks.bench_routes --requests 200 --out bench_main.json
+    python -m benchmarks.bench_routes --requests 200 --compare bench_main.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Endpoints that would reach the LLM — skipped to keep the suite offline
+LLM_ENDPOINTS = {
+    "/api/smart/health-report": "calls the LLM for the AI summary",
+}
+# Values for path parameters of GET routes
+PATH_PARAMS = {
+    "exercise_id": "squat",
+}
+PROFILE_COLLECTION_BYTES = 64 * 1024 * 1024
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def discover_read_endpoints(app) -> list[str]:
+    """Collect every GET path mounted on the app, with path params filled in."""
+    from fastapi.routing import APIRoute
+
+    paths = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods:
+            continue
+        if not route.path.startswith("/api"):
+            continue
+        path = route.path
+        for name, value in PATH_PARAMS.items():
+            path = path.replace("{" + name + "}", value)
+        if "{" in path:
+            print(f"  ⚠️  Skipping {route.path}: no value for path parameter")
+            continue
+        if path not in paths:
+            paths.append(path)
+    return sorted(paths)
+
+
+def _reset_profiler(sync_db):
+    sync_db.command({"profile": 0})
+    sync_db.drop_collection("system.profile")
+    sync_db.create_collection("system.profile", capped=True, size=PROFILE_COLLECTION_BYTES)
+    sync_db.command({"profile": 2})
+
+
+def _profiled_work(sync_db, since: datetime, until: datetime) -> dict:
+    """Aggregate profiler entries recorded between two timestamps."""
+    pipeline = [
+        {"$match": {
+            "ts": {"$gte": since, "$lte": until},
+            "ns": {"$not": {"$regex": r"\.system\."}},
+            "op": {"$in": ["query", "getmore", "command", "update", "remove", "insert"]},
+        }},
+        {"$group": {
+            "_id": None,
+            "ops": {"$sum": 1},
+            "docs_examined": {"$sum": {"$ifNull": ["$docsExamined", 0]}},
+            "keys_examined": {"$sum": {"$ifNull": ["$keysExamined", 0]}},
+            "returned": {"$sum": {"$ifNull": ["$nreturned", 0]}},
+            "collscans": {"$sum": {"$cond": [{"$eq": ["$planSummary", "COLLSCAN"]}, 1, 0]}},
+        }},
+    ]
+    rows = list(sync_db["system.profile"].aggregate(pipeline))
+    return rows[0] if rows else {"ops": 0, "docs_examined": 0, "keys_examined": 0, "returned": 0, "collscans": 0}
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    arr = np.array(samples_ms)
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 2),
+        "p90": round(float(np.percentile(arr, 90)), 2),
+        "p95": round(float(np.percentile(arr, 95)), 2),
+        "p99": round(float(np.percentile(arr, 99)), 2),
+        "max": round(float(arr.max()), 2),
+        "mean": round(float(arr.mean()), 2),
+    }
+
+
+async def run_suite(args) -> dict:
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["DATABASE_NAME"] = args.db
+
+    import httpx
+    from pymongo import MongoClient
+    from main import app
+    from app.auth import create_token
+    from app.database import connect_db, close_db
+
+    await connect_db()
+    sync_client = MongoClient(args.mongodb_url)
+    sync_db = sync_client[args.db]
+
+    users = list(sync_db.users.find({"synthetic": True}, {"_id": 1, "role": 1}).sort("_id", 1))
+    if not users:
+        raise SystemExit(f"No synthetic users in '{args.db}' — run benchmarks.seed_data first")
+    rng = np.random.default_rng(args.seed)
+    sample = [users[i] for i in rng.choice(len(users), size=min(args.sample_users, len(users)), replace=False)]
+    admin = next((u for u in users if u.get("role") == "admin"), None)
+    tokens = [create_token(str(u["_id"]), u.get("role", "user")) for u in sample]
+    admin_token = create_token(str(admin["_id"]), "admin") if admin else None
+
+    endpoints = discover_read_endpoints(app)
+    if args.only:
+        endpoints = [p for p in endpoints if any(sel in p for sel in args.only)]
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in endpoints:
+            if path in LLM_ENDPOINTS:
+                print(f"  ⏭️  {path:<40} skipped ({LLM_ENDPOINTS[path]})")
+                results[path] = {"skipped": LLM_ENDPOINTS[path]}
+                continue
+            needs_admin = path.startswith("/api/admin")
+            if needs_admin and not admin_token:
+                results[path] = {"skipped": "no admin user seeded"}
+                continue
+
+            def headers_for(i: int) -> dict:
+                token = admin_token if needs_admin else tokens[i % len(tokens)]
+                return {"Authorization": f"Bearer {token}"}
+
+            # Warm-up (not profiled) so connection setup and first-plan costs are excluded
+            for i in range(args.warmup):
+                await client.get(path, headers=headers_for(i))
+
+            _reset_profiler(sync_db)
+            latencies, statuses = [], {}
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def one(i: int):
+                async with semaphore:
+                    started = time.perf_counter()
+                    resp = await client.get(path, headers=headers_for(i))
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+            since = datetime.now(timezone.utc)
+            await asyncio.gather(*(one(i) for i in range(args.requests)))
+            until = datetime.now(timezone.utc)
+            sync_db.command({"profile": 0})
+            work = _profiled_work(sync_db, since, until)
+
+            n = max(args.requests, 1)
+            results[path] = {
+                "requests": args.requests,
+                "status_codes": {str(k): v for k, v in statuses.items()},
+                "latency_ms": _percentiles(latencies),
+                "mongo_per_request": {
+                    "ops": round(work["ops"] / n, 2),
+                    "docs_examined": round(work["docs_examined"] / n, 1),
+                    "keys_examined": round(work["keys_examined"] / n, 1),
+                    "returned": round(work["returned"] / n, 1),
+                    "collscans": round(work["collscans"] / n, 2),
+                },
+            }
+            lat = results[path]["latency_ms"]
+            mongo = results[path]["mongo_per_request"]
+            print(f"  ✅ {path:<40} p50 {lat['p50']:>8.2f}ms  p95 {lat['p95']:>8.2f}ms  "
+                  f"p99 {lat['p99']:>8.2f}ms  docs/req {mongo['docs_examined']:>10.1f}  "
+                  f"collscans/req {mongo['collscans']:.2f}")
+
+    collection_counts = {name: sync_db[name].estimated_document_count()
+                         for name in ("users", "vitals", "medications", "nutrition_logs",
+                                      "exercise_logs", "health_journal")}
+    sync_client.close()
+    await close_db()
+
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "run_at": datetime.now(timezone.utc).isoformat(),
+            "db": args.db,
+            "users_in_db": len(users),
+            "sampled_users": len(sample),
+            "requests_per_endpoint": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "collection_counts": collection_counts,
+        },
+        "endpoints": results,
+    }
+
+
+def print_comparison(current: dict, baseline: dict):
+    """Print per-endpoint deltas against a previous run's JSON output."""
+    base_commit = baseline.get("meta", {}).get("git_commit", "?")
+    print(f"\n📊 Compared with {base_commit}:")
+    for path, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(path)
+        if "skipped" in now or not before or "skipped" in before:
+            continue
+
+        def pct(a, b):
+            return f"{(a - b) / b * 100:+.1f}%" if b else "n/a"
+
+        print(f"  {path:<40} p50 {pct(now['latency_ms']['p50'], before['latency_ms']['p50']):>8}  "
+              f"p95 {pct(now['latency_ms']['p95'], before['latency_ms']['p95']):>8}  "
+              f"docs/req {pct(now['mongo_per_request']['docs_examined'], before['mongo_per_request']['docs_examined']):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Healix read endpoints against a seeded MongoDB.")
+    parser.add_argument("--mongodb-url", default=os.getenv("BENCH_MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("BENCH_DATABASE_NAME", "healix_bench"))
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--sample-users", type=int, default=50, help="Distinct users the requests rotate through")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="Substrings selecting a subset of endpoints")
+    parser.add_argument("--out", help="Write results as JSON (for comparing commits)")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmarking read endpoints on '{args.db}' ({args.requests} req/endpoint, concurrency {args.concurrency})")
+    results = asyncio.run(run_suite(args))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Healix Agent Tool Output Benchmark
+Size and build time of the text the vitals / nutrition plan / exercise plan
+tools return to the model, on representative documents:
+
+- legacy   — the old formatting: banner line with the user profile, one
+             "Label: value" line per field, nested lines per food / exercise field
+- compact  — the schema-driven formatting of app.ai.tool_format
+- memo     — a compact output served from the per-user memo (data unchanged)
+
+Tokens are estimated like the context window does (~4 characters per token).
+No MongoDB or LLM needed.
+
+Run from backend/:
+    python -m benchmarks.bench_tool_format --repeat 20000
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+PROFILE = "Name: Sara, Age: 34, Gender: female, Weight: 68kg, Height: 165cm, Conditions: hypertension"
+
+VITALS = {
+    "_id": "6710a1f0c2d4e5f6a7b8c9d0",
+    "heart_rate": 78, "spo2": 97.6, "blood_pressure_sys": 132, "blood_pressure_dia": 86,
+    "stress_level": 42, "hrv": 48.3, "body_temp": 36.8, "steps": 6240, "calories_burned": 412.5,
+    "sleep_hours": 6.5, "sleep_quality": 74,
+    "timestamp": datetime(2026, 10, 19, 8, 30, 12, 431000, tzinfo=timezone.utc),
+}
+
+
+def _food(name, name_ar, calories, protein):
+    return {"name": name, "name_ar": name_ar, "calories": calories, "protein": protein}
+
+
+NUTRITION_PLAN = {
+    "_id": "6710a1f0c2d4e5f6a7b8c9d1",
+    "daily_calories_target": 1900, "water_target_liters": 2.5,
+    "macros": {"protein": 120, "carbs": 210, "fat": 60},
+    "meals": [
+        {"type": "breakfast", "time": "08:00", "foods": [
+            _food("Oatmeal", "شوفان", 300, 10), _food("Boiled eggs", "بيض مسلوق", 155, 13), _food("Banana", "موز", 105, 1.3)]},
+        {"type": "lunch", "time": "13:30", "foods": [
+            _food("Grilled chicken", "دجاج مشوي", 330, 62), _food("Brown rice", "أرز بني", 215, 5), _food("Green salad", "سلطة خضراء", 60, 2)]},
+        {"type": "snack", "time": "17:00", "foods": [_food("Greek yogurt", "زبادي يوناني", 130, 11), _food("Almonds", "لوز", 160, 6)]},
+        {"type": "dinner", "time": "20:00", "foods": [
+            _food("Baked salmon", "سلمون مشوي", 350, 34), _food("Steamed vegetables", "خضار مطهوة", 90, 4)]},
+    ],
+}
+
+
+def _exercise(name, name_ar, sets, reps, rest, muscle, tips, tips_en, alternatives):
+    return {
+        "name": name, "name_ar": name_ar, "warmup_sets": 2, "sets": sets, "reps": reps, "rest_seconds": rest,
+        "muscle_group": muscle, "tips": tips, "tips_en": tips_en, "alternatives": alternatives,
+    }
+
+
+EXERCISE_PLAN = {
+    "_id": "6710a1f0c2d4e5f6a7b8c9d2",
+    "user_level": "intermediate", "safe_load_index": 72,
+    "exercises": [
+        _exercise("Goblet Squat", "سكوات الكأس", 3, 10, 90, "legs", "حافظ على استقامة الظهر", "Keep your back straight", ["Leg Press", "Box Squat"]),
+        _exercise("Dumbbell Bench Press", "ضغط الصدر بالدمبل", 3, 10, 90, "chest", "لا تقفل المرفقين", "Do not lock your elbows", ["Push-up"]),
+        _exercise("Seated Cable Row", "تجديف بالكابل", 3, 12, 75, "back", "اسحب بلوحي الكتف", "Pull with your shoulder blades", ["Dumbbell Row"]),
+        _exercise("Shoulder Press", "ضغط الكتف", 3, 10, 90, "shoulders", "لا تقوس أسفل الظهر", "Do not arch your lower back", ["Landmine Press"]),
+        _exercise("Plank", "بلانك", 3, 1, 60, "core", "شد عضلات البطن", "Brace your core", ["Dead Bug"]),
+    ],
+}
+
+
+# ── The old tool formatting (before app.ai.tool_format) ──
+def _legacy_vitals(v: dict) -> str:
+    parts = [f"=== Real-Time Vitals for {PROFILE} ==="]
+    if v.get("heart_rate"):       parts.append(f"Heart Rate: {v['heart_rate']} bpm")
+    if v.get("spo2"):             parts.append(f"SpO2: {v['spo2']}%")
+    if v.get("blood_pressure_sys"):
+        parts.append(f"Blood Pressure: {v['blood_pressure_sys']}/{v.get('blood_pressure_dia', '?')} mmHg")
+    if v.get("stress_level"):     parts.append(f"Stress Level: {v['stress_level']}/100")
+    if v.get("hrv"):              parts.append(f"HRV: {v['hrv']} ms")
+    if v.get("body_temp"):        parts.append(f"Body Temp: {v['body_temp']}°C")
+    if v.get("steps"):            parts.append(f"Steps Today: {v['steps']}")
+    if v.get("calories_burned"):  parts.append(f"Calories Burned: {v['calories_burned']} kcal")
+    if v.get("sleep_hours"):
+        parts.append(f"Sleep: {v['sleep_hours']}h (Quality: {v.get('sleep_quality', '?')}%)")
+    if v.get("timestamp"):        parts.append(f"Recorded: {v['timestamp']}")
+    return "\n".join(parts)
+
+
+def _legacy_nutrition_plan(plan: dict) -> str:
+    parts = [f"=== Nutrition Plan for {PROFILE} ==="]
+    parts.append(f"Daily Target: {plan.get('daily_calories_target', '?')} kcal")
+    m = plan.get("macros", {})
+    parts.append(f"Macros: {m.get('protein', '?')}g Protein | {m.get('carbs', '?')}g Carbs | {m.get('fat', '?')}g Fat")
+    parts.append(f"Water Target: {plan.get('water_target_liters', '?')}L/day")
+    for meal in plan.get("meals", []):
+        parts.append(f"\n{meal.get('type', 'Meal').upper()} ({meal.get('time', '')}):")
+        for food in meal.get("foods", []):
+            parts.append(f"  - {food.get('name', '')} ({food.get('name_ar', '')}): {food.get('calories', 0)} kcal, {food.get('protein', 0)}g protein")
+    return "\n".join(parts)
+
+
+def _legacy_exercise_plan(plan: dict) -> str:
+    parts = [f"=== Exercise Plan for {PROFILE} ==="]
+    parts.append(f"Level: {plan.get('user_level', '?')} | Safe Load Index: {plan.get('safe_load_index', '?')}%")
+    for i, ex in enumerate(plan.get("exercises", []), 1):
+        parts.append(f"\n{i}. {ex.get('name', '')} ({ex.get('name_ar', '')})")
+        parts.append(f"   Sets: {ex.get('warmup_sets', 0)} warmup + {ex.get('sets', 0)} working x {ex.get('reps', 0)} reps")
+        parts.append(f"   Rest: {ex.get('rest_seconds', 60)}s | Muscle: {ex.get('muscle_group', '')}")
+        if ex.get("tips"):         parts.append(f"   Tips (AR): {ex['tips']}")
+        if ex.get("tips_en"):      parts.append(f"   Tips (EN): {ex['tips_en']}")
+        if ex.get("alternatives"): parts.append(f"   Alternatives: {', '.join(ex['alternatives'])}")
+    return "\n".join(parts)
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def run_suite(args) -> dict:
+    from app.ai.context_window import estimate_tokens
+    from app.ai.tool_format import (
+        ToolOutputCache, format_exercise_plan, format_nutrition_plan, format_vitals,
+    )
+
+    cases = [
+        ("lookup_vitals", VITALS, _legacy_vitals, format_vitals),
+        ("get_nutrition_plan", NUTRITION_PLAN, _legacy_nutrition_plan, format_nutrition_plan),
+        ("get_exercise_plan", EXERCISE_PLAN, _legacy_exercise_plan, format_exercise_plan),
+    ]
+    memo = ToolOutputCache(16)
+    results = {}
+    totals = {"legacy": 0, "compact": 0}
+    for tool, doc, legacy, compact in cases:
+        old, new = legacy(doc), compact(doc)
+        version = (doc["_id"],)
+        memo.put("bench", tool, version, new)
+        old_tokens, new_tokens = estimate_tokens(old), estimate_tokens(new)
+        totals["legacy"] += old_tokens
+        totals["compact"] += new_tokens
+        timings = {
+            "legacy": _per_call_us(lambda: legacy(doc), args.repeat),
+            "compact": _per_call_us(lambda: compact(doc), args.repeat),
+            "memo": _per_call_us(lambda: memo.get("bench", tool, version), args.repeat),
+        }
+        results[tool] = {"tokens": {"legacy": old_tokens, "compact": new_tokens}, "build_us": timings}
+        print(f"\n  🔧 {tool}")
+        print(f"     📏 tokens {old_tokens:4d} → {new_tokens:4d} ({(1 - new_tokens / old_tokens) * 100:.0f}% fewer), "
+              f"chars {len(old)} → {len(new)}")
+        print("     ⏱️  " + "  ".join(f"{name} {us:6.2f}µs" for name, us in timings.items()))
+        if args.show:
+            print("     " + new.replace("\n", "\n     "))
+
+    saved = (1 - totals["compact"] / totals["legacy"]) * 100
+    print(f"\n  📊 all three tools: {totals['legacy']} → {totals['compact']} tokens ({saved:.0f}% fewer)")
+    results["totals"] = totals
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent tool output size and build time.")
+    parser.add_argument("--repeat", type=int, default=20000, help="Calls per formatter for the timing")
+    parser.add_argument("--show", action="store_true", help="Print the compact outputs")
+    args = parser.parse_args()
+
+    print("🏁 Benchmarking agent tool output formatting")
+    run_suite(args)
+
+
+if __name__ == "__main__":
+    main()
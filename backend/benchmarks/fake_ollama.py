@@ -0,0 +1,191 @@
+"""
+Healix Fake Ollama Server
+Minimal stand-in for the Ollama HTTP API, for exercising the Ollama router and
+the LLM paths locally without a GPU:
+
+- GET  /api/tags  — the models this fake "has pulled"
+- POST /api/chat  — deterministic reply, streamed as NDJSON (or one JSON object)
+- POST /api/embed — deterministic hashed bag-of-words vectors
+- POST /api/generate — without a prompt: load the model (the warm pool's preload)
+- GET  /api/ps    — loaded models and when their keep-alive expires
+- GET  /fake/stats — requests served, for checking how the router spread load
+
+Latency is fixed per server (--latency-ms plus --ms-per-token while streaming),
+--parallel caps concurrent generations like OLLAMA_NUM_PARALLEL (the rest
+queue), and --fail-rate makes a share of calls answer 500. With --load-ms the
+first call to a model that is not loaded (or whose keep-alive ran out, 300s
+unless the request says otherwise) pays that load time first, like Ollama.
+
+Run from backend/ — one process can serve several ports:
+    python -m benchmarks.fake_ollama --ports 11501 11502 --latency-ms 300
+    OLLAMA_BACKENDS="http://localhost:11501,http://localhost:11502" uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.ai.fake_llm import hashed_embedding
+
+
+def create_fake_ollama(models: list[str], latency_ms: float = 200.0, ms_per_token: float = 5.0,
+                       reply_tokens: int = 40, fail_rate: float = 0.0, parallel: int = 0, seed: int = 0,
+                       load_ms: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+    rng = random.Random(seed)
+    slots = asyncio.Semaphore(parallel) if parallel else None
+    stats = {"chat": 0, "embed": 0, "tags": 0, "loads": 0, "failed": 0, "aborted": 0, "in_flight": 0, "max_in_flight": 0}
+    loaded: dict[str, float] = {}  # model → keep-alive expiry (epoch seconds)
+    loading: dict[str, asyncio.Lock] = {}
+
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    async def _load(model: str, keep_alive):
+        """Load the model unless it is still loaded, then restart its keep-alive."""
+        async with loading.setdefault(model, asyncio.Lock()):
+            if loaded.get(model, 0) < time.time():
+                stats["loads"] += 1
+                await asyncio.sleep(load_ms / 1000)
+        seconds = keep_alive if isinstance(keep_alive, (int, float)) else 300
+        loaded[model] = time.time() + seconds if seconds >= 0 else float("inf")
+
+    async def _begin():
+        """Wait for a generation slot and the fixed latency; returns an error response on a simulated failure."""
+        if slots:
+            await slots.acquire()
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        await asyncio.sleep(latency_ms / 1000)
+        if fail_rate and rng.random() < fail_rate:
+            stats["failed"] += 1
+            _end()
+            return JSONResponse({"error": "fake failure"}, status_code=500)
+        return None
+
+    def _end():
+        stats["in_flight"] -= 1
+        if slots:
+            slots.release()
+
+    @app.get("/api/tags")
+    async def tags():
+        stats["tags"] += 1
+        return {"models": [{"name": m, "model": m, "modified_at": _now(), "size": 0, "digest": ""} for m in models]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        stats["chat"] += 1
+        await _load(body.get("model"), body.get("keep_alive"))
+        failure = await _begin()
+        if failure:
+            return failure
+
+        last = next((m.get("content", "") for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+        words = [f"w{i}" for i in range(reply_tokens - 1)] + [f"({len(last)})"]
+        model = body.get("model")
+
+        def chunk(content: str, done: bool) -> str:
+            payload = {"model": model, "created_at": _now(), "message": {"role": "assistant", "content": content}, "done": done}
+            if done:
+                payload.update(done_reason="stop", prompt_eval_count=len(last) // 4, eval_count=reply_tokens)
+            return json.dumps(payload) + "\n"
+
+        if not body.get("stream", True):
+            await asyncio.sleep(ms_per_token * reply_tokens / 1000)
+            _end()
+            return json.loads(chunk(" ".join(words), True))
+
+        async def stream():
+            finished = False
+            try:
+                for word in words:
+                    await asyncio.sleep(ms_per_token / 1000)
+                    yield chunk(word + " ", False)
+                yield chunk("", True)
+                finished = True
+            finally:
+                if not finished:
+                    stats["aborted"] += 1  # client went away mid-generation
+                _end()
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        stats["embed"] += 1
+        await _load(body.get("model"), body.get("keep_alive"))
+        failure = await _begin()
+        if failure:
+            return failure
+        _end()
+        inputs = body.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        return {"model": body.get("model"), "embeddings": [hashed_embedding(t) for t in inputs]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        await _load(body.get("model"), body.get("keep_alive"))
+        return {"model": body.get("model"), "created_at": _now(), "response": "", "done": True, "done_reason": "load"}
+
+    @app.get("/api/ps")
+    async def ps():
+        now = time.time()
+        return {"models": [
+            {"name": m, "model": m, "size": 0, "size_vram": 0,
+             "expires_at": datetime.fromtimestamp(min(expiry, now + 10 * 365 * 86400), timezone.utc).isoformat()}
+            for m, expiry in loaded.items() if expiry >= now
+        ]}
+
+    @app.get("/fake/stats")
+    async def fake_stats():
+        return stats
+
+    app.state.stats = stats
+    return app
+
+
+async def serve(port: int, **kwargs):
+    """Run one fake server on localhost:port until cancelled."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_fake_ollama(**kwargs), host="127.0.0.1", port=port, log_level="warning"))
+    await server.serve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama HTTP servers for local testing.")
+    parser.add_argument("--ports", type=int, nargs="+", default=[11501])
+    parser.add_argument("--models", nargs="+", default=["llama3.1:8b", "nomic-embed-text:latest"])
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--ms-per-token", type=float, default=5.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, default=0, help="Concurrent generations per server (0 = unlimited)")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="Time to load a model that is not loaded")
+    args = parser.parse_args()
+
+    print(f"🧪 Fake Ollama on ports {args.ports} serving {args.models}")
+
+    async def run():
+        await asyncio.gather(*(
+            serve(port, models=args.models, latency_ms=args.latency_ms, ms_per_token=args.ms_per_token,
+                  reply_tokens=args.reply_tokens, fail_rate=args.fail_rate, parallel=args.parallel, seed=port,
+                  load_ms=args.load_ms)
+            for port in args.ports
+        ))
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+Healix Synthetic Data Generator
+Bulk-loads realistic users, vitals, medications, meal logs, exercise logs and
+journal entries into a local mongod for benchmarking.
+
+Vital sign distributions are seeded from ../sample_vitals.json (a real day of
+hourly watch readings): each synthetic user gets a personal baseline offset
+around that daily curve plus per-sample noise. Every user is generated from its
+own RNG stream derived from --seed, so the same flags always produce the same
+data regardless of --workers.
+
+Run from backend/:
+    python -m benchmarks.seed_data --users 1000 --days 30 --interval 5 --drop
+    python -m benchmarks.seed_data --users 10000 --days 365 --interval 1 --workers 8 --drop
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import numpy as np
+from bson import ObjectId
+from pymongo import MongoClient, InsertOne
+
+SAMPLE_VITALS_PATH = Path(__file__).resolve().parents[2] / "sample_vitals.json"
+BENCH_PASSWORD = "healix-bench"
+BATCH_SIZE = 10_000
+
+VITAL_FIELDS = [
+    "heart_rate", "spo2", "stress_level", "blood_pressure_sys",
+    "blood_pressure_dia", "hrv", "body_temp",
+]
+CUMULATIVE_FIELDS = ["steps", "calories_burned"]
+
+# Per-user baseline spread (std of the offset added to the whole daily curve)
+BASELINE_SPREAD = {
+    "heart_rate": 7.0, "spo2": 0.8, "stress_level": 1.2, "blood_pressure_sys": 9.0,
+    "blood_pressure_dia": 6.0, "hrv": 8.0, "body_temp": 0.15,
+}
+# Hard clamps so noise never produces physiologically impossible values
+CLAMPS = {
+    "heart_rate": (38, 190), "spo2": (85.0, 100.0), "stress_level": (0, 10),
+    "blood_pressure_sys": (85, 200), "blood_pressure_dia": (50, 130),
+    "hrv": (8, 120), "body_temp": (35.5, 39.5),
+}
+INTEGER_FIELDS = {"heart_rate", "stress_level", "blood_pressure_sys", "blood_pressure_dia", "steps"}
+
+FIRST_NAMES = ["Ahmed", "Sara", "Omar", "Fatima", "Khaled", "Layla", "Youssef", "Mona", "Ali", "Nour",
+               "Hassan", "Mariam", "Tarek", "Huda", "Karim", "Salma", "Ziad", "Reem", "Amr", "Dina"]
+LAST_INITIALS = "ABCDEFGHIJKLMNOPRSTWYZ"
+CONDITIONS = ["hypertension", "diabetes", "asthma", "knee injury", "back pain", "heart disease", "obesity"]
+ALLERGIES = ["penicillin", "peanuts", "lactose", "gluten", "shellfish"]
+GOALS = ["weight_loss", "muscle_gain", "endurance", "flexibility", "general_health"]
+DIETS = ["balanced", "keto", "vegetarian", "mediterranean", "high_protein"]
+MEDICATIONS = [
+    ("Metformin", "500mg", "twice daily"), ("Lisinopril", "10mg", "once daily"),
+    ("Atorvastatin", "20mg", "once daily"), ("Amlodipine", "5mg", "once daily"),
+    ("Salbutamol", "100mcg", "as needed"), ("Vitamin D", "2000 IU", "once daily"),
+    ("Omega-3", "1g", "once daily"), ("Aspirin", "81mg", "once daily"),
+]
+MED_STATUSES = ["taken", "missed", "upcoming", "late"]
+MED_STATUS_P = [0.72, 0.1, 0.12, 0.06]
+FOODS = [
+    ("Oatmeal", "شوفان", 150, 5, 27, 3), ("Scrambled Eggs (3)", "بيض مخفوق (3)", 210, 18, 2, 14),
+    ("Grilled Chicken (200g)", "دجاج مشوي (200 جم)", 330, 62, 0, 7), ("Brown Rice", "أرز بني", 215, 5, 45, 2),
+    ("Mixed Salad", "سلطة مشكلة", 50, 2, 10, 1), ("Salmon Fillet (180g)", "سلمون فيليه (180 جم)", 350, 40, 0, 20),
+    ("Banana", "موز", 105, 1, 27, 0), ("Greek Yogurt", "زبادي يوناني", 130, 17, 6, 4),
+    ("Dates (3 pieces)", "تمر (3 حبات)", 70, 1, 18, 0), ("Hummus", "حمص", 180, 8, 20, 9),
+    ("Lentil Soup", "شوربة عدس", 230, 18, 40, 1), ("Sweet Potato", "بطاطا حلوة", 180, 4, 41, 0),
+]
+MEAL_TYPES = [("breakfast", "الفطور", "07:30"), ("lunch", "الغداء", "13:00"),
+              ("snack", "سناك", "16:30"), ("dinner", "العشاء", "20:00")]
+EXERCISES = [
+    ("Machine Shoulder Press", "مكينة كتف أمامي ضغط"), ("Chest Press Machine", "مكينة ضغط صدر"),
+    ("Hack Squat", "هاك سكوات"), ("Machine Lateral Raises", "رفرفة جانبية بالمكينة"),
+    ("Lat Pulldown", "سحب علوي"), ("Leg Press", "ليج بريس"), ("Treadmill Walk", "مشي على السير"),
+]
+MOODS = ["great", "good", "neutral", "tired", "stressed", "sad"]
+THEMES = ["sleep", "nutrition", "exercise", "stress", "pain", "medication", "energy", "mental health"]
+JOURNAL_SNIPPETS = [
+    "Slept badly and felt tired all morning.", "Great workout today, energy was high.",
+    "Busy day at work, a bit stressed.", "Knee felt sore after the leg session.",
+    "Stuck to the meal plan all day.", "Forgot my evening medication again.",
+]
+
+
+# ══════════════════════════════════════════════════════════
+#  DISTRIBUTIONS — derived from sample_vitals.json
+# ══════════════════════════════════════════════════════════
+
+def load_vitals_profile(path: Path = SAMPLE_VITALS_PATH) -> dict:
+    """
+    Turn the hourly sample day into a per-minute daily curve (1440 points) for
+    every vital field, plus the residual noise std used for per-sample jitter.
+    """
+    with open(path, encoding="utf-8") as f:
+        rows = json.load(f)["data"]
+
+    hours = np.array([datetime.fromisoformat(r["timestamp"].replace("Z", "+00:00")).hour for r in rows], dtype=float)
+    # Close the loop across midnight: hours before the first reading mirror the last (night) reading
+    anchor_hours = np.concatenate([[hours[-1] - 24], hours, [hours[0] + 24]])
+    minutes = np.arange(1440) / 60.0
+
+    curves, noise = {}, {}
+    for field in VITAL_FIELDS + CUMULATIVE_FIELDS:
+        values = np.array([float(r[field]) for r in rows])
+        if field in CUMULATIVE_FIELDS:
+            # Cumulative counters reset at midnight and are flat overnight
+            curve = np.interp(minutes, anchor_hours, np.concatenate([[0.0], values, [values[-1]]]))
+            curve[minutes < hours[0]] = 0.0
+        else:
+            curve = np.interp(minutes, anchor_hours, np.concatenate([[values[-1]], values, [values[0]]]))
+        curves[field] = curve
+        # Hour-to-hour residual gives a realistic scale for minute-level jitter
+        noise[field] = float(np.std(np.diff(values))) / 2 if len(values) > 2 else 1.0
+
+    sleep = [r for r in rows if r.get("sleep_hours")]
+    return {
+        "curves": curves,
+        "noise": noise,
+        "sleep_hours": float(np.mean([r["sleep_hours"] for r in sleep])) if sleep else 7.0,
+        "sleep_quality": float(np.mean([r["sleep_quality"] for r in sleep])) if sleep else 80.0,
+    }
+
+
+def user_object_id(seed: int, index: int) -> ObjectId:
+    """Deterministic ObjectId so user ids are stable across repeated runs."""
+    digest = hashlib.sha1(f"healix-bench:{seed}:{index}".encode()).digest()
+    return ObjectId(digest[:12])
+
+
+def user_rng(seed: int, index: int) -> np.random.Generator:
+    return np.random.default_rng([seed, index])
+
+
+# ══════════════════════════════════════════════════════════
+#  DOCUMENT BUILDERS
+# ══════════════════════════════════════════════════════════
+
+def build_user(index: int, seed: int, rng: np.random.Generator, password_hash: str, now: datetime) -> dict:
+    gender = "male" if rng.random() < 0.5 else "female"
+    height = float(np.round(rng.normal(176 if gender == "male" else 163, 7), 1))
+    bmi = float(np.clip(rng.normal(26, 4), 17, 42))
+    n_conditions = int(rng.choice([0, 0, 0, 1, 1, 2, 3]))
+    return {
+        "_id": user_object_id(seed, index),
+        "name": f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {LAST_INITIALS[index % len(LAST_INITIALS)]}.",
+        "email": f"bench{index:06d}@healix.local",
+        "password": password_hash,
+        "role": "admin" if index == 0 else "user",
+        "onboarding_completed": True,
+        "age": int(np.clip(rng.normal(42, 14), 18, 85)),
+        "gender": gender,
+        "height": height,
+        "weight": round(bmi * (height / 100) ** 2, 1),
+        "medical_conditions": [str(c) for c in rng.choice(CONDITIONS, size=n_conditions, replace=False)],
+        "allergies": [str(rng.choice(ALLERGIES))] if rng.random() < 0.2 else [],
+        "blood_type": str(rng.choice(["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"])),
+        "fitness_level": str(rng.choice(["beginner", "intermediate", "advanced"], p=[0.4, 0.45, 0.15])),
+        "fitness_goals": [str(g) for g in rng.choice(GOALS, size=2, replace=False)],
+        "diet_type": str(rng.choice(DIETS)),
+        "risk_level": int(np.clip(rng.normal(35, 18), 1, 99)),
+        "synthetic": True,
+        "created_at": now - timedelta(days=int(rng.integers(30, 720))),
+        "updated_at": now - timedelta(days=int(rng.integers(0, 30))),
+    }
+
+
+def iter_vitals(user_id: str, rng: np.random.Generator, profile: dict, start: datetime, days: int, interval: int):
+    """Yield vitals documents for one user, one day at a time (vectorised per day)."""
+    curves, noise = profile["curves"], profile["noise"]
+    offsets = {f: rng.normal(0, BASELINE_SPREAD[f]) for f in VITAL_FIELDS}
+    activity = float(np.clip(rng.normal(1.0, 0.35), 0.2, 2.5))
+    slots = np.arange(0, 1440, interval)
+    wake_slot = int(slots[slots >= 360][0])
+
+    for day in range(days):
+        day_start = start + timedelta(days=day)
+        day_activity = activity * float(np.clip(rng.normal(1.0, 0.2), 0.3, 1.8))
+        columns = {}
+        for field in VITAL_FIELDS:
+            values = curves[field][slots] + offsets[field] + rng.normal(0, noise[field], len(slots))
+            lo, hi = CLAMPS[field]
+            columns[field] = np.clip(values, lo, hi)
+        for field in CUMULATIVE_FIELDS:
+            columns[field] = curves[field][slots] * day_activity
+
+        for i, minute in enumerate(slots):
+            doc = {"user_id": user_id, "timestamp": day_start + timedelta(minutes=int(minute))}
+            for field, col in columns.items():
+                v = col[i]
+                doc[field] = int(round(v)) if field in INTEGER_FIELDS else round(float(v), 1)
+            if minute == wake_slot:
+                # One sleep summary per day at wake-up
+                doc["sleep_hours"] = round(float(np.clip(rng.normal(profile["sleep_hours"], 1.1), 3, 11)), 1)
+                doc["sleep_quality"] = int(np.clip(rng.normal(profile["sleep_quality"], 10), 20, 100))
+            yield doc
+
+
+def build_medications(user_id: str, rng: np.random.Generator, now: datetime) -> list[dict]:
+    docs = []
+    for idx in rng.choice(len(MEDICATIONS), size=int(rng.integers(0, 5)), replace=False):
+        name, dosage, frequency = MEDICATIONS[idx]
+        status = str(rng.choice(MED_STATUSES, p=MED_STATUS_P))
+        doc = {
+            "user_id": user_id, "name": name, "dosage": dosage, "frequency": frequency,
+            "time": f"{int(rng.integers(6, 23)):02d}:00", "status": status, "color": "#06b6d4",
+            "created_at": now - timedelta(days=int(rng.integers(1, 365))),
+        }
+        if status == "taken":
+            doc["taken_at"] = now - timedelta(hours=int(rng.integers(1, 20)))
+        docs.append(doc)
+    return docs
+
+
+def iter_meal_logs(user_id: str, rng: np.random.Generator, start: datetime, days: int):
+    for day in range(days):
+        day_start = start + timedelta(days=day)
+        for meal_type, meal_type_ar, at in MEAL_TYPES:
+            if rng.random() > 0.8:
+                continue
+            hh, mm = map(int, at.split(":"))
+            foods = []
+            for idx in rng.choice(len(FOODS), size=int(rng.integers(1, 4)), replace=False):
+                name, name_ar, cal, p, c, f = FOODS[idx]
+                foods.append({"name": name, "name_ar": name_ar, "calories": cal, "protein": p, "carbs": c, "fat": f})
+            created = day_start + timedelta(hours=hh, minutes=mm + int(rng.integers(0, 45)))
+            yield {
+                "user_id": user_id, "meal_type": meal_type, "meal_type_ar": meal_type_ar,
+                "foods": foods, "time": at, "date": created.strftime("%Y-%m-%d"), "created_at": created,
+            }
+
+
+def iter_exercise_logs(user_id: str, rng: np.random.Generator, start: datetime, days: int):
+    sessions_per_week = float(np.clip(rng.normal(3, 1.5), 0, 6))
+    for day in range(days):
+        if rng.random() > sessions_per_week / 7:
+            continue
+        created = start + timedelta(days=day, hours=int(rng.integers(6, 21)))
+        for idx in rng.choice(len(EXERCISES), size=int(rng.integers(3, 6)), replace=False):
+            name, name_ar = EXERCISES[idx]
+            yield {
+                "user_id": user_id, "exercise_name": name, "exercise_name_ar": name_ar,
+                "sets": int(rng.integers(2, 5)), "reps": int(rng.integers(6, 15)),
+                "weight_kg": round(float(rng.uniform(10, 100)), 1),
+                "duration_minutes": round(float(rng.uniform(5, 20)), 1),
+                "calories_burned": round(float(rng.uniform(30, 150)), 1),
+                "completed": bool(rng.random() < 0.85), "created_at": created,
+            }
+
+
+def iter_journal_entries(user_id: str, rng: np.random.Generator, start: datetime, days: int):
+    for day in range(days):
+        if rng.random() > 0.3:
+            continue
+        mood = str(rng.choice(MOODS))
+        yield {
+            "user_id": user_id, "content": str(rng.choice(JOURNAL_SNIPPETS)), "mood": mood,
+            "energy_level": int(rng.integers(1, 11)), "pain_level": int(rng.integers(0, 6)),
+            "tags": [str(t) for t in rng.choice(THEMES, size=2, replace=False)],
+            "ai_analysis": {
+                "sentiment": "negative" if mood in ("stressed", "sad", "tired") else "positive",
+                "key_themes": [str(t) for t in rng.choice(THEMES, size=2, replace=False)],
+                "health_insights": "Synthetic benchmark entry.",
+                "suggestion": "Keep journaling regularly.",
+                "mood_analysis": f"Mood: {mood}.",
+            },
+            "created_at": start + timedelta(days=day, hours=int(rng.integers(7, 23))),
+        }
+
+
+# ══════════════════════════════════════════════════════════
+#  LOADER
+# ══════════════════════════════════════════════════════════
+
+def _flush(db, collection: str, batch: list, counts: dict):
+    if batch:
+        db[collection].bulk_write([InsertOne(d) for d in batch], ordered=False)
+        counts[collection] = counts.get(collection, 0) + len(batch)
+        batch.clear()
+
+
+def _load_users(args_tuple) -> dict:
+    """Worker entry point: generate and insert every collection for a shard of users."""
+    mongodb_url, db_name, seed, indices, days, interval, end_iso, password_hash = args_tuple
+    end = datetime.fromisoformat(end_iso)
+    start = end - timedelta(days=days)
+    profile = load_vitals_profile()
+    client = MongoClient(mongodb_url)
+    db = client[db_name]
+    counts: dict = {}
+    batches = {"users": [], "vitals": [], "medications": [], "nutrition_logs": [],
+               "exercise_logs": [], "health_journal": []}
+
+    def add(collection, doc):
+        batch = batches[collection]
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            _flush(db, collection, batch, counts)
+
+    for index in indices:
+        rng = user_rng(seed, index)
+        user = build_user(index, seed, rng, password_hash, end)
+        user_id = str(user["_id"])
+        add("users", user)
+        for doc in iter_vitals(user_id, rng, profile, start, days, interval):
+            add("vitals", doc)
+        for doc in build_medications(user_id, rng, end):
+            add("medications", doc)
+        for doc in iter_meal_logs(user_id, rng, start, days):
+            add("nutrition_logs", doc)
+        for doc in iter_exercise_logs(user_id, rng, start, days):
+            add("exercise_logs", doc)
+        for doc in iter_journal_entries(user_id, rng, start, days):
+            add("health_journal", doc)
+
+    for collection, batch in batches.items():
+        _flush(db, collection, batch, counts)
+    client.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load synthetic Healix data into a local MongoDB.")
+    parser.add_argument("--mongodb-url", default=os.getenv("BENCH_MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("BENCH_DATABASE_NAME", "healix_bench"))
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--interval", type=int, default=5, help="Minutes between vitals samples (1 = per-minute)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", default=None, help="ISO date the data ends at (default: today 00:00 UTC)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--drop", action="store_true", help="Drop the target database first")
+    args = parser.parse_args()
+
+    if args.db == "healix" and args.drop:
+        parser.error("refusing to drop the application database 'healix' — use a dedicated benchmark db")
+
+    end = datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc) if args.end else \
+        datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    client = MongoClient(args.mongodb_url)
+    if args.drop:
+        client.drop_database(args.db)
+        print(f"🗑️  Dropped database '{args.db}'")
+    client.close()
+
+    # Create the application's own index set so benchmarks measure real query plans
+    os.environ["MONGODB_URL"] = args.mongodb_url
+    os.environ["DATABASE_NAME"] = args.db
+    import asyncio
+    from app.database import connect_db, close_db
+
+    async def _ensure_indexes():
+        await connect_db()
+        await close_db()
+    asyncio.run(_ensure_indexes())
+
+    from app.auth import hash_password
+    password_hash = hash_password(BENCH_PASSWORD)
+
+    per_day = 1440 // args.interval
+    print(f"📦 Generating {args.users} users × {args.days} days × {per_day} vitals/day "
+          f"(~{args.users * args.days * per_day:,} vitals) into '{args.db}'")
+
+    shards = [list(range(i, args.users, args.workers)) for i in range(args.workers)]
+    jobs = [(args.mongodb_url, args.db, args.seed, shard, args.days, args.interval, end.isoformat(), password_hash)
+            for shard in shards if shard]
+
+    started = time.perf_counter()
+    if args.workers > 1:
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(_load_users, jobs)
+    else:
+        results = [_load_users(job) for job in jobs]
+    elapsed = time.perf_counter() - started
+
+    totals: dict = {}
+    for counts in results:
+        for collection, n in counts.items():
+            totals[collection] = totals.get(collection, 0) + n
+    for collection, n in sorted(totals.items()):
+        print(f"  ✅ {collection:<16} {n:>12,}")
+    total_docs = sum(totals.values())
+    print(f"⏱️  Loaded {total_docs:,} documents in {elapsed:.1f}s ({total_docs / max(elapsed, 1e-9):,.0f} docs/s)")
+    print(f"🔑 All users share the password '{BENCH_PASSWORD}'; bench000000@healix.local is an admin")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,22 @@ by DigitalMind
 Backend: FastAPI + MongoDB + LangChain Multi-Agent + ChromaDB RAG
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pymongo.errors import PyMongoError
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.database import connect_db, close_db
+from app.database import AnalyticsTimeout, connect_db, close_db
+from app.realtime import start_change_feed, stop_change_feed
+from app.retention import start_retention_worker, stop_retention_worker
+from app.ai.checkpointer import init_checkpointer
+from app.ai.llm_scheduler import LLMSaturated
+from app.ai.ollama_router import start_ollama_health_checks, stop_ollama_health_checks
+from app.ai.llm_clients import close_llm_clients
+from app.ai.usage import LLMQuotaExceeded, start_usage_meter, stop_usage_meter
+from app.ai.model_warmup import model_warmup_status, start_model_warmup, stop_model_warmup
+from app.snapshot import SnapshotScopeMiddleware
 from app.routes.auth_routes import router as auth_router
 from app.routes.user_routes import router as user_router
 from app.routes.vitals_routes import router as vitals_router
@@ -26,8 +37,20 @@ from app.routes.pose_routes import router as pose_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_db()
+    await init_checkpointer()
+    await start_change_feed()
+    await start_retention_worker()
+    await start_usage_meter()
+    await start_ollama_health_checks()
+    await start_model_warmup()
     print("🚀 Healix API is running")
     yield
+    await stop_model_warmup()
+    await stop_ollama_health_checks()
+    await close_llm_clients()
+    await stop_usage_meter()
+    await stop_retention_worker()
+    await stop_change_feed()
     await close_db()
 
 
@@ -46,7 +69,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Vitals-Watermark"],
 )
+# One memoized health snapshot per request (app.snapshot)
+app.add_middleware(SnapshotScopeMiddleware)
+
+@app.exception_handler(AnalyticsTimeout)
+async def analytics_timeout_handler(request: Request, exc: AnalyticsTimeout):
+    # Analytics reads run under a time budget (ANALYTICS_TIMEOUT_MS) — report it as a retryable 503
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Query exceeded its time budget, please retry shortly"},
+        headers={"Retry-After": "5"},
+    )
+
+
+@app.exception_handler(PyMongoError)
+async def mongo_error_handler(request: Request, exc: PyMongoError):
+    print(f"❌ Database error on {request.method} {request.url.path}: {type(exc).__name__}: {exc}")
+    return JSONResponse(status_code=500, content={"detail": "Database error"})
+
+
+@app.exception_handler(LLMSaturated)
+async def llm_saturated_handler(request: Request, exc: LLMSaturated):
+    # The LLM scheduler's queue for this request class is full — fail fast instead of timing out.
+    # Also a user past the daily token quota (LLMQuotaExceeded, retry after midnight UTC).
+    detail = "Daily AI usage limit reached" if isinstance(exc, LLMQuotaExceeded) else "The AI service is busy, please retry shortly"
+    return JSONResponse(
+        status_code=429,
+        content={"detail": detail, "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 # Mount routers under /api prefix
 app.include_router(auth_router, prefix="/api")
@@ -64,4 +118,14 @@ app.include_router(pose_router, prefix="/api")
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "service": "Healix API", "version": "1.0.0"}
+    models = model_warmup_status()
+    return {"status": "healthy", "service": "Healix API", "version": "1.0.0", "ready": models["ready"], "models": models}
+
+
+@app.get("/api/health/ready")
+async def readiness_check(response: Response):
+    # Readiness probe: 503 until LLM_MODEL and EMBED_MODEL are loaded, so the first request is fast
+    models = model_warmup_status()
+    if not models["ready"]:
+        response.status_code = 503
+    return {"ready": models["ready"], "models": models}
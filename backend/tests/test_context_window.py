@@ -0,0 +1,36 @@
+"""
+Chat history dedup against the agent thread (app.ai.context_window.dedupe_history):
+the agent's own checkpointed replies are dropped, replies that never went through
+the thread (cached or generic-agent ones) are kept.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from app.ai.context_window import dedupe_history
+
+CHECKPOINT = datetime(2026, 10, 19, 8, tzinfo=timezone.utc)
+
+
+def _entry(role: str, content: str, minutes: int, **extra) -> dict:
+    return {"role": role, "content": content, "created_at": CHECKPOINT + timedelta(minutes=minutes), **extra}
+
+
+def test_only_unseen_replies_are_kept():
+    history = [
+        _entry("user", "old", -5),
+        _entry("assistant", "threaded", 1, agent="nutrition"),
+        _entry("assistant", "from cache", 2, agent="nutrition", cached=True),
+        _entry("assistant", "generic agent", 3, agent="nutrition", generic=True),
+        _entry("assistant", "other agent", 4, agent="exercise"),
+        _entry("user", "what should I eat?", 5),
+    ]
+    fresh = dedupe_history(history, "what should I eat?", "nutrition", CHECKPOINT)
+    assert [h["content"] for h in fresh] == ["from cache", "generic agent", "other agent"]
+
+
+def test_without_a_checkpoint_everything_but_the_message_is_new():
+    history = [_entry("assistant", "hi", 0, agent="nutrition"), _entry("user", "hello", 1)]
+    assert [h["content"] for h in dedupe_history(history, "hello", "nutrition")] == ["hi"]
@@ -0,0 +1,22 @@
+"""
+Health report vitals trend (app.routes.smart_routes.calc_trend): readings come
+oldest first from fetch_vitals_range, so rising values are "increasing".
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+from app.routes.smart_routes import calc_trend
+
+
+def test_rising_readings_are_increasing():
+    assert calc_trend([60, 62, 61, 80, 82, 84]) == "increasing"
+
+
+def test_falling_readings_are_decreasing():
+    assert calc_trend([140, 138, 141, 120, 118, 119]) == "decreasing"
+
+
+def test_flat_or_short_series_is_stable():
+    assert calc_trend([97, 98, 97, 98]) == "stable"
+    assert calc_trend([70]) == "stable"
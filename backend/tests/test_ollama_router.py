@@ -0,0 +1,91 @@
+"""
+Ollama router failover against local fake Ollama servers (benchmarks.fake_ollama):
+a backend that goes away is skipped, and is used again once it is back.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+import asyncio
+import socket
+import time
+
+import httpx
+import uvicorn
+
+from app.ai import llm_clients
+from app.ai.ollama_router import Backend, OllamaRouter, RoutedOllamaEmbeddings
+from app.config import settings
+from benchmarks.fake_ollama import create_fake_ollama
+
+EMBED_MODEL = "nomic-embed-text"
+OPEN_SECONDS = 0.3
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _start(port: int) -> tuple[uvicorn.Server, asyncio.Task, dict]:
+    app = create_fake_ollama([f"{EMBED_MODEL}:latest"], latency_ms=5)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, app.state.stats
+
+
+async def _stop(server: uvicorn.Server, task: asyncio.Task):
+    server.should_exit = True
+    await task
+
+
+async def _embed(embeddings: RoutedOllamaEmbeddings, calls: int):
+    # Concurrent, so the least-loaded dispatch spreads them over every ready backend
+    return await asyncio.gather(*(embeddings.aembed_query(f"question {i}") for i in range(calls)))
+
+
+async def _scenario():
+    ports = [_free_port(), _free_port()]
+    (server_a, task_a, stats_a), (server_b, task_b, stats_b) = [await _start(p) for p in ports]
+    backend_a, backend_b = (Backend(f"http://127.0.0.1:{p}") for p in ports)
+    router = OllamaRouter([backend_a, backend_b], circuit_failures=1, circuit_open_seconds=OPEN_SECONDS)
+    embeddings = RoutedOllamaEmbeddings(router, EMBED_MODEL)
+
+    async with httpx.AsyncClient(timeout=1) as probe:
+        try:
+            await router.probe(probe)
+            assert len(await _embed(embeddings, 8)) == 8
+            assert stats_a["embed"] and stats_b["embed"]
+
+            # A goes away: calls fail over to B, A's circuit opens and it is skipped
+            await _stop(server_a, task_a)
+            served_b = stats_b["embed"]
+            assert len(await _embed(embeddings, 8)) == 8
+            assert stats_b["embed"] - served_b == 8
+            assert backend_a.state(time.monotonic()) == "open"
+            await router.probe(probe)
+            assert not backend_a.healthy
+            requests_a = backend_a.requests
+            await _embed(embeddings, 4)
+            assert backend_a.requests == requests_a
+
+            # A is back: the probe marks it healthy, the cooled-down circuit closes, it serves again
+            server_a, task_a, stats_a = await _start(ports[0])
+            await asyncio.sleep(OPEN_SECONDS)
+            await router.probe(probe)
+            assert backend_a.healthy and backend_a.failures == 0
+            assert len(await _embed(embeddings, 8)) == 8
+            assert stats_a["embed"] > 0
+        finally:
+            for server, task in ((server_a, task_a), (server_b, task_b)):
+                if not task.done():
+                    await _stop(server, task)
+            await llm_clients.close_llm_clients()
+
+
+def test_failed_backend_is_skipped_and_recovers(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "ollama")
+    asyncio.run(_scenario())
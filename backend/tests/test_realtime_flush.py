@@ -0,0 +1,35 @@
+"""
+Change-feed batch flush (app.realtime._flush): every uploaded vitals sample is
+checked for alerts, while the vitals push is collapsed to the newest sample.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app import realtime
+
+
+def test_spike_early_in_a_batch_still_alerts(monkeypatch):
+    sent = []
+
+    async def emit(event, data, room=None):
+        sent.append((event, data))
+
+    monkeypatch.setattr(realtime.sio, "emit", emit)
+    start = datetime(2026, 10, 19, 8)
+    vitals = [
+        {"heart_rate": 80, "timestamp": start + timedelta(minutes=2)},
+        {"heart_rate": 140, "timestamp": start},
+        {"heart_rate": 75, "timestamp": start + timedelta(minutes=1)},
+    ]
+    asyncio.run(realtime._flush({"u1": {"vitals": vitals, "medications": {}, "alerts": [], "smart": []}}))
+
+    pushed = dict(sent)
+    assert pushed["vitals_data"]["heart_rate"] == 80
+    assert pushed["vitals_data"]["batch_size"] == 3
+    [alert] = pushed["health_alert"]["alerts"]
+    assert alert["type"] == "heart_rate"
+    assert alert["timestamp"].startswith("2026-10-19T08:00")
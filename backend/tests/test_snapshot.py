@@ -0,0 +1,31 @@
+"""
+Health snapshot memo (app.snapshot): one load per scope, dropped by a write in
+the same scope so a later read sees it.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+import asyncio
+
+from app import snapshot
+
+
+def test_write_in_scope_drops_the_memo(monkeypatch):
+    loads = []
+
+    async def load(user_id, profile_doc):
+        loads.append(user_id)
+        return snapshot._empty(user_id, snapshot._profile(profile_doc))
+
+    monkeypatch.setattr(snapshot, "_load", load)
+
+    async def scenario():
+        snapshot.begin_snapshot_scope()
+        first = await snapshot.get_health_snapshot("u1")
+        assert await snapshot.get_health_snapshot("u1") is first
+        snapshot.invalidate_snapshot("u1")
+        assert await snapshot.get_health_snapshot("u1") is not first
+
+    asyncio.run(scenario())
+    assert loads == ["u1", "u1"]
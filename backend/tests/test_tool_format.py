@@ -0,0 +1,67 @@
+"""
+Agent tool output formatting (app.ai.tool_format): fields are gated on missing
+values, not on falsy ones, and the rendered text is memoized per data version.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+from datetime import datetime
+
+from app.ai.tool_format import (
+    RecordSchema, ToolOutputCache, format_exercise_plan, format_nutrition_plan, format_vitals,
+)
+
+
+def test_zero_values_are_kept():
+    text = format_vitals({"heart_rate": 0, "steps": 0, "calories_burned": 0.0})
+    assert text == "vitals | HR 0bpm; steps 0; burned 0kcal"
+
+
+def test_missing_values_drop_the_field_or_render_unknown():
+    assert format_vitals({"heart_rate": None, "spo2": "", "steps": 12}) == "vitals | steps 12"
+    # Only the first key gates a field; later missing keys render as "?"
+    assert format_vitals({"blood_pressure_sys": 120}) == "vitals | BP 120/?mmHg"
+
+
+def test_exercise_sets_do_not_depend_on_warmup_sets():
+    plan = {"user_level": "beginner", "safe_load_index": 0, "exercises": [
+        {"name": "Squat", "warmup_sets": 0, "sets": 3, "reps": 10, "rest_seconds": 60},
+        {"name": "Plank", "sets": 3, "reps": 1},
+        {"name": "Row", "warmup_sets": 2, "sets": 4, "reps": 8, "alternatives": []},
+    ]}
+    assert format_exercise_plan(plan).splitlines() == [
+        "exercise plan | level beginner; SLI 0%",
+        "1. Squat 3x10 +0 warmup rest 60s",
+        "2. Plank 3x1",
+        "3. Row 4x8 +2 warmup",
+    ]
+
+
+def test_nutrition_plan_lines():
+    plan = {
+        "daily_calories_target": 1800, "macros": {"protein": 0, "carbs": 200, "fat": 55.5},
+        "meals": [{"type": "lunch", "time": "13:00", "foods": [{"name": "Rice", "calories": 200, "protein": 4.0}]}, {}],
+    }
+    assert format_nutrition_plan(plan).splitlines() == [
+        "nutrition plan | target 1800kcal/day; macros P0g C200g F55.5g",
+        "lunch 13:00: Rice 200kcal 4gP",
+        "meal: -",
+    ]
+
+
+def test_values_are_rounded_and_timestamps_cut_to_the_minute():
+    schema = RecordSchema([("at", "{timestamp}"), ("avg", "{value}")])
+    doc = {"timestamp": datetime(2026, 10, 19, 8, 30, 59), "value": 72.04}
+    assert schema.render(doc) == "at 2026-10-19 08:30; avg 72"
+
+
+def test_memo_serves_only_the_matching_version():
+    cache = ToolOutputCache(2)
+    cache.put("u1", "lookup_vitals", ("v1",), "old")
+    assert cache.get("u1", "lookup_vitals", ("v1",)) == "old"
+    assert cache.get("u1", "lookup_vitals", ("v2",)) is None
+    cache.put("u2", "lookup_vitals", ("v1",), "b")
+    cache.put("u3", "lookup_vitals", ("v1",), "c")  # evicts the least recently used (u1)
+    assert cache.get("u1", "lookup_vitals", ("v1",)) is None
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,73 @@
+"""
+LLM usage flush (app.ai.usage.UsageMeter): increments being written still count
+toward the daily total, and after a partial bulk write failure only the failed
+upserts are retried.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from app.ai import usage
+
+
+class FakeUsageCollection:
+    def __init__(self, fail_index=None):
+        self.fail_index = fail_index
+        self.tokens: dict[str, int] = {}
+        self.writing = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def bulk_write(self, ops, ordered=True):
+        self.writing.set()
+        await self.release.wait()
+        for i, op in enumerate(ops):
+            if i != self.fail_index:
+                _id = op._filter["_id"]
+                self.tokens[_id] = self.tokens.get(_id, 0) + op._doc["$inc"]["tokens"]
+        if self.fail_index is not None:
+            raise BulkWriteError({"writeErrors": [{"index": self.fail_index, "code": 11000, "errmsg": "dup"}]})
+
+    async def find_one(self, query, projection=None):
+        tokens = self.tokens.get(query["_id"])
+        return None if tokens is None else {"tokens": tokens}
+
+
+def _meter(monkeypatch, collection) -> usage.UsageMeter:
+    monkeypatch.setattr(usage, "get_db", lambda: {usage.COLLECTION: collection})
+    return usage.UsageMeter(soft_quota=0, hard_quota=1000, refresh_seconds=0)
+
+
+def test_tokens_being_written_still_count(monkeypatch):
+    collection = FakeUsageCollection()
+    meter = _meter(monkeypatch, collection)
+
+    async def scenario():
+        meter.record("u1", "chat", 100, 50, 10)
+        flush = asyncio.create_task(meter.flush())
+        await collection.writing.wait()
+        during = await meter.day_tokens("u1")
+        collection.release.set()
+        await flush
+        return during, await meter.day_tokens("u1")
+
+    assert asyncio.run(scenario()) == (150, 150)
+
+
+def test_only_failed_upserts_are_retried(monkeypatch):
+    collection = FakeUsageCollection(fail_index=1)
+    meter = _meter(monkeypatch, collection)
+    meter.record("u1", "chat", 10, 0, 1)
+    meter.record("u2", "chat", 20, 0, 1)
+    collection.release.set()
+
+    asyncio.run(meter.flush())
+    assert list(meter._pending) == [("u2", usage._today())]
+
+    collection.fail_index = None
+    asyncio.run(meter.flush())
+    day = usage._today()
+    assert collection.tokens == {f"u1:{day}": 10, f"u2:{day}": 20}
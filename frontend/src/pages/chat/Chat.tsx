@@ -6,11 +6,14 @@ import {
   Send, Bot, User, Sparkles, RefreshCw, Copy, ThumbsUp, ThumbsDown,
   Activity, Utensils, Dumbbell, AlertTriangle, Mic, Paperclip, ChevronDown
 } from 'lucide-react';
-import api from '../../services/api';
+import { streamChat } from '../../services/api';
 import { HoloParticles, HoloBgMesh } from '../../components/hologram/HologramEffects';
 
 const fadeInUp = { initial: { opacity: 0, y: 20 }, animate: { opacity: 1, y: 0 } };
 
+// One conversation per open chat page — a new message cancels only this page's running reply
+const newConversationId = () => `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+
 interface Message {
   id: string;
   role: 'user' | 'assistant';
@@ -43,6 +46,7 @@ export default function Chat() {
   ]);
   const [isTyping, setIsTyping] = useState(false);
   const [selectedAgent, setSelectedAgent] = useState<string | null>(null);
+  const conversationId = useRef(newConversationId());
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const inputRef = useRef<HTMLTextAreaElement>(null);
 
@@ -78,16 +82,41 @@ export default function Chat() {
     setInput('');
     setIsTyping(true);
 
+    const assistantId = (Date.now() + 1).toString();
     try {
-      const res = await api.post('/chat/', { message: input, agent: selectedAgent });
-      const assistantMsg: Message = {
-        id: (Date.now() + 1).toString(),
-        role: 'assistant',
-        agent: res.data.agent || 'clinical',
-        content: res.data.response,
-        timestamp: new Date(),
-      };
-      setMessages(prev => [...prev, assistantMsg]);
+      let started = false;
+      let failed = false;
+      await streamChat({ message: input, agent: selectedAgent, conversation_id: conversationId.current }, (event) => {
+        if (event.type === 'error') {
+          failed = true;
+          return;
+        }
+        if (!started && (event.type === 'agent' || event.type === 'token')) {
+          started = true;
+          setIsTyping(false);
+          setMessages(prev => [...prev, {
+            id: assistantId,
+            role: 'assistant',
+            agent: (event.agent as Message['agent']) || 'clinical',
+            content: '',
+            timestamp: new Date(),
+            thinking: true,
+          }]);
+        }
+        setMessages(prev => prev.map(m => {
+          if (m.id !== assistantId) return m;
+          if (event.type === 'token') return { ...m, content: m.content + (event.content || '') };
+          // The streamed text was abandoned (failed synthesis) — its replacement follows
+          if (event.type === 'reset') return { ...m, content: '' };
+          // The final answer replaces the streamed text (which may include pre-tool thoughts)
+          if (event.type === 'done') return { ...m, content: event.response || m.content, thinking: false };
+          return m;
+        }));
+      });
+      if (failed || !started) {
+        setMessages(prev => prev.filter(m => m.id !== assistantId));
+        throw new Error('stream failed');
+      }
     } catch {
       // Fallback response when API is not available
       const fallbackResponses: Record<string, { content: string; agent: 'clinical' | 'nutrition' | 'exercise' | 'risk' }> = {
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useTranslation } from 'react-i18next';
 import { motion } from 'framer-motion';
-import { useAuthStore, useVitalsStore, useUIStore } from '../../store';
+import { useAuthStore, useVitalsStore, useUIStore, useLiveUpdatesStore } from '../../store';
 import {
   Heart, Droplets, Brain, Flame, Footprints, Activity, Wind,
   TrendingUp, TrendingDown, Minus, AlertTriangle, Clock, Dumbbell,
@@ -29,6 +29,7 @@ export default function Dashboard() {
   const { t } = useTranslation();
   const { user } = useAuthStore();
   const { current: vitals } = useVitalsStore();
+  const medicationsVersion = useLiveUpdatesStore((s) => s.medicationsVersion);
   const { language } = useUIStore();
 
   const [weeklyData, setWeeklyData] = useState<any[]>([]);
@@ -42,6 +43,12 @@ export default function Dashboard() {
     loadDashboardData();
   }, []);
 
+  // Medication changes pushed by the server (another device, a dose marked taken)
+  useEffect(() => {
+    if (!medicationsVersion) return;
+    api.get('/medications/today').then((res) => setMedications(res.data)).catch(() => {});
+  }, [medicationsVersion]);
+
   const loadDashboardData = async () => {
     try {
       const [weeklyRes, exercisesRes, mealsRes, medsRes] = await Promise.all([
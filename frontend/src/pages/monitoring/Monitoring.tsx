@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useMemo } from 'react';
 import { useTranslation } from 'react-i18next';
 import { motion } from 'framer-motion';
 import { useVitalsStore, useUIStore } from '../../store';
@@ -12,6 +12,7 @@ import {
   LineChart, Line, BarChart, Bar, RadarChart, PolarGrid, PolarAngleAxis, PolarRadiusAxis, Radar,
 } from 'recharts';
 import api from '../../services/api';
+import type { VitalSigns } from '../../types';
 import { HoloCard, HoloParticles, HoloBgMesh, HoloScanLine, HoloDNAHelix, HoloHeartbeat } from '../../components/hologram/HologramEffects';
 
 const fadeInUp = { initial: { opacity: 0, y: 20 }, animate: { opacity: 1, y: 0 } };
@@ -19,7 +20,7 @@ const fadeInUp = { initial: { opacity: 0, y: 20 }, animate: { opacity: 1, y: 0 }
 export default function Monitoring() {
   const { t } = useTranslation();
   const { language } = useUIStore();
-  const { current: vitals } = useVitalsStore();
+  const { current: vitals, history, syncHistory } = useVitalsStore();
   const [activeTab, setActiveTab] = useState<'realtime' | '24h' | 'weekly' | 'population'>('realtime');
 
   const v = vitals || {
@@ -29,15 +30,43 @@ export default function Monitoring() {
     bodyTemperature: 36.7,
   };
 
-  // 24h data
-  const hourlyData = Array.from({ length: 24 }, (_, i) => ({
-    hour: `${i.toString().padStart(2, '0')}:00`,
-    heartRate: 60 + Math.round(Math.random() * 30 + (i > 8 && i < 22 ? 10 : 0)),
-    hrv: 30 + Math.round(Math.random() * 40),
-    stress: Math.round(1 + Math.random() * 6 + (i > 14 && i < 18 ? 2 : 0)),
-    oxygen: 95 + Math.round(Math.random() * 4),
-    steps: Math.round(Math.random() * 800 + (i > 6 && i < 22 ? 200 : 0)),
-  }));
+  // Only samples newer than the store's watermark are fetched; live pushes keep it current afterwards
+  useEffect(() => {
+    syncHistory('24h').catch(() => {});
+  }, [syncHistory]);
+
+  // 24h data — hourly averages of the synced history, sample data until there is any
+  const hourlyData = useMemo(() => {
+    const cutoff = new Date(Date.now() - 24 * 3600 * 1000).toISOString();
+    const recent = history.filter((h) => h.timestamp >= cutoff);
+    if (!recent.length) {
+      return Array.from({ length: 24 }, (_, i) => ({
+        hour: `${i.toString().padStart(2, '0')}:00`,
+        heartRate: 60 + Math.round(Math.random() * 30 + (i > 8 && i < 22 ? 10 : 0)),
+        hrv: 30 + Math.round(Math.random() * 40),
+        stress: Math.round(1 + Math.random() * 6 + (i > 14 && i < 18 ? 2 : 0)),
+        oxygen: 95 + Math.round(Math.random() * 4),
+        steps: Math.round(Math.random() * 800 + (i > 6 && i < 22 ? 200 : 0)),
+      }));
+    }
+    const avg = (values: (number | undefined)[]) => {
+      const present = values.filter((x): x is number => x != null);
+      return present.length ? Math.round(present.reduce((a, b) => a + b, 0) / present.length) : 0;
+    };
+    const byHour = new Map<string, VitalSigns[]>();
+    for (const h of recent) {
+      const hour = `${new Date(h.timestamp).getHours().toString().padStart(2, '0')}:00`;
+      byHour.set(hour, [...(byHour.get(hour) ?? []), h]);
+    }
+    return [...byHour.entries()].map(([hour, samples]) => ({
+      hour,
+      heartRate: avg(samples.map((s) => s.heartRate)),
+      hrv: avg(samples.map((s) => s.hrv)),
+      stress: avg(samples.map((s) => s.stressLevel)),
+      oxygen: avg(samples.map((s) => s.oxygenSaturation)),
+      steps: Math.max(0, ...samples.map((s) => s.steps ?? 0)),
+    }));
+  }, [history]);
 
   const weeklyData = [
     { day: language === 'ar' ? 'السبت' : 'Sat', heartRate: 68, hrv: 48, stress: 4, steps: 5200, oxygen: 98 },
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
-import { useUIStore } from '../../store';
+import { useUIStore, useLiveUpdatesStore } from '../../store';
 import {
   BookOpen, Plus, Send, Smile, SmilePlus, Meh, Frown, AlertCircle,
   Zap, Activity, Brain, TrendingUp, Calendar, Trash2, Loader2,
@@ -34,9 +34,12 @@ export default function HealthJournal() {
   const [pain, setPain] = useState(0);
   const [lastResult, setLastResult] = useState<any>(null);
 
+  // Refetch when an entry is written elsewhere (another tab or device) — pushed as smart_update
+  const journalVersion = useLiveUpdatesStore((s) => s.smartVersions.health_journal ?? 0);
+
   useEffect(() => {
     loadData();
-  }, []);
+  }, [journalVersion]);
 
   const loadData = async () => {
     setLoading(true);
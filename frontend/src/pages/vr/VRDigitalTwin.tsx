@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useTranslation } from 'react-i18next';
-import { useUIStore, useAuthStore } from '../../store';
+import { useUIStore, useAuthStore, useVitalsStore, useLiveUpdatesStore } from '../../store';
 import {
   Heart, Activity, Brain, Wind, Thermometer, Footprints,
   Flame, Gauge, Moon, Droplets, ShieldAlert, TrendingUp,
@@ -252,13 +252,22 @@ export default function VRDigitalTwin() {
   const [activePanel, setActivePanel] = useState<'vitals' | 'profile' | 'meds' | 'risk'>('vitals');
   const [rotateY, setRotateY] = useState(0);
 
-  // Fetch all data from DB
+  const liveVitals = useVitalsStore((s) => s.latestSample);
+  const medicationsVersion = useLiveUpdatesStore((s) => s.medicationsVersion);
+
+  // Fetch all data from DB once — later changes arrive as socket pushes
   useEffect(() => {
     fetchAllData();
-    const interval = setInterval(fetchVitals, 30000); // refresh vitals every 30s
-    return () => clearInterval(interval);
   }, []);
 
+  useEffect(() => {
+    if (liveVitals) setVitals((prev) => ({ ...prev, ...liveVitals }));
+  }, [liveVitals]);
+
+  useEffect(() => {
+    if (medicationsVersion) fetchMedications();
+  }, [medicationsVersion]);
+
   const fetchAllData = async () => {
     setLoading(true);
     await Promise.allSettled([
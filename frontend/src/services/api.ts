@@ -31,4 +31,46 @@ api.interceptors.response.use(
   }
 );
 
+export interface ChatStreamEvent {
+  type: 'agent' | 'tool_start' | 'tool_end' | 'token' | 'reset' | 'done' | 'error';
+  agent?: string;
+  tool?: string;
+  content?: string;
+  response?: string;
+  detail?: string;
+}
+
+// POST /api/chat/stream — Server-Sent Events parsed from a fetch body (EventSource cannot POST)
+export const streamChat = async (
+  body: { message: string; agent?: string | null; conversation_id?: string },
+  onEvent: (event: ChatStreamEvent) => void,
+): Promise<void> => {
+  const token = localStorage.getItem('healix_token');
+  const res = await fetch('/api/chat/stream', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok || !res.body) throw new Error(`Chat stream failed: ${res.status}`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      const data = frame.split('\n').find((line) => line.startsWith('data: '));
+      if (data) onEvent(JSON.parse(data.slice(6)));
+    }
+  }
+};
+
 export default api;
@@ -1,13 +1,23 @@
 import { io, Socket } from 'socket.io-client';
+import { useVitalsStore, useLiveUpdatesStore } from '../store';
+import type { VitalsSample, LiveAlert, SmartChange } from '../types';
 
 let socket: Socket | null = null;
+// Timestamp of the newest vitals sample seen — sent on (re)connect so the server
+// replays only what was missed (`vitals_resume`) instead of the whole history
+let lastVitalsAt: string | null = null;
+
+const trackVitals = (timestamp?: string) => {
+  if (timestamp && (!lastVitalsAt || timestamp > lastVitalsAt)) lastVitalsAt = timestamp;
+};
 
 export const connectSocket = (token: string): Socket => {
   if (socket?.connected) return socket;
 
   socket = io('/', {
     path: '/ws/socket.io',
-    auth: { token },
+    // Evaluated on every (re)connect attempt
+    auth: (cb) => cb(lastVitalsAt ? { token, since: lastVitalsAt } : { token }),
     transports: ['websocket', 'polling'],
     reconnection: true,
     reconnectionAttempts: 10,
@@ -22,6 +32,31 @@ export const connectSocket = (token: string): Socket => {
     console.log('[Healix] Socket disconnected:', reason);
   });
 
+  // Server pushes (live socket vitals and HTTP writes relayed by the change feed)
+  socket.on('vitals_data', (data: VitalsSample) => {
+    useVitalsStore.getState().applyVitals([data]);
+    trackVitals(data?.timestamp);
+  });
+
+  socket.on('health_alert', (data: { alerts?: LiveAlert[] }) => {
+    useVitalsStore.getState().addLiveAlerts(data?.alerts ?? []);
+  });
+
+  socket.on('medication_update', () => useLiveUpdatesStore.getState().bumpMedications());
+
+  socket.on('smart_update', (data: { changes?: SmartChange[] }) => {
+    useLiveUpdatesStore.getState().bumpSmart((data?.changes ?? []).map((c) => c.feature));
+  });
+
+  // Replay after a reconnect: apply the missed samples before moving the watermark past them
+  socket.on('vitals_resume', (data: { samples?: VitalsSample[]; watermark?: string; truncated?: boolean }) => {
+    const vitals = useVitalsStore.getState();
+    vitals.applyVitals(data?.samples ?? []);
+    trackVitals(data?.watermark);
+    // Gap longer than the replay window — fill the rest from /vitals/history
+    if (data?.truncated) vitals.syncHistory().catch(() => {});
+  });
+
   socket.on('connect_error', (err) => {
     console.error('[Healix] Socket error:', err.message);
   });
@@ -35,5 +70,6 @@ export const disconnectSocket = () => {
   if (socket) {
     socket.disconnect();
     socket = null;
+    lastVitalsAt = null;
   }
 };
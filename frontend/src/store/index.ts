@@ -1,7 +1,7 @@
 import { create } from 'zustand';
 import api from '../services/api';
 import { connectSocket, disconnectSocket } from '../services/socket';
-import type { User, VitalSigns, Alert } from '../types';
+import type { User, VitalSigns, VitalsSample, Alert, LiveAlert } from '../types';
 
 // ===== Auth Store =====
 interface AuthState {
@@ -56,6 +56,7 @@ export const useAuthStore = create<AuthState>((set, get) => ({
     localStorage.removeItem('healix_token');
     localStorage.removeItem('healix_user');
     disconnectSocket();
+    useVitalsStore.setState({ current: null, latestSample: null, history: [], historyWatermark: null });
     set({ user: null, token: null, isAuthenticated: false });
   },
 
@@ -83,26 +84,112 @@ export const useAuthStore = create<AuthState>((set, get) => ({
 }));
 
 // ===== Vitals Store =====
+const HISTORY_LIMIT = 2000;
+
+// Server timestamps may come without a zone (naive UTC from Mongo) — normalize so they compare as strings
+export const toIsoUtc = (timestamp: string): string =>
+  new Date(/[zZ]|[+-]\d\d:?\d\d$/.test(timestamp) ? timestamp : `${timestamp}Z`).toISOString();
+
+const toVitalSigns = (s: VitalsSample): Partial<VitalSigns> => {
+  const v: Partial<VitalSigns> = { timestamp: toIsoUtc(s.timestamp!) };
+  if (s.heart_rate != null) v.heartRate = s.heart_rate;
+  if (s.spo2 != null) v.oxygenSaturation = s.spo2;
+  if (s.stress_level != null) v.stressLevel = s.stress_level;
+  if (s.steps != null) v.steps = s.steps;
+  if (s.calories_burned != null) v.caloriesBurned = s.calories_burned;
+  if (s.blood_pressure_sys != null) v.bloodPressureSystolic = s.blood_pressure_sys;
+  if (s.blood_pressure_dia != null) v.bloodPressureDiastolic = s.blood_pressure_dia;
+  if (s.hrv != null) v.hrv = s.hrv;
+  if (s.body_temp != null) v.bodyTemperature = s.body_temp;
+  if (s.sleep_hours != null) v.sleepHours = s.sleep_hours;
+  return v;
+};
+
+const ALERT_TITLES: Record<string, [string, string]> = {
+  heart_rate: ['Heart rate', 'نبض القلب'],
+  spo2: ['Oxygen saturation', 'تشبع الأكسجين'],
+  stress: ['Stress level', 'مستوى التوتر'],
+  blood_pressure: ['Blood pressure', 'ضغط الدم'],
+};
+
 interface VitalsState {
   current: VitalSigns | null;
+  latestSample: VitalsSample | null; // `current` in the server's field names
   history: VitalSigns[];
+  historyWatermark: string | null; // X-Vitals-Watermark of the last /vitals/history call
   alerts: Alert[];
   setCurrent: (data: VitalSigns) => void;
+  applyVitals: (samples: VitalsSample[]) => void;
+  syncHistory: (period?: string) => Promise<void>;
   addAlert: (alert: Alert) => void;
+  addLiveAlerts: (alerts: LiveAlert[]) => void;
   markAlertRead: (id: string) => void;
   clearAlerts: () => void;
 }
 
 export const useVitalsStore = create<VitalsState>((set, get) => ({
   current: null,
+  latestSample: null,
   history: [],
+  historyWatermark: null,
   alerts: [],
 
   setCurrent: (data) => set({ current: data }),
 
+  // Merge pushed / fetched samples: history stays sorted and deduplicated, `current` follows the newest
+  applyVitals: (samples) => {
+    const incoming = samples.filter((s) => s?.timestamp).map(toVitalSigns);
+    if (!incoming.length) return;
+    const byTime = new Map(get().history.map((h) => [h.timestamp, h]));
+    for (const v of incoming) byTime.set(v.timestamp!, { ...byTime.get(v.timestamp!), ...v } as VitalSigns);
+    const history = [...byTime.values()]
+      .sort((a, b) => a.timestamp.localeCompare(b.timestamp))
+      .slice(-HISTORY_LIMIT);
+    const newest = history[history.length - 1];
+    const current = get().current;
+    if (!current || !current.timestamp || newest.timestamp >= current.timestamp) {
+      const latest = samples.reduce((a, b) => (toIsoUtc(b.timestamp ?? '1970-01-01') > toIsoUtc(a.timestamp ?? '1970-01-01') ? b : a));
+      set({
+        history,
+        current: { status: 'normal', ...current, ...newest } as VitalSigns,
+        latestSample: { ...get().latestSample, ...latest },
+      });
+    } else {
+      set({ history });
+    }
+  },
+
+  // Incremental history sync: after the first call only samples newer than the watermark come back
+  syncHistory: async (period = '24h') => {
+    const since = get().historyWatermark;
+    const res = await api.get<VitalsSample[]>('/vitals/history', { params: since ? { period, since } : { period } });
+    get().applyVitals(res.data);
+    const watermark = res.headers['x-vitals-watermark'];
+    if (watermark) set({ historyWatermark: toIsoUtc(watermark) });
+  },
+
   addAlert: (alert) =>
     set({ alerts: [alert, ...get().alerts].slice(0, 50) }),
 
+  addLiveAlerts: (alerts) => {
+    const now = new Date().toISOString();
+    alerts.forEach((a, i) => {
+      const [title, titleAr] = ALERT_TITLES[a.type] ?? ['Health alert', 'تنبيه صحي'];
+      const severity = a.severity === 'critical' || a.severity === 'high' ? 'critical' : a.severity === 'medium' ? 'warning' : 'info';
+      get().addAlert({
+        _id: `${a.type}-${a.created_at ?? now}-${i}`,
+        type: severity === 'critical' ? 'vital_critical' : 'vital_warning',
+        title,
+        titleAr,
+        message: a.message,
+        messageAr: a.message_ar ?? a.message,
+        severity,
+        timestamp: a.created_at ?? now,
+        read: false,
+      });
+    });
+  },
+
   markAlertRead: (id) =>
     set({
       alerts: get().alerts.map((a) =>
@@ -113,6 +200,28 @@ export const useVitalsStore = create<VitalsState>((set, get) => ({
   clearAlerts: () => set({ alerts: [] }),
 }));
 
+// ===== Live Updates Store =====
+// Bumped by server pushes (medication_update / smart_update) — pages refetch when their counter changes
+interface LiveUpdatesState {
+  medicationsVersion: number;
+  smartVersions: Record<string, number>;
+  bumpMedications: () => void;
+  bumpSmart: (features: string[]) => void;
+}
+
+export const useLiveUpdatesStore = create<LiveUpdatesState>((set, get) => ({
+  medicationsVersion: 0,
+  smartVersions: {},
+
+  bumpMedications: () => set({ medicationsVersion: get().medicationsVersion + 1 }),
+
+  bumpSmart: (features) => {
+    const smartVersions = { ...get().smartVersions };
+    for (const feature of new Set(features)) smartVersions[feature] = (smartVersions[feature] ?? 0) + 1;
+    set({ smartVersions });
+  },
+}));
+
 // ===== UI Store =====
 interface UIState {
   sidebarOpen: boolean;
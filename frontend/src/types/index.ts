@@ -194,6 +194,22 @@ export interface VitalSigns {
 
 export type HealthStatus = 'normal' | 'warning' | 'critical';
 
+// A vitals sample as the server sends it (socket pushes, /vitals/history)
+export interface VitalsSample {
+  timestamp?: string;
+  heart_rate?: number;
+  spo2?: number;
+  stress_level?: number;
+  steps?: number;
+  calories_burned?: number;
+  blood_pressure_sys?: number;
+  blood_pressure_dia?: number;
+  hrv?: number;
+  body_temp?: number;
+  sleep_hours?: number;
+  sleep_quality?: number;
+}
+
 export interface VitalsTrend {
   date: string;
   heartRate: number;
@@ -289,6 +305,23 @@ export interface SocketEvents {
   chat_message: ChatMessage;
 }
 
+// `health_alert` push payload entry
+export interface LiveAlert {
+  type: string;
+  severity: string;
+  message: string;
+  message_ar?: string;
+  created_at?: string;
+}
+
+// `smart_update` push payload entry
+export interface SmartChange {
+  feature: string;
+  id: string;
+  operation: string;
+  created_at?: string;
+}
+
 export interface Alert {
   _id: string;
   type: 'vital_warning' | 'vital_critical' | 'medication' | 'exercise' | 'emergency';